@@ -0,0 +1,267 @@
+import marshal
+import os
+import sys
+from collections import OrderedDict
+from importlib.util import MAGIC_NUMBER
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from threading import Lock, get_ident
+from types import CodeType
+
+from antlr4.tree.Tree import Tree
+
+from backend.lowering import TREE_FORMAT, Lowering
+from backend.version import VERSION
+
+class CodeCache:
+    """
+    Cache of compiled Python code objects, in memory and optionally on disk.
+
+    The memory keeps the least recently used code objects, like ParseCache, the size of an entry being approximated by
+    the size of its generated source, in bytes. Code objects are stored on disk with marshal, behind the magic number
+    of the running Python version, so that the entries written by another version are ignored.
+    """
+
+    def __init__(self, directory: str | None = None, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Constructor.
+
+        :param directory: directory storing the code objects on disk, None to only cache them in memory
+        :param max_entries: the maximum number of code objects kept in memory
+        :param max_bytes: the maximum total size of the sources of the code objects kept in memory
+        """
+        self._directory = Path(directory) if directory is not None else None
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._codes = OrderedDict()  # Code object and size by key, from the least to the most recently used
+        self._bytes = 0
+        self._lock = Lock()
+
+    def get(self, key: str) -> CodeType | None:
+        with self._lock:
+            entry = self._codes.get(key)
+            if entry is not None:
+                self._codes.move_to_end(key)
+                return entry[0]
+        if self._directory is None:
+            return None
+        entry = self._load(key)
+        if entry is None:
+            return None
+        self._remember(key, *entry)
+        return entry[0]
+
+    def put(self, key: str, code: CodeType, size: int) -> None:
+        self._remember(key, code, size)
+        if self._directory is not None:
+            try:
+                self._store(key, code)
+            except OSError:
+                pass  # The directory only speeds up the next processes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._codes.clear()
+            self._bytes = 0
+
+    def _remember(self, key: str, code: CodeType, size: int) -> None:
+        with self._lock:
+            previous = self._codes.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self._max_bytes:
+                return
+            self._codes[key] = (code, size)
+            self._bytes += size
+            while len(self._codes) > self._max_entries or self._bytes > self._max_bytes:
+                _, (_, evicted) = self._codes.popitem(last=False)
+                self._bytes -= evicted
+
+    def _load(self, key: str) -> tuple[CodeType, int] | None:
+        """
+        :return: the code object stored under the key and the size of its entry, None if it is missing or unreadable
+        """
+        try:
+            data = (self._directory / key).read_bytes()
+        except OSError:
+            return None
+        if not data.startswith(MAGIC_NUMBER):
+            return None
+        try:
+            return marshal.loads(data[len(MAGIC_NUMBER):]), len(data)
+        except (EOFError, ValueError, TypeError):
+            return None
+
+    def _store(self, key: str, code: CodeType) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename, so that concurrent readers never see a partial entry. The temporary file is unique to the
+        # thread, the sessions of a server sharing the directory.
+        path = self._directory / key
+        temporary = path.with_name(path.name + "." + str(os.getpid()) + "." + str(get_ident()) + ".tmp")
+        temporary.write_bytes(MAGIC_NUMBER + marshal.dumps(code))
+        os.replace(temporary, path)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    @property
+    def directory(self) -> Path | None:
+        return self._directory
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+class ParseCache:
+    """
+    Least recently used cache of parse trees, keyed by the hash of their code.
+
+    The interpreters do not modify the trees, so a cached tree can be interpreted by several interpreters of the same
+    language at once, see Parser. The size of an entry is approximated by the size of its code, in bytes.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Constructor.
+
+        :param max_entries: the maximum number of trees kept
+        :param max_bytes: the maximum total size of the code of the trees kept
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._trees = OrderedDict()  # Tree and size by key, from the least to the most recently used
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def get(self, key: bytes):
+        with self._lock:
+            entry = self._trees.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._trees.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, tree, size: int) -> None:
+        with self._lock:
+            previous = self._trees.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self._max_bytes:
+                return
+            self._trees[key] = (tree, size)
+            self._bytes += size
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._trees.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def _evict(self) -> None:
+        while len(self._trees) > self._max_entries or self._bytes > self._max_bytes:
+            _, (_, size) = self._trees.popitem(last=False)
+            self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._trees)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    @max_entries.setter
+    def max_entries(self, max_entries: int) -> None:
+        with self._lock:
+            self._max_entries = max_entries
+            self._evict()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+class TreeCache:
+    """
+    Cache of lean trees on disk, e.g. for batch jobs interpreting the same programs in new processes, see Parser.
+
+    Each entry is a file named after the key of its tree, holding a header followed by the tree encoded by
+    Lowering.dump(). The header identifies the version of LipVM, the format of the trees, the byte order and the
+    grammar of the language. Entries are only read when their tree is requested, through a memory mapping of the file.
+    The entries whose header differs are stale: they are removed when read, and replaced once the tree is parsed again.
+    """
+
+    def __init__(self, directory: str, lowering: Lowering, grammar: str):
+        """
+        Constructor.
+
+        :param directory: directory storing the trees
+        :param lowering: the lowering of the language, encoding and decoding its trees
+        :param grammar: the hash of the grammar of the language, see Parser.grammar
+        """
+        self._directory = Path(directory)
+        self._lowering = lowering
+        self._header = (
+            "LipVM trees " + VERSION + " " + str(TREE_FORMAT) + " " + sys.byteorder + " " + grammar + "\n"
+        ).encode()
+
+    def get(self, key: bytes) -> Tree | None:
+        path = self._directory / (key.hex() + ".tree")
+        try:
+            with open(path, "rb") as file, mmap(file.fileno(), 0, access=ACCESS_READ) as data:
+                if data[:len(self._header)] == self._header:
+                    with memoryview(data) as view, view[len(self._header):] as tree:
+                        return self._lowering.load(tree)
+        except (OSError, ValueError, EOFError, TypeError, IndexError):  # Missing, empty or unreadable entry
+            return None
+
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+
+    def put(self, key: bytes, tree: Tree) -> None:
+        """
+        Store a tree, unless the directory cannot be written, the entries only speeding up the parsing.
+        """
+        # Write then rename, so that concurrent readers never see a partial entry. The temporary file is unique to the
+        # thread, the sessions of a server parsing the same program at once writing the same entry.
+        path = self._directory / (key.hex() + ".tree")
+        temporary = path.with_name(path.name + "." + str(os.getpid()) + "." + str(get_ident()) + ".tmp")
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            temporary.write_bytes(self._header + self._lowering.dump(tree))
+            os.replace(temporary, path)
+        except OSError:
+            try:
+                temporary.unlink()
+            except OSError:
+                pass
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
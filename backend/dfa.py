@@ -0,0 +1,318 @@
+import marshal
+import os
+from hashlib import sha256
+from pathlib import Path
+
+from antlr4 import Lexer
+from antlr4.atn.ATNConfig import ATNConfig, LexerATNConfig
+from antlr4.atn.ATNConfigSet import ATNConfigSet, OrderedATNConfigSet
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.LexerAction import LexerAction, LexerChannelAction, LexerCustomAction, LexerIndexedCustomAction, \
+    LexerModeAction, LexerMoreAction, LexerPopModeAction, LexerPushModeAction, LexerSkipAction, LexerTypeAction
+from antlr4.atn.LexerActionExecutor import LexerActionExecutor
+from antlr4.atn.SemanticContext import AND, OR, PrecedencePredicate, Predicate, SemanticContext
+from antlr4.dfa.DFAState import DFAState, PredPrediction
+from antlr4.PredictionContext import ArrayPredictionContext, PredictionContext, SingletonPredictionContext
+
+# Version of the format of the DFA files, to increase when it changes
+DFA_VERSION = 1
+
+# References to the states which are not part of a DFA
+_NONE = -1
+_ERROR = -2
+
+def dfa_key(grammar: str) -> str:
+    """
+    :param grammar: the hash of the grammar of a language, see Parser.grammar
+    :return: the key of its DFAs, changing with the grammar and with the format of the files
+    """
+    return sha256((str(DFA_VERSION) + "\n" + grammar).encode()).hexdigest()
+
+def save_dfa(recognizers: list[type], key: str, path: Path) -> None:
+    """
+    Save the prediction DFAs built by ANTLR for the lexer and parser of a language.
+
+    The DFAs are encoded into marshallable values rather than pickled, as the hashes cached in the objects of ANTLR
+    differ between processes: the objects are rebuilt by load_dfa() through their constructors.
+
+    :param recognizers: the generated lexer and parser classes of the language
+    :param key: the key of the DFAs, see dfa_key()
+    :param path: the file to write, replaced atomically
+    """
+    encoder = _Encoder()
+    data = (key, [encoder.recognizer(recognizer) for recognizer in recognizers], encoder.tables())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + "." + str(os.getpid()) + ".tmp")
+    temporary.write_bytes(marshal.dumps(data))
+    os.replace(temporary, path)
+
+def load_dfa(recognizers: list[type], key: str, path: Path) -> bool:
+    """
+    Replace the prediction DFAs of the lexer and parser of a language by the ones saved by save_dfa().
+    Files saved for another key, or which cannot be read or decoded, e.g. when saved with another runtime, are ignored.
+
+    :param recognizers: the generated lexer and parser classes of the language
+    :param key: the key of the DFAs, see dfa_key()
+    :param path: the file to read
+    :return: whether the DFAs were loaded
+    """
+    try:
+        saved_key, saved, tables = marshal.loads(path.read_bytes())
+        if saved_key != key or len(saved) != len(recognizers):
+            return False
+        decoder = _Decoder(tables)
+        decoded = [decoder.recognizer(recognizer, dfas) for recognizer, dfas in zip(recognizers, saved)]
+    except Exception:
+        return False
+
+    for recognizer, dfas in zip(recognizers, decoded):
+        for dfa, (states, s0) in zip(recognizer.decisionsToDFA, dfas):
+            dfa._states = states
+            dfa.s0 = s0
+    return True
+
+def _is_error(state: DFAState) -> bool:
+    return state is ATNSimulator.ERROR or state is LexerATNSimulator.ERROR
+
+def _action(action: LexerAction) -> tuple:
+    if isinstance(action, LexerIndexedCustomAction):
+        return "indexed", action.offset, _action(action.action)
+    if isinstance(action, LexerCustomAction):
+        return "custom", action.ruleIndex, action.actionIndex
+    if isinstance(action, LexerChannelAction):
+        return "channel", action.channel
+    if isinstance(action, LexerTypeAction):
+        return "type", action.type
+    if isinstance(action, LexerModeAction):
+        return "mode", action.mode
+    if isinstance(action, LexerPushModeAction):
+        return "push", action.mode
+    if action is LexerSkipAction.INSTANCE:
+        return "skip",
+    if action is LexerMoreAction.INSTANCE:
+        return "more",
+    if action is LexerPopModeAction.INSTANCE:
+        return "pop",
+    raise Exception("Unknown lexer action: " + type(action).__name__)
+
+def _decode_action(encoded: tuple) -> LexerAction:
+    kind = encoded[0]
+    if kind == "indexed":
+        return LexerIndexedCustomAction(encoded[1], _decode_action(encoded[2]))
+    if kind == "custom":
+        return LexerCustomAction(encoded[1], encoded[2])
+    if kind == "channel":
+        return LexerChannelAction(encoded[1])
+    if kind == "type":
+        return LexerTypeAction(encoded[1])
+    if kind == "mode":
+        return LexerModeAction(encoded[1])
+    if kind == "push":
+        return LexerPushModeAction(encoded[1])
+    if kind == "skip":
+        return LexerSkipAction.INSTANCE
+    if kind == "more":
+        return LexerMoreAction.INSTANCE
+    if kind == "pop":
+        return LexerPopModeAction.INSTANCE
+    raise Exception("Unknown lexer action: " + str(kind))
+
+class _Encoder:
+    """
+    Encode DFAs into marshallable values, the objects they share being stored once in tables.
+    """
+
+    def __init__(self):
+        self._contexts = []     # Prediction contexts
+        self._semantics = []    # Semantic contexts
+        self._executors = []    # Lexer action executors
+        self._indexes = {}      # Index in its table by id of object
+
+    def tables(self) -> tuple:
+        return self._contexts, self._semantics, self._executors
+
+    def recognizer(self, recognizer: type) -> list:
+        return [self._dfa(dfa) for dfa in recognizer.decisionsToDFA]
+
+    def _dfa(self, dfa) -> tuple:
+        states = list(dfa._states.values())
+        indexes = {id(state): index for index, state in enumerate(states)}
+        s0 = dfa.s0
+        outside = s0 is not None and id(s0) not in indexes  # Start state of a precedence DFA, not one of the states
+        if outside:
+            indexes[id(s0)] = len(states)
+            states.append(s0)
+        encoded = [self._state(state, indexes) for state in states]
+        return encoded, indexes[id(s0)] if s0 is not None else _NONE, outside
+
+    def _state(self, state: DFAState, indexes: dict) -> tuple:
+        edges = None
+        if state.edges is not None:
+            edges = [
+                _NONE if edge is None else _ERROR if _is_error(edge) else indexes[id(edge)] for edge in state.edges
+            ]
+        predicates = None
+        if state.predicates is not None:
+            predicates = [(self._semantic(prediction.pred), prediction.alt) for prediction in state.predicates]
+        return (
+            state.stateNumber, self._configs(state.configs), edges, state.isAcceptState, state.prediction,
+            self._executor(state.lexerActionExecutor), state.requiresFullContext, predicates
+        )
+
+    def _configs(self, configs: ATNConfigSet) -> tuple:
+        encoded = []
+        for config in configs.configs:
+            values = (
+                config.state.stateNumber, config.alt, self._context(config.context),
+                self._semantic(config.semanticContext), config.reachesIntoOuterContext,
+                config.precedenceFilterSuppressed
+            )
+            if isinstance(config, LexerATNConfig):
+                values += (self._executor(config.lexerActionExecutor), config.passedThroughNonGreedyDecision)
+            encoded.append(values)
+        conflicting = sorted(configs.conflictingAlts) if configs.conflictingAlts is not None else None
+        return (
+            isinstance(configs, OrderedATNConfigSet), configs.fullCtx, encoded, configs.uniqueAlt, conflicting,
+            configs.hasSemanticContext, configs.dipsIntoOuterContext
+        )
+
+    def _context(self, context: PredictionContext | None) -> int:
+        if context is None:
+            return _NONE
+        index = self._indexes.get(id(context))
+        if index is not None:
+            return index
+        if context is PredictionContext.EMPTY:
+            encoded = ("empty",)
+        elif isinstance(context, SingletonPredictionContext):
+            encoded = ("singleton", self._context(context.parentCtx), context.returnState)
+        elif isinstance(context, ArrayPredictionContext):
+            encoded = ("array", [self._context(parent) for parent in context.parents], list(context.returnStates))
+        else:
+            raise Exception("Unknown prediction context: " + type(context).__name__)
+        return self._add(context, encoded, self._contexts)
+
+    def _semantic(self, semantic: SemanticContext) -> int:
+        index = self._indexes.get(id(semantic))
+        if index is not None:
+            return index
+        if semantic is SemanticContext.NONE:
+            encoded = ("none",)
+        elif isinstance(semantic, Predicate):
+            encoded = ("predicate", semantic.ruleIndex, semantic.predIndex, semantic.isCtxDependent)
+        elif isinstance(semantic, PrecedencePredicate):
+            encoded = ("precedence", semantic.precedence)
+        elif isinstance(semantic, (AND, OR)):
+            encoded = (type(semantic).__name__, [self._semantic(operand) for operand in semantic.opnds])
+        else:
+            raise Exception("Unknown semantic context: " + type(semantic).__name__)
+        return self._add(semantic, encoded, self._semantics)
+
+    def _executor(self, executor: LexerActionExecutor | None) -> int:
+        if executor is None:
+            return _NONE
+        index = self._indexes.get(id(executor))
+        if index is not None:
+            return index
+        return self._add(executor, [_action(action) for action in executor.lexerActions], self._executors)
+
+    def _add(self, value, encoded, table: list) -> int:
+        self._indexes[id(value)] = len(table)
+        table.append(encoded)
+        return len(table) - 1
+
+class _Decoder:
+    """
+    Rebuild DFAs encoded by an _Encoder, with the constructors of ANTLR, as the hashes of its objects differ between
+    processes.
+    """
+
+    def __init__(self, tables: tuple):
+        contexts, semantics, executors = tables
+        self._contexts = []
+        for encoded in contexts:  # The parents of a context are encoded before it
+            self._contexts.append(self._decode_context(encoded))
+        self._semantics = []
+        for encoded in semantics:
+            self._semantics.append(self._decode_semantic(encoded))
+        self._executors = [LexerActionExecutor([_decode_action(action) for action in actions]) for actions in executors]
+
+    def recognizer(self, recognizer: type, dfas: list) -> list:
+        if len(dfas) != len(recognizer.decisionsToDFA):
+            raise Exception("Unexpected number of decisions: " + str(len(dfas)))
+        error = LexerATNSimulator.ERROR if issubclass(recognizer, Lexer) else ATNSimulator.ERROR
+        return [self._dfa(recognizer.atn, error, encoded) for encoded in dfas]
+
+    def _dfa(self, atn, error: DFAState, encoded: tuple) -> tuple:
+        encoded_states, s0, outside = encoded
+        states = [self._state(atn, state) for state in encoded_states]
+        for state, (_, _, edges, *_) in zip(states, encoded_states):
+            if edges is not None:
+                state.edges = [None if edge == _NONE else error if edge == _ERROR else states[edge] for edge in edges]
+        start = states[s0] if s0 != _NONE else None
+        if outside:
+            states.pop()
+        return {state: state for state in states}, start
+
+    def _state(self, atn, encoded: tuple) -> DFAState:
+        number, configs, _, accept, prediction, executor, full_context, predicates = encoded
+        state = DFAState(number, self._configs(atn, configs))
+        state.isAcceptState = accept
+        state.prediction = prediction
+        state.lexerActionExecutor = self._executors[executor] if executor != _NONE else None
+        state.requiresFullContext = full_context
+        if predicates is not None:
+            state.predicates = [PredPrediction(self._semantics[semantic], alt) for semantic, alt in predicates]
+        return state
+
+    def _configs(self, atn, encoded: tuple) -> ATNConfigSet:
+        ordered, full_context, configs, unique, conflicting, semantic, outer = encoded
+        decoded = OrderedATNConfigSet() if ordered else ATNConfigSet(full_context)
+        for values in configs:
+            state = atn.states[values[0]]
+            context = self._contexts[values[2]] if values[2] != _NONE else None
+            if len(values) > 6:
+                executor = self._executors[values[6]] if values[6] != _NONE else None
+                config = LexerATNConfig(state, values[1], context, self._semantics[values[3]], executor)
+                config.passedThroughNonGreedyDecision = values[7]
+            else:
+                config = ATNConfig(state, values[1], context, self._semantics[values[3]])
+            config.reachesIntoOuterContext = values[4]
+            config.precedenceFilterSuppressed = values[5]
+            decoded.add(config)
+        decoded.fullCtx = full_context
+        decoded.uniqueAlt = unique
+        decoded.conflictingAlts = set(conflicting) if conflicting is not None else None
+        decoded.hasSemanticContext = semantic
+        decoded.dipsIntoOuterContext = outer
+        decoded.setReadonly(True)
+        return decoded
+
+    def _decode_context(self, encoded: tuple) -> PredictionContext:
+        kind = encoded[0]
+        if kind == "empty":
+            return PredictionContext.EMPTY
+        if kind == "singleton":
+            return SingletonPredictionContext(self._context(encoded[1]), encoded[2])
+        if kind == "array":
+            return ArrayPredictionContext([self._context(parent) for parent in encoded[1]], list(encoded[2]))
+        raise Exception("Unknown prediction context: " + str(kind))
+
+    def _context(self, index: int) -> PredictionContext | None:
+        return self._contexts[index] if index != _NONE else None
+
+    def _decode_semantic(self, encoded: tuple) -> SemanticContext:
+        kind = encoded[0]
+        if kind == "none":
+            return SemanticContext.NONE
+        if kind == "predicate":
+            return Predicate(encoded[1], encoded[2], encoded[3])
+        if kind == "precedence":
+            return PrecedencePredicate(encoded[1])
+        if kind in ("AND", "OR"):
+            semantic = (AND if kind == "AND" else OR).__new__(AND if kind == "AND" else OR)
+            semantic.opnds = [self._semantics[operand] for operand in encoded[1]]
+            return semantic
+        raise Exception("Unknown semantic context: " + str(kind))
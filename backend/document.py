@@ -0,0 +1,265 @@
+from bisect import bisect_left, bisect_right
+
+from antlr4 import ParserRuleContext, Token
+from antlr4.tree.Tree import TerminalNode, Tree
+
+from backend.parser import ParseError, Parser
+
+# Number of times the window of an edit is widened, doubling the items added on each side, before giving up
+WIDEN_LIMIT = 4
+
+class Document:
+    """
+    Code of a program along with its tree, reparsed incrementally as the code is edited.
+
+    The tree is a main node whose children are the top-level items of the program, e.g. definitions, loops and
+    statements. An edit re-lexes and reparses only the window of code between the untouched items around it, then
+    splices the items parsed from the window into the tree, the other items being reused as they are:
+
+    - The window is widened a few times when it cannot be parsed on its own, e.g. when the edit joins two items.
+    - The positions of the tokens following the window are shifted lazily, when the tree is read, so that consecutive
+      edits at the same place only update the tokens around them.
+    - An edit leaving the window unparsable marks it as dirty, the next edits reparse it along with their own window.
+      Reading the tree of a dirty document parses the whole program, raising its syntax errors.
+
+    Unlike Parser.parse(), tokens left after the last item are a syntax error, as in Parser.parse_stream().
+
+    Items are assumed to be self-delimiting, i.e. that the parse of a window ending before an untouched item does not
+    depend on the code after it, as for the items of minilogo.
+
+    Example:
+
+    - document = Document(parser, code)
+    - document.edit(10, 11, "2")
+    - tree = document.tree
+    """
+
+    def __init__(self, parser: Parser, code: str):
+        """
+        Constructor.
+
+        :param parser: the parser of the language of the program
+        :param code: the code of the program, parsed right away
+        """
+        self._parser = parser
+        self._code = code
+        self._main = None
+        self._items = []    # Children of the main node
+        self._gap = 0       # Index of the first item whose tokens are not shifted yet
+        self._chars = 0     # Shift of the offsets of the tokens from the gap on
+        self._lines = 0     # Shift of the lines of the tokens from the gap on
+        self._dirty = None  # Range of the code which is not parsed in the tree, if any
+
+        if not self._parse():
+            self._dirty = (0, len(code))
+
+    def edit(self, start: int, end: int, text: str) -> bool:
+        """
+        Replace a range of the code and reparse the window around it.
+
+        :param start: the offset of the first character replaced
+        :param end: the offset following the last character replaced, start to insert text
+        :param text: the replacement
+        :return: whether the tree is up to date, False when the window was left dirty
+        """
+        code = self._code
+        if not 0 <= start <= end <= len(code):
+            raise Exception("Invalid edit range: " + str(start) + ", " + str(end))
+
+        delta = len(text) - (end - start)
+        lines = text.count("\n") - code.count("\n", start, end)
+        self._code = code[:start] + text + code[end:]
+
+        # Items touching the range changed since the tree was parsed, in the offsets preceding the edit
+        low, high = start, end
+        if self._dirty is not None:
+            low, high = min(low, self._dirty[0]), max(high, self._dirty[1])
+        n = len(self._items)
+        i = bisect_left(range(n), low, key=lambda k: self._stop(k) + 1)
+        j = bisect_right(range(n), high, key=self._start)
+        window_start = self._stop(i - 1) + 1 if i > 0 else 0
+        window_end = (self._start(j) if j < n else len(code)) + delta
+
+        # The items following the window move by the size of the edit
+        self._move_gap(j)
+        if j < n:
+            self._shift_columns(j, window_end)
+        self._chars += delta
+        self._lines += lines
+
+        first, last, widen = i, j, 1
+        for _ in range(WIDEN_LIMIT + 1):
+            items = self._parse_window(first, last)
+            if items is not None:
+                self._splice(first, last, items)
+                self._dirty = None
+                return True
+            if first == 0 and last == n:
+                break
+            first, last, widen = max(0, first - widen), min(n, last + widen), widen * 2
+
+        del self._items[i:j]
+        self._gap = i
+        self._dirty = (window_start, window_end)
+        return False
+
+    def _parse(self) -> bool:
+        """
+        Parse the whole code, leaving the document as it is if the code is not a program.
+
+        :return: whether the code is a program
+        """
+        tokens = self._parser.lex(self._code)
+        tree = self._parser.parse_tokens(tokens) if tokens is not None else None
+        if tree is None:
+            return False
+
+        if tree.children is None:
+            tree.children = []
+        self._main = tree
+        self._items = tree.children
+        self._gap = len(self._items)
+        self._chars = self._lines = 0
+        self._dirty = None
+        return True
+
+    def _parse_window(self, first: int, last: int) -> list[Tree] | None:
+        """
+        :param first: the index of the first item of the window
+        :param last: the index of the item following the window
+        :return: the items parsed from the code between the surrounding items, None if it is not a sequence of items
+        """
+        start = self._stop(first - 1) + 1 if first > 0 else 0
+        end = self._start(last) if last < len(self._items) else len(self._code)
+        line, column = self._position(first)
+
+        # The window must end on a token boundary: the first token of the next item follows its last token
+        following = _first_token(self._items[last]) if last < len(self._items) else None
+        tokens = self._parser.lex(self._code[start:end] + (following.text if following else ""), line, column)
+        if tokens is None:
+            return None
+        if following is not None:
+            if not tokens or tokens[-1].start != end - start or tokens[-1].text != following.text:
+                return None
+            tokens.pop()
+
+        for token in tokens:
+            token.start += start
+            token.stop += start
+        main = self._parser.parse_tokens(tokens)
+        if main is None:
+            return None
+        if self._main is None:
+            return [main]
+        return main.children or []
+
+    def _splice(self, first: int, last: int, items: list[Tree]) -> None:
+        if self._main is None:  # First parse of a document created invalid
+            self._main = items[0]
+            if self._main.children is None:
+                self._main.children = []
+            self._items = self._main.children
+            self._gap = len(self._items)
+            self._chars = self._lines = 0
+            return
+
+        for item in items:
+            item.parentCtx = self._main
+        self._items[first:last] = items
+        self._gap = first + len(items)
+
+    def _start(self, index: int) -> int:
+        start = _first_token(self._items[index]).start
+        return start + self._chars if index >= self._gap else start
+
+    def _stop(self, index: int) -> int:
+        stop = _last_token(self._items[index]).stop
+        return stop + self._chars if index >= self._gap else stop
+
+    def _position(self, index: int) -> tuple[int, int]:
+        """
+        :return: the line and column following the item preceding the given one
+        """
+        if index == 0:
+            return 1, 0
+        token = _last_token(self._items[index - 1])
+        newline = token.text.rfind("\n")
+        if newline < 0:
+            return token.line, token.column + len(token.text)
+        return token.line + token.text.count("\n"), len(token.text) - newline - 1
+
+    def _move_gap(self, index: int) -> None:
+        """
+        Shift the tokens of the items up to the given index, or unshift the ones from it, so that the gap is there.
+        """
+        if self._chars or self._lines:
+            sign = 1 if index > self._gap else -1
+            chars, lines = sign * self._chars, sign * self._lines
+            for k in range(min(index, self._gap), max(index, self._gap)):
+                for token in _tokens(self._items[k]):
+                    token.start += chars
+                    token.stop += chars
+                    token.line += lines
+        self._gap = index
+        if index == len(self._items):
+            self._chars = self._lines = 0
+
+    def _shift_columns(self, index: int, offset: int) -> None:
+        """
+        Shift the columns of the tokens following an edit on the line where it ends.
+
+        :param index: the index of the item following the edit, after the gap
+        :param offset: the offset of this item once edited
+        """
+        token = _first_token(self._items[index])
+        column = offset - self._code.rfind("\n", 0, offset) - 1
+        shift = column - token.column
+        if shift == 0:
+            return
+
+        line = token.line
+        for k in range(index, len(self._items)):
+            item = self._items[k]
+            if _first_token(item).line != line:
+                break
+            for token in _tokens(item):
+                if token.line == line:
+                    token.column += shift
+
+    @property
+    def code(self) -> str:
+        return self._code
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty is not None
+
+    @property
+    def tree(self) -> Tree:
+        """
+        :return: the tree of the code, updated in place by the edits
+        :raise ParseError: when the code is not a program
+        """
+        if self._dirty is not None and not self._parse():
+            raise ParseError(self._parser.diagnose(self._code))
+
+        self._move_gap(len(self._items))
+        if self._items:
+            self._main.start = _first_token(self._items[0])
+            self._main.stop = _last_token(self._items[-1])
+        return self._main
+
+def _first_token(node: Tree) -> Token:
+    return node.start if isinstance(node, ParserRuleContext) else node.symbol
+
+def _last_token(node: Tree) -> Token:
+    return node.stop if isinstance(node, ParserRuleContext) else node.symbol
+
+def _tokens(node: Tree):
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, TerminalNode):
+            yield node.symbol
+        elif node.children:
+            nodes.extend(node.children)
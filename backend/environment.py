@@ -6,6 +6,9 @@ class Environment:
     Example:
 
     - self._environment.attribute = value
+
+    Languages can instead declare the attributes of their environment, see Interpreter.declare() and
+    declared_environment().
     """
 
     # Making explicit the fact we use reflectivity to set the attributes of the environment (for debugging)
@@ -13,4 +16,66 @@ class Environment:
         super().__setattr__(name, value)
 
     def __getattr__(self, name):
-        return super().__getattribute__(name)
\ No newline at end of file
+        return super().__getattribute__(name)
+
+# Environment classes by declared fields
+_declared_environments = {}
+
+def declared_environment(fields: tuple[str, ...]) -> type:
+    """
+    Generate the environment class of a language declaring its fields.
+
+    The class has a slot per field and none of the hooks of Environment, so that its attributes are accessed directly.
+    Assigning an undeclared attribute raises an AttributeError. The classes are generated once per tuple of fields.
+
+    :param fields: the names of the attributes of the environment
+    :return: a slotted environment class
+    """
+    fields = tuple(fields)
+    cls = _declared_environments.get(fields)
+    if cls is None:
+        cls = type("DeclaredEnvironment", (), {
+            "__slots__": fields,
+            "__doc__": "Environment with the declared fields: " + ", ".join(fields) + ".",
+            "FIELDS": fields,
+        })
+        _declared_environments[fields] = cls
+    return cls
+
+def fields(environment) -> dict:
+    """
+    Enumerate the attributes of an environment, declared or not, e.g. for debugging tools.
+
+    :param environment: an Environment or an instance of a declared environment class
+    :return: the values of the attributes set in the environment, by name
+    """
+    declared = getattr(type(environment), "FIELDS", None)
+    if declared is None:
+        return dict(vars(environment))
+    values = {}
+    for name in declared:
+        try:
+            values[name] = getattr(environment, name)
+        except AttributeError:  # Declared but not set
+            pass
+    return values
+
+class EnvironmentMapping:
+    """
+    Read-only mapping of the attributes of an environment, declared or not, e.g. to evaluate expressions in it.
+    Additional variables, if any, hide the attributes of the same name.
+    """
+
+    __slots__ = ("_environment", "_variables")
+
+    def __init__(self, environment, variables: dict | None = None):
+        self._environment = environment
+        self._variables = variables
+
+    def __getitem__(self, name: str):
+        if self._variables is not None and name in self._variables:
+            return self._variables[name]
+        try:
+            return getattr(self._environment, name)
+        except AttributeError:
+            raise KeyError(name) from None
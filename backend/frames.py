@@ -0,0 +1,95 @@
+from typing import Callable
+
+# Default maximum number of frames of a FrameStack
+DEFAULT_LIMIT = 100000
+
+class Frame:
+    """
+    A frame of a FrameStack, holding the variables of a scope in the representation chosen by the language.
+    """
+
+    __slots__ = ("variables",)
+
+    def __init__(self, variables):
+        self.variables = variables
+
+class FrameStack:
+    """
+    Stack of frames growing on demand, up to a maximum depth.
+
+    Popped frames are kept above the top of the stack and handed out again by the next pushes, along with their
+    variables, so that calls and loops reuse the frames of the previous ones instead of allocating new ones.
+    Languages fill the variables of a pushed frame, e.g. by copying the ones of the frame below.
+
+    Example:
+
+    - frames = FrameStack(list)
+    - frames.push().variables[:] = frames[-2].variables
+    - frames.top.variables[slot] = value
+    - frames.pop()
+    """
+
+    __slots__ = ("_factory", "_limit", "_frames", "_depth", "top")
+
+    def __init__(self, factory: Callable[[], object] = dict, limit: int = DEFAULT_LIMIT):
+        """
+        Constructor.
+
+        :param factory: a callable creating the variables of a new frame
+        :param limit: the maximum number of frames on the stack
+        """
+        self._factory = factory
+        self._limit = limit
+        self._frames = []   # Frames in use up to the depth, then free frames
+        self._depth = 0
+        self.top = None     # Frame on top of the stack, an attribute as it is read at each variable access
+
+    def push(self) -> Frame:
+        """
+        :return: the new top frame, a reused one when possible
+        :raise Exception: when the stack is at its maximum depth
+        """
+        depth = self._depth
+        if depth == len(self._frames):
+            if depth >= self._limit:
+                raise Exception("Maximum depth of frames exceeded: " + str(self._limit))
+            self._frames.append(Frame(self._factory()))
+        self._depth = depth + 1
+        self.top = self._frames[depth]
+        return self.top
+
+    def pop(self) -> None:
+        if self._depth == 0:
+            raise Exception("No frame to pop")
+        self._depth -= 1
+        self.top = self._frames[self._depth - 1] if self._depth > 0 else None
+
+    def clear(self) -> None:
+        """
+        Pop all the frames, they are kept for reuse.
+        """
+        self._depth = 0
+        self.top = None
+
+    def __len__(self) -> int:
+        return self._depth
+
+    def __getitem__(self, index: int) -> Frame:
+        if index < 0:
+            index += self._depth
+        if not 0 <= index < self._depth:
+            raise IndexError("Frame index out of range: " + str(index))
+        return self._frames[index]
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @limit.setter
+    def limit(self, limit: int) -> None:
+        self._limit = limit
+        del self._frames[max(limit, self._depth):]
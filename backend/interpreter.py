@@ -1,23 +1,37 @@
+import ast
+from concurrent.futures import Future
+from enum import Enum
+from functools import wraps
+from threading import Lock, current_thread
+from time import perf_counter
+from types import GeneratorType
 from typing import Callable, Generator
 
 from antlr4.ParserRuleContext import ParserRuleContext
 from antlr4.tree.Tree import ParseTreeVisitor
 
 from backend.parser import Parser
-from backend.environment import Environment
+from backend.environment import Environment, EnvironmentMapping, declared_environment
+from backend.journal import Journal, Recorders, journal_environment, unjournal_environment
+from backend.profiler import Profile
+from backend.watchpoints import Watchpoints
+from backend.worker import Worker
 
 class Visit:
+    """
+    Request to visit a subtree, yielded by the visit methods to the interpretation loop.
+    """
 
-    def __init__(self, tree: ParserRuleContext):
-        self._tree = tree
+    __slots__ = ("tree",)
 
-    @property
-    def tree(self) -> ParserRuleContext:
-        return self._tree
+    def __init__(self, tree: ParserRuleContext = None):
+        self.tree = tree
 
 class Signal:
 
-    def __init__(self, handler: Callable[[Interpreter], None] = None):
+    __slots__ = ("_handler",)
+
+    def __init__(self, handler: Callable[[], None] = None):
         self._handler = handler
 
     @property
@@ -25,37 +39,80 @@ class Signal:
         return self._handler
 
 class Halt(Signal):
-    pass
+    __slots__ = ()
 
 class Step(Signal):
-    pass
+    __slots__ = ()
 
 class SignalBeginStep(Step):
-    
-    def __init__(self, handler: Callable[[Interpreter], None] = None):
-        if handler is None:
-            super().__init__(lambda: print("Begin step"))
-        else:
-            super().__init__(handler)
-    
+    __slots__ = ()
+
 class SignalEndStep(Step):
+    __slots__ = ()
 
-    def __init__(self, handler: Callable[[Interpreter], None] = None):
-        if handler is None:
-            super().__init__(lambda: print("End step"))
-        else:
-            super().__init__(handler)
+# Signals without handler carry no state and are shared
+HALT = Halt()
+BEGIN_STEP = SignalBeginStep()
+END_STEP = SignalEndStep()
+
+class Suspend(Exception):
+    """
+    Unwinds a fast run, collecting the items to move on the interpretation stack from the top downwards.
+    """
+
+    def __init__(self, items: list, pause: bool):
+        super().__init__()
+        self.items = items
+        self.pause = pause
+
+# Whether the types of the items yielded by the visit methods are generators, besides the native ones
+_generator_kinds = {GeneratorType: True}
+
+def is_generator_kind(kind: type) -> bool:
+    generator = _generator_kinds.get(kind)
+    if generator is None:
+        generator = _generator_kinds[kind] = issubclass(kind, Generator)
+    return generator
+
+class StopReason(Enum):
+    """
+    Why a batch of steps stopped, see Interpreter.step(), run_until() and run_for().
+    """
+
+    BUDGET = "budget"          # The number of steps or the time budget is exhausted
+    HALT = "halt"              # The interpretation halted
+    END = "end"                # The program ended
+    PREDICATE = "predicate"    # The predicate became true
+    BREAKPOINT = "breakpoint"  # The interpretation reached a breakpoint
+    WATCHPOINT = "watchpoint"  # A watched attribute or variable was written
+
+# Builtins available to the conditions evaluated in the environment, see Interpreter.condition()
+CONDITION_BUILTINS = {
+    "abs": abs, "all": all, "any": any, "bool": bool, "float": float, "int": int, "len": len, "max": max, "min": min,
+    "round": round, "str": str, "sum": sum, "True": True, "False": False, "None": None,
+}
+
+# Nodes of the syntax of the conditions, any other node is refused, see Interpreter.condition()
+CONDITION_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Constant, ast.Compare, ast.BoolOp, ast.UnaryOp, ast.BinOp, ast.Call,
+    ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+)
+
+# Nesting of generators driven recursively by a fast run before moving them on the interpretation stack
+FAST_RUN_DEPTH = 128
 
 def step(visit_method):
     """
     Function to use as a decorator for visit methods in a LanguageInterpreter class.
     :param visit_method: a visit method decorated with @step.
-    :return: a wrapper function that annotates the node in argument to add the stepNode = True attribute.
+    :return: a wrapper function surrounding the visit of the node with a begin and an end step signals.
     """
-    def wrapper(*args, **kwargs):
-        yield args[0].signalBeginStep()
-        result = yield visit_method(*args, **kwargs)
-        yield args[0].signalEndStep()
+    @wraps(visit_method)
+    def wrapper(self, *args, **kwargs):
+        yield self.signalBeginStep()
+        result = yield visit_method(self, *args, **kwargs)
+        yield self.signalEndStep()
         return result
     return wrapper
 
@@ -77,10 +134,36 @@ class Interpreter(ParseTreeVisitor):
     This allows to walk the AST in an iterative manner, while keeping the recursive style.
     Ultimately it is resistant to stack overflows and frees us from the need to manage threads to control the recursion.
 
+    Languages can also compile the AST into a callable interpreting the program without generators, see compile().
+    Unless fast run is disabled, interpret() runs the compiled program when there is one.
+    Otherwise, unless fast run is disabled, interpret() and proceed() drive the same generators by direct delegation, without
+    going through the interpretation stack. When the interpretation halts, or when the nesting of generators gets
+    deeper than FAST_RUN_DEPTH, the generators being driven are moved on the interpretation stack, so that step(),
+    proceed() and deeper visits carry on from there.
+
+    Breakpoints set on source lines pause the interpretation before visiting the outermost node starting on these lines,
+    see set_breakpoints(). Compiled programs are not run while there are breakpoints.
+
+    Watchpoints set on names halt the interpretation when an attribute of the environment or a variable of that name is
+    written, see set_watchpoints(). Compiled programs are not run while there are watchpoints either.
+
+    A profiler can be attached to measure the visits per rule and per source location, see backend/profiler.py.
+    Compiled programs are not run while profiling. Without profiler, the interpretation loops are left untouched.
+
+    Large programs can be interpreted from a file while they are parsed, one top-level item at a time, see
+    interpret_stream().
+
+    The commands can also run on a worker thread of the interpreter, see async_interpret(), e.g. so that a server keeps
+    handling requests while a program runs. halt() is then called from another thread: the interpretation halts before
+    the next visit. Programs run by the worker are not compiled, so that halt() reaches them.
+
     Credits:
     - https://medium.com/@touahartoufik/implementing-the-visitor-pattern-without-recursion-with-python-90a136de1f2f
     """
 
+    # Visit functions per interpreter class, indexed by rule index (see _dispatch_table)
+    _dispatch_functions = {}
+
     def __init__(self, parser: Parser):
         """
         Constructor.
@@ -90,19 +173,70 @@ class Interpreter(ParseTreeVisitor):
         self._parser = parser
 
         # Interpretation related variables 
+        self._environment_class = Environment
         self._environment = Environment()
+        self._journal = None
         self._tree = None
 
         self._interpretation_stack = []
         self._interpretation_result = None
 
+        # A visit request is consumed by the interpretation loop as soon as it is yielded, it can be reused
+        self._visit = Visit()
+
+        # Visit methods indexed by the rule index of the nodes they visit
+        self._dispatch = self._dispatch_table()
+
+        # Fast run related variables
+        self._fast_run = True
+        self._compilation = True
+        self._running_fast = False
+        self._suspend_requested = False
+
+        # Breakpoints related variables
+        self._breakpoint_lines = {}     # Condition, or None, by line
+        self._breakpoints = {}          # Condition, or None, by node of the current tree
+        self._line_index = {}           # Outermost node by line of the current tree
+        self._indexed_tree = None
+        self._breakpoint_skip = None    # Node paused at, passed when the interpretation resumes
+        self._breakpoint_stop = False
+
+        self._watchpoints = None        # Watchpoints, None when there are none
+
+        self._profiler = None
+
+        self._worker = None             # Thread running the asynchronous commands, started by the first one
+        self._worker_lock = Lock()      # Guards the halts requested from other threads against the end of the commands
+        self._worker_running = False    # Whether the worker is running a command
+
+    def _dispatch_table(self) -> list[Callable]:
+        """
+        Build the table mapping each rule index of the grammar to the bound visit method of this interpreter.
+
+        The lookup of the visit<RuleName> methods is done once per interpreter class, the interpretation loop then
+        calls them directly instead of going through the double dispatch of ParserRuleContext.accept().
+        Rules without a visit method fall back to visitChildren, as in the generated accept methods.
+
+        :return: a list of bound methods indexed by rule index
+        """
+        cls = type(self)
+        functions = Interpreter._dispatch_functions.get(cls)
+        if functions is None:
+            functions = [getattr(cls, "visit" + rule[:1].upper() + rule[1:], None) for rule in self._parser.rule_names]
+            Interpreter._dispatch_functions[cls] = functions
+
+        return [self.visitChildren if function is None else function.__get__(self, cls) for function in functions]
+
     def visit(self, tree: ParserRuleContext) -> Visit:
         """
         Mark a node to visit by the interpretation loop.
+        The returned Visit is reused by the next call, it must be yielded right away.
 
         :param tree: the AST to be visited
         """
-        return Visit(tree)
+        visit = self._visit
+        visit.tree = tree
+        return visit
 
     def _interpretation(self) -> None:
         proceed = True
@@ -110,30 +244,174 @@ class Interpreter(ParseTreeVisitor):
             proceed = self._interpretation_step()
 
     def _interpretation_step(self) -> bool:
-        proceed = True
-        while self._interpretation_stack and proceed:
+        stack = self._interpretation_stack
+        dispatch = self._dispatch
+        breakpoints = self._breakpoints
+        result = self._interpretation_result
+        while stack:
+            current = stack[-1]
+            kind = type(current)  # Exact types first, the stack mostly holds generators and visits
+            if kind is GeneratorType:
+                try:
+                    stack.append(current.send(result))
+                    result = None
+                except StopIteration:  # In case of return (last yield instruction)
+                    stack.pop()
+            elif kind is Visit:
+                tree = current.tree
+                if breakpoints and tree in breakpoints and self._break(tree):
+                    stack[-1] = Visit(tree)
+                    self._interpretation_result = result
+                    return False
+                stack.pop()  # Before the dispatch, a visit method calling halt() pushes a Halt signal
+                stack.append(dispatch[tree.getRuleIndex()](tree))
+                if self._suspend_requested:  # As in fast run: a watchpoint fired, or another thread called halt()
+                    self._suspend_requested = False
+                    self._interpretation_result = result
+                    return False
+            elif kind is SignalBeginStep or kind is SignalEndStep:
+                stack.pop()
+                self._interpretation_result = result
+                if current.handler is not None:
+                    current.handler()
+                if self._suspend_requested:  # A watchpoint fired during the step, halting before the next one
+                    self._suspend_requested = False
+                    return False
+                return True
+            elif kind is Halt:
+                stack.pop()
+                self._interpretation_result = result
+                return False
+            elif isinstance(current, Signal):
+                stack.pop()
+                if isinstance(current, Halt):
+                    self._interpretation_result = result
+                    return False
+                if current.handler is not None:
+                    current.handler()
+                if isinstance(current, Step):
+                    self._interpretation_result = result
+                    return True
+            elif is_generator_kind(kind):
+                try:
+                    stack.append(current.send(result))
+                    result = None
+                except StopIteration:
+                    stack.pop()
+            else:
+                result = stack.pop()
+        self._interpretation_result = result
+        if self._suspend_requested:  # A watchpoint fired by the last visit of the program
+            self._suspend_requested = False
+            return False
+        return True
+
+    def _run(self) -> None:
+        """
+        Interpret until the interpretation halts or ends, by fast run unless it is disabled.
+        """
+        if self._watchpoints is not None:
+            self._watchpoints.hit = None
+        if not self._fast_run:
+            self._interpretation()
+            return
+
+        stack = self._interpretation_stack
+        result = self._interpretation_result
+        self._running_fast = True
+        try:
+            while stack:
+                current = stack.pop()
+                try:
+                    if type(current) is GeneratorType:
+                        result = self._resume(current, result, 0)
+                    else:
+                        result = self._drive(current, 0)
+                except Suspend as suspend:
+                    stack.extend(reversed(suspend.items))
+                    result = None
+                    if suspend.pause:
+                        break
+        finally:
+            self._running_fast = False
+            self._suspend_requested = False  # A halt requested after the last visit of the program
+            self._interpretation_result = result
+
+    def _resume(self, generator: Generator, result, depth: int):
+        """
+        Drive a generator until it stops, interpreting each of the items it yields.
+        Visits of nodes and the generators they return, i.e. the common case, are handled inline.
+
+        :param generator: the generator to resume
+        :param result: the value to send to the generator
+        :param depth: the nesting of the generator in the fast run
+        :return: the last value sent to the generator, i.e. its result
+        """
+        send = generator.send
+        dispatch = self._dispatch
+        breakpoints = self._breakpoints
+        while True:
             try:
-                current = self._interpretation_stack[-1]
-                if isinstance(current, Generator):
-                    self._interpretation_stack.append(current.send(self._interpretation_result))
-                    self._interpretation_result = None
-                elif isinstance(current, Visit):
-                    self._interpretation_stack.pop()
-                    result = current.tree.accept(self)
-                    self._interpretation_stack.append(result)
-                elif isinstance(current, Signal):
-                    self._interpretation_stack.pop()
-                    if isinstance(current, Halt):
-                        return False
-                    elif isinstance(current, Step):
-                        proceed = False
-                    if current.handler is not None:
-                        current.handler()
-                else:
-                    self._interpretation_result = self._interpretation_stack.pop()
+                current = send(result)
             except StopIteration:  # In case of return (last yield instruction)
-                self._interpretation_stack.pop()
-        return True
+                return result
+            try:
+                kind = type(current)
+                if kind is Visit:
+                    tree = current.tree
+                    if breakpoints and tree in breakpoints and self._break(tree):
+                        raise Suspend([Visit(tree)], True)
+                    current = dispatch[tree.getRuleIndex()](tree)
+                    if self._suspend_requested:  # halt() was called while visiting the node, or from another thread
+                        self._suspend_requested = False
+                        raise Suspend([current], True)
+                    kind = type(current)
+                if kind is GeneratorType and depth < FAST_RUN_DEPTH:
+                    result = self._resume(current, None, depth + 1)
+                elif kind is Visit or kind is GeneratorType or isinstance(current, Signal) or is_generator_kind(kind):
+                    result = self._drive(current, depth)
+                else:
+                    result = current
+            except Suspend as suspend:
+                suspend.items.append(generator)
+                raise
+
+    def _drive(self, current, depth: int):
+        """
+        Interpret an item yielded by a visit method, as the interpretation loop would.
+
+        :param current: a visit request, a generator, a signal or a value
+        :param depth: the nesting of the generator which yielded the item in the fast run
+        :return: the result of the item
+        """
+        kind = type(current)
+        if kind is Visit:
+            tree = current.tree
+            if self._breakpoints and tree in self._breakpoints and self._break(tree):
+                raise Suspend([Visit(tree)], True)
+            current = self._dispatch[tree.getRuleIndex()](tree)
+            if self._suspend_requested:  # halt() was called while visiting the node, or from another thread
+                self._suspend_requested = False
+                raise Suspend([current], True)
+            kind = type(current)
+
+        if kind is GeneratorType:
+            if depth >= FAST_RUN_DEPTH:
+                raise Suspend([current], False)
+            return self._resume(current, None, depth + 1)
+        elif kind is Visit:
+            return self._drive(current, depth)
+        elif isinstance(current, Signal):
+            if isinstance(current, Halt):
+                raise Suspend([], True)
+            if current.handler is not None:
+                current.handler()
+            return None
+        elif is_generator_kind(kind):
+            if depth >= FAST_RUN_DEPTH:
+                raise Suspend([current], False)
+            return self._resume(current, None, depth + 1)
+        return current
 
     def visitChildren(self, node: ParserRuleContext) -> Generator[ParserRuleContext, None, None]:
         """
@@ -152,44 +430,522 @@ class Interpreter(ParseTreeVisitor):
         yield results
 
     def interpret(self, code: str) -> None:
+        self._suspend_requested = False  # A new program, the halts requested so far were for the previous one
+        self._breakpoint_skip = None     # Nor is the node paused at passed, the tree being cached
+
         # Set the interpretation environment
-        self._environment = Environment()
+        self._environment = self._create_environment()
         self.initialize()
 
         # Set the code to interpret
         self._tree = self._parser.parse(code)
+        self.load(self._tree)
+
+        self._index_breakpoints()
+
+        # Run the compiled program when nothing can pause the interpretation
+        if self._profiler is not None:
+            self._profiler.start()
+        compilation = self._fast_run and self._compilation and not self._breakpoint_lines and self._watchpoints is None \
+            and self._profiler is None and not self._on_worker()
+        program = self.compile(self._tree) if compilation else None
+        if program is not None:
+            self._interpretation_stack = []
+            self._interpretation_result = None
+            try:
+                program()
+                return
+            except RecursionError:  # Rerun the programs recursing deeper than the Python stack with the visit methods
+                self._environment = self._create_environment()
+                self.initialize()
+                self.load(self._tree)
 
         # Initialize the state of the interpretation
         self._interpretation_stack = [self.visit(self._tree)]
         self._interpretation_result = None
 
         # Start the interpretation loop
-        self._interpretation()
+        self._run()
+
+    def interpret_stream(self, path: str) -> None:
+        """
+        Interpret a program from a file while it is parsed, one top-level item at a time, see Parser.parse_stream(),
+        e.g. for programs too large to be parsed at once. Each item is interpreted as soon as it is parsed, then dropped
+        unless the language keeps it, e.g. the definition of a function.
+
+        The empty program is visited first, so that the language sets up the interpretation as for any program, then
+        each item, loaded by load_item(). The program is never compiled, and there are no breakpoints, there being no
+        tree of the whole program to set them on. The interpretation halts and resumes as with interpret().
+
+        :param path: the file of the program
+        """
+        self._suspend_requested = False
+        self._breakpoint_skip = None
+
+        # Set the interpretation environment
+        self._environment = self._create_environment()
+        self.initialize()
+
+        self._tree = None
+        self._index_breakpoints()
+
+        if self._profiler is not None:
+            self._profiler.start()
+
+        # Initialize the state of the interpretation
+        self._interpretation_stack = [self._stream(self._parser.parse_stream(path))]
+        self._interpretation_result = None
+
+        # Start the interpretation loop
+        self._run()
+
+    def _stream(self, items: Generator[ParserRuleContext, None, None]) -> Generator:
+        main = self._parser.parse("")
+        self.load(main)
+        yield self.visit(main)
+        for item in items:
+            self.load_item(item)
+            yield self.visit(item)
+            self.unload_item(item)
 
     def initialize(self) -> None:
         raise Exception("Implement this method to initialize the interpretation.")    
 
+    def declare(self) -> tuple[str, ...] | None:
+        """
+        Override this method to declare the attributes of the environment set by initialize() and the visit methods.
+        The environment is then an instance of a slotted class generated from them, whose attributes are accessed
+        directly, instead of an Environment.
+
+        :return: the names of the attributes of the environment, None to use an Environment
+        """
+        return None
+
+    def _create_environment(self):
+        """
+        :return: a new environment, of the class declared by the language, if any
+        """
+        if self._environment_class is Environment:
+            declared = self.declare()
+            if declared is not None:
+                self._environment_class = declared_environment(declared)
+        environment = self._environment_class()
+        self._observe(environment)
+        return environment
+
+    def _observe(self, environment) -> None:
+        """
+        Record the mutations of an environment in the journal and check them against the watchpoints, if any.
+
+        :param environment: the environment to observe, already observed or not
+        """
+        unjournal_environment(environment)
+        recorders = [recorder for recorder in (self._journal, self._watchpoints) if recorder is not None]
+        if recorders:
+            journal_environment(environment, recorders[0] if len(recorders) == 1 else Recorders(recorders))
+        if environment is self._environment:
+            self.rebind()
+
+    def rebind(self) -> None:
+        """
+        Override this method to read again the attributes of the environment the interpreter keeps references to, e.g.
+        a list it indexes directly. It is called when a journal or watchpoints are set or removed during an
+        interpretation, the lists and dicts of the environment being then replaced, see backend/journal.py.
+        """
+        pass
+
+    def load(self, tree: ParserRuleContext) -> None:
+        """
+        Override this method to analyse the AST once it is parsed, before it is interpreted, e.g. to resolve names or to
+        report errors before the execution starts.
+
+        :param tree: the AST of the program
+        """
+        pass
+
+    def load_item(self, item: ParserRuleContext) -> None:
+        """
+        Override this method to analyse a top-level item of a program interpreted by interpret_stream(), before it is
+        interpreted, as load() does for a whole program. The items after it are not parsed yet.
+
+        :param item: the AST of the item
+        """
+        pass
+
+    def unload_item(self, item: ParserRuleContext) -> None:
+        """
+        Override this method to drop what load_item() kept about a top-level item once it is interpreted, unless the
+        next items still need it.
+
+        :param item: the AST of the item
+        """
+        pass
+
+    def compile(self, tree: ParserRuleContext) -> Callable[[], None] | None:
+        """
+        Override this method to lower the AST into a callable interpreting the program without generators.
+        The compiled program must have the semantic of the visit methods, it is only run when nothing can pause it.
+
+        :param tree: the AST of the program
+        :return: a callable interpreting the program, None when the program cannot be compiled, e.g. when it can halt
+        """
+        return None
+
     # Halt and step commands to use from external code.
-    def halt(self) -> Halt:
-        self._interpretation_stack.append(Halt())
+    def halt(self) -> None:
+        """
+        Halt the interpretation, after the current visit when called by a visit method, before the next visit when called
+        from another thread than the worker running the program, see async_interpret(). From another thread, nothing is
+        done while the worker is idle: there is no run to halt.
+        """
+        if self._worker is not None and not self._on_worker():
+            with self._worker_lock:
+                if self._worker_running:
+                    self._suspend_requested = True
+        elif self._running_fast:
+            self._suspend_requested = True
+        else:
+            self._interpretation_stack.append(HALT)
+
+    def suspend(self) -> None:
+        """
+        Halt the interpretation before the next visit, at the same place in fast run and in the interpretation loop,
+        e.g. when a watchpoint fires while a node is visited.
+        """
+        self._suspend_requested = True
 
     def proceed(self) -> None:
-        self._interpretation()
+        self._run()
+
+    def step(self, count: int = 1) -> StopReason:
+        """
+        Interpret up to the next step boundaries, a step beginning or ending at each boundary.
+
+        :param count: the number of step boundaries to move through
+        :return: END if the program ended, HALT, BREAKPOINT or WATCHPOINT if it halted, BUDGET otherwise
+        """
+        if self._watchpoints is not None:
+            self._watchpoints.hit = None
+        for _ in range(count):
+            if self.finished:
+                return StopReason.END
+            if not self._interpretation_step():
+                return self._halt_reason()
+        return StopReason.END if self.finished else StopReason.BUDGET
+
+    def run_until(self, predicate: Callable[[], bool], count: int | None = None) -> StopReason:
+        """
+        Interpret step by step until the predicate is true, the predicate being checked at each step boundary.
+
+        :param predicate: a callable returning whether to stop
+        :param count: the maximum number of step boundaries to move through, None for no limit
+        :return: PREDICATE if the predicate became true, END if the program ended, HALT, BREAKPOINT or WATCHPOINT if it
+            halted, BUDGET otherwise
+        """
+        if self._watchpoints is not None:
+            self._watchpoints.hit = None
+        steps = 0
+        while count is None or steps < count:
+            if self.finished:
+                return StopReason.END
+            if not self._interpretation_step():
+                return self._halt_reason()
+            if predicate():
+                return StopReason.PREDICATE
+            steps += 1
+        return StopReason.END if self.finished else StopReason.BUDGET
+
+    def run_for(self, milliseconds: float) -> StopReason:
+        """
+        Interpret step by step for a wall-clock duration, the time being checked at each step boundary.
+
+        :param milliseconds: the time budget
+        :return: END if the program ended, HALT, BREAKPOINT or WATCHPOINT if it halted, BUDGET otherwise
+        """
+        if self._watchpoints is not None:
+            self._watchpoints.hit = None
+        deadline = perf_counter() + milliseconds / 1000
+        while perf_counter() < deadline:
+            if self.finished:
+                return StopReason.END
+            if not self._interpretation_step():
+                return self._halt_reason()
+        return StopReason.END if self.finished else StopReason.BUDGET
+
+    # Asynchronous commands, run by the worker thread of the interpreter in the order they are sent.
+    def async_interpret(self, code: str) -> Future:
+        """
+        Interpret a program on the worker thread, see interpret(). It returns right away, the program can be halted
+        from the calling thread with halt().
+
+        :param code: the code of the program
+        :return: the future of the interpretation, holding its exception if it failed
+        """
+        return self._submit(self.interpret, code)
+
+    def async_proceed(self) -> Future:
+        """
+        :return: the future of proceed() run on the worker thread
+        """
+        return self._submit(self.proceed)
+
+    def async_step(self, count: int = 1) -> Future:
+        """
+        :return: the future of step() run on the worker thread, holding the StopReason
+        """
+        return self._submit(self.step, count)
+
+    def async_run_until(self, predicate: Callable[[], bool], count: int | None = None) -> Future:
+        """
+        :return: the future of run_until() run on the worker thread, holding the StopReason
+        """
+        return self._submit(self.run_until, predicate, count)
+
+    def async_run_for(self, milliseconds: float) -> Future:
+        """
+        :return: the future of run_for() run on the worker thread, holding the StopReason
+        """
+        return self._submit(self.run_for, milliseconds)
+
+    def async_set_breakpoints(self, lines: list[int], conditions: list[str | None] | None = None) -> Future:
+        """
+        :return: the future of set_breakpoints() run on the worker thread, once the commands sent before it are run, so
+            that the breakpoints do not change under a running interpretation
+        """
+        return self._submit(self.set_breakpoints, lines, conditions)
+
+    def async_set_watchpoints(self, names: list[str], conditions: list[str | None] | None = None) -> Future:
+        """
+        :return: the future of set_watchpoints() run on the worker thread, once the commands sent before it are run, so
+            that the environment is not observed anew under a running interpretation
+        """
+        return self._submit(self.set_watchpoints, names, conditions)
+
+    def close(self) -> None:
+        """
+        Stop the worker thread, if started, once the commands sent so far are run.
+        """
+        if self._worker is not None:
+            self._worker.close()
+            self._worker = None
+
+    def _submit(self, command: Callable, *arguments) -> Future:
+        if self._worker is None:
+            self._worker = Worker(type(self).__name__)
+        return self._worker.submit(self._work, command, arguments)
 
-    def step(self) -> None:
-        self._interpretation_step()
+    def _work(self, command: Callable, arguments: tuple):
+        """
+        Run a command on the worker thread, accepting the halts requested from other threads while it runs.
+        """
+        with self._worker_lock:
+            self._worker_running = True
+        try:
+            return command(*arguments)
+        finally:
+            with self._worker_lock:
+                self._worker_running = False
+                self._suspend_requested = False  # A halt requested after the last visit of the command
+
+    def _on_worker(self) -> bool:
+        """
+        :return: whether the current thread is the worker thread of the interpreter
+        """
+        return self._worker is not None and current_thread() is self._worker.thread
+
+    def _halt_reason(self) -> StopReason:
+        if self._breakpoint_stop:
+            return StopReason.BREAKPOINT
+        if self._watchpoints is not None and self._watchpoints.hit is not None:
+            return StopReason.WATCHPOINT
+        return StopReason.HALT
+
+    def set_breakpoints(self, lines: list[int], conditions: list[str | None] | None = None) -> list[int]:
+        """
+        Replace the breakpoints.
+        The interpretation pauses before visiting the outermost node starting on the line of a breakpoint, when its
+        condition, if any, is true. Conditions are expressions of the environment, see condition().
+
+        :param lines: the lines of the breakpoints, starting from 1
+        :param conditions: the condition of each breakpoint, None for unconditional breakpoints
+        :return: the lines on which a node starts in the current tree, all the lines when no program is interpreted
+        """
+        if conditions is None:
+            conditions = [None] * len(lines)
+        if len(conditions) != len(lines):
+            raise Exception("Unexpected number of conditions: " + str(len(conditions)))
+
+        self._breakpoint_lines = {
+            line: self.condition(condition) if condition else None for line, condition in zip(lines, conditions)
+        }
+        self._index_breakpoints()
+
+        if self._tree is None:
+            return list(self._breakpoint_lines)
+        return [line for line in self._breakpoint_lines if line in self._line_index]
+
+    def _index_breakpoints(self) -> None:
+        """
+        Flag the nodes of the current tree on which the interpretation pauses.
+        The index of the lines of the tree is built once per tree.
+        """
+        if self._tree is not self._indexed_tree:
+            self._line_index = {}
+            self._indexed_tree = self._tree
+            if self._tree is not None:
+                nodes = [self._tree.getChild(i) for i in reversed(range(self._tree.getChildCount()))]
+                while nodes:  # Pre-order walk, the first node starting on a line is the outermost
+                    node = nodes.pop()
+                    if isinstance(node, ParserRuleContext):
+                        self._line_index.setdefault(node.start.line, node)
+                        nodes.extend(node.getChild(i) for i in reversed(range(node.getChildCount())))
+
+        # Updated in place, the interpretation loops hold it
+        self._breakpoints.clear()
+        for line, condition in self._breakpoint_lines.items():
+            if line in self._line_index:
+                self._breakpoints[self._line_index[line]] = condition
+
+        # The node paused at is still passed when resuming if it keeps its breakpoint, e.g. when they are sent again
+        if self._breakpoint_skip not in self._breakpoints:
+            self._breakpoint_skip = None
+            self._breakpoint_stop = False
+
+    def _break(self, tree: ParserRuleContext) -> bool:
+        """
+        :param tree: a node flagged with a breakpoint, about to be visited
+        :return: whether to pause before visiting it
+        """
+        if tree is self._breakpoint_skip:  # Resuming from this breakpoint
+            self._breakpoint_skip = None
+            self._breakpoint_stop = False
+            return False
+        condition = self._breakpoints[tree]
+        if condition is not None and not condition():
+            return False
+        self._breakpoint_skip = tree
+        self._breakpoint_stop = True
+        return True
+
+    def set_watchpoints(self, names: list[str], conditions: list[str | None] | None = None) -> None:
+        """
+        Replace the watchpoints.
+        The interpretation halts when an attribute of the environment or a variable with the name of a watchpoint is
+        written, when its condition, if any, is true. Conditions are expressions of the environment, see condition(),
+        in which the name of a variable is bound to the value written.
+
+        :param names: the names of the attributes and variables to watch
+        :param conditions: the condition of each watchpoint, None for unconditional watchpoints
+        """
+        if conditions is None:
+            conditions = [None] * len(names)
+        if len(conditions) != len(names):
+            raise Exception("Unexpected number of conditions: " + str(len(conditions)))
+
+        if names:
+            self._watchpoints = Watchpoints(self, {
+                name: self.condition(condition) if condition else None for name, condition in zip(names, conditions)
+            })
+        else:
+            self._watchpoints = None
+        self._observe(self._environment)
+
+    def condition(self, expression: str) -> Callable[..., bool]:
+        """
+        Compile a Python expression into a predicate on the environment, e.g. "len(lines) > 10".
+        The attributes of the environment are the names of the expression, along with a few builtins.
+
+        Expressions are sent by the clients, so only names, constants, comparisons, boolean and arithmetic operations,
+        and calls of the builtins are allowed, see CONDITION_NODES: no attributes, subscripts or lambdas, through which
+        any Python code could be reached.
+
+        :param expression: the expression to evaluate at each check
+        :return: a callable returning the truth of the expression in the current environment, taking optional variables
+            hiding the attributes of the same name
+        :raise Exception: when the expression is not a valid condition
+        """
+        try:
+            tree = ast.parse(expression, "<condition>", "eval")
+        except SyntaxError as error:
+            raise Exception("Invalid condition: " + str(error)) from None
+        for node in ast.walk(tree):
+            if not isinstance(node, CONDITION_NODES):
+                raise Exception("Forbidden syntax in condition: " + type(node).__name__)
+            if isinstance(node, ast.Name) and node.id not in CONDITION_BUILTINS and node.id.startswith("__"):
+                raise Exception("Forbidden name in condition: " + node.id)
+            if isinstance(node, ast.Call) and (
+                not isinstance(node.func, ast.Name) or not callable(CONDITION_BUILTINS.get(node.func.id)) or node.keywords
+            ):
+                raise Exception("Forbidden call in condition: " + ast.unparse(node.func))
+        code = compile(tree, "<condition>", "eval")
+        namespace = {"__builtins__": CONDITION_BUILTINS}
+        return lambda variables=None: bool(eval(code, namespace, EnvironmentMapping(self._environment, variables)))
 
     # Halt and step commands to use from the interpreter subclasses.
     # Ex: yield signalHalt()
 
     def signalHalt(self) -> Halt:
-        return Halt()
+        return HALT
 
     def signalBeginStep(self, handler: Callable = None) -> SignalBeginStep:
-        return SignalBeginStep(handler)
+        return BEGIN_STEP if handler is None else SignalBeginStep(handler)
 
     def signalEndStep(self, handler: Callable = None) -> SignalEndStep:
-        return SignalEndStep(handler)
+        return END_STEP if handler is None else SignalEndStep(handler)
+
+    @property
+    def fast_run(self) -> bool:
+        return self._fast_run
+
+    @fast_run.setter
+    def fast_run(self, enabled: bool) -> None:
+        self._fast_run = enabled
+
+    @property
+    def compilation(self) -> bool:
+        return self._compilation
+
+    @compilation.setter
+    def compilation(self, enabled: bool) -> None:
+        self._compilation = enabled
+
+    @property
+    def profiler(self) -> Profile | None:
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profile | None) -> None:
+        if self._profiler is not None:
+            self._profiler.detach()
+        self._profiler = profiler
+        if profiler is not None:
+            profiler.attach(self)
+
+    @property
+    def journal(self) -> Journal | None:
+        return self._journal
+
+    @journal.setter
+    def journal(self, journal: Journal | None) -> None:
+        """
+        Record the mutations of the environment in a journal, see backend/journal.py.
+        The environments created by the next interpretations are journaled as well.
+
+        :param journal: the journal to record the mutations in, None to stop recording them
+        """
+        self._journal = journal
+        self._observe(self._environment)
+
+    @property
+    def watchpoint(self) -> str | None:
+        """
+        :return: the name of the watchpoint which halted the interpretation, None if it was not halted by a watchpoint
+        """
+        return None if self._watchpoints is None else self._watchpoints.hit
+
+    @property
+    def finished(self) -> bool:
+        return not self._interpretation_stack
 
     @property
     def environment(self) -> Environment:
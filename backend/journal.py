@@ -0,0 +1,200 @@
+from collections import deque
+from itertools import islice
+
+from backend.environment import fields
+
+# Kinds of changes
+SET = "set"         # An attribute of the environment is set
+APPEND = "append"   # A value is appended to a list attribute
+ITEM = "item"       # A key of a dict attribute is set
+
+class Change:
+    """
+    A mutation of the environment, recorded by a Journal.
+    """
+
+    __slots__ = ("version", "kind", "name", "key", "value")
+
+    def __init__(self, version: int, kind: str, name: str, key, value):
+        self.version = version
+        self.kind = kind
+        self.name = name    # Name of the attribute of the environment
+        self.key = key      # Key of an ITEM change, None otherwise
+        self.value = value  # Value set or appended, a copy of the lists and dicts set
+
+    def to_dict(self) -> dict:
+        return {"version": self.version, "kind": self.kind, "name": self.name, "key": self.key, "value": self.value}
+
+class Journal:
+    """
+    Bounded journal of the mutations of an environment, so that clients can fetch the changes since the version they
+    last saw instead of reading the whole environment.
+
+    A journal is enabled by setting Interpreter.journal: the class of the environment is then swapped for a subclass
+    recording the assignments of its attributes, the lists and dicts assigned being replaced by recording ones.
+    Without journal, the environment is left untouched.
+    Only the oldest changes are dropped when the journal is full, the versions keep increasing.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """
+        Constructor.
+
+        :param capacity: the maximum number of changes kept
+        """
+        self._changes = deque(maxlen=capacity)
+        self._version = 0
+
+    def record(self, kind: str, name: str, key, value) -> None:
+        self._version += 1
+        self._changes.append(Change(self._version, kind, name, key, value))
+
+    def changes_since(self, version: int) -> list[Change] | None:
+        """
+        :param version: the version of the environment last seen by the client, 0 for none
+        :return: the changes made after this version, None if some of them were dropped, in which case the client must
+            read the whole environment again
+        """
+        if version >= self._version:
+            return []
+        if not self._changes or self._changes[0].version > version + 1:
+            return None
+        return list(islice(self._changes, version + 1 - self._changes[0].version, None))
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def capacity(self) -> int:
+        return self._changes.maxlen
+
+class JournaledList(list):
+    """
+    List attribute of an environment recording its mutations in a journal.
+    Appends are recorded as such, the other mutations as a new value of the whole list.
+    The list it replaces is kept, unjournal_environment() hands it back with the values of the journaled list.
+    """
+
+    __slots__ = ("_name", "_journal", "_original")
+
+    def __init__(self, values: list, name: str, journal: Journal):
+        super().__init__(values)
+        self._name = name
+        self._journal = journal
+        self._original = values
+
+    def append(self, value) -> None:
+        super().append(value)
+        self._journal.record(APPEND, self._name, None, value)
+
+    def extend(self, values) -> None:
+        for value in values:
+            self.append(value)
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def _reset(self) -> None:
+        self._journal.record(SET, self._name, None, list(self))
+
+def _resetting(method):
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._reset()
+        return result
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+for _method in ("__setitem__", "__delitem__", "__imul__", "insert", "pop", "remove", "clear", "sort", "reverse"):
+    setattr(JournaledList, _method, _resetting(getattr(list, _method)))
+
+class JournaledDict(dict):
+    """
+    Dict attribute of an environment recording its mutations in a journal.
+    Assignments of keys are recorded as such, the other mutations as a new value of the whole dict.
+    The dict it replaces is kept, unjournal_environment() hands it back with the items of the journaled dict.
+    """
+
+    __slots__ = ("_name", "_journal", "_original")
+
+    def __init__(self, values: dict, name: str, journal: Journal):
+        super().__init__(values)
+        self._name = name
+        self._journal = journal
+        self._original = values
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self._journal.record(ITEM, self._name, key, value)
+
+    def _reset(self) -> None:
+        self._journal.record(SET, self._name, None, dict(self))
+
+for _method in ("__delitem__", "__ior__", "pop", "popitem", "clear", "update", "setdefault"):
+    setattr(JournaledDict, _method, _resetting(getattr(dict, _method)))
+
+class Recorders:
+    """
+    Forward the mutations of an environment to several recorders, e.g. a journal and watchpoints.
+    """
+
+    __slots__ = ("_recorders",)
+
+    def __init__(self, recorders: list):
+        self._recorders = recorders
+
+    def record(self, kind: str, name: str, key, value) -> None:
+        for recorder in self._recorders:
+            recorder.record(kind, name, key, value)
+
+def _journaled(value, name: str, journal: Journal):
+    if type(value) is list:
+        return JournaledList(value, name, journal)
+    if type(value) is dict:
+        return JournaledDict(value, name, journal)
+    return value
+
+def journal_environment(environment, journal: Journal) -> None:
+    """
+    Record the mutations of an environment in a journal, from now on.
+    The current attributes are recorded as set, so that the journal starts with the whole environment.
+    Its lists and dicts are replaced by journaled copies: the interpreter holding them must read them again, see
+    Interpreter.rebind().
+
+    :param environment: an Environment or an instance of a declared environment class
+    :param journal: the journal to record the mutations in, or any object with the record() method of Journal
+    """
+    cls = type(environment)
+
+    def __setattr__(self, name, value):
+        value = _journaled(value, name, journal)
+        object.__setattr__(self, name, value)
+        journal.record(SET, name, None, value.copy() if isinstance(value, (list, dict)) else value)
+
+    # Same layout as the class of the environment, so that its class can be swapped
+    environment.__class__ = type("Journaled" + cls.__name__, (cls,), {
+        "__slots__": (), "__setattr__": __setattr__, "JOURNAL": journal
+    })
+    for name, value in fields(environment).items():
+        setattr(environment, name, value)
+
+def unjournal_environment(environment) -> None:
+    """
+    Stop recording the mutations of an environment, restoring its class and its lists and dicts: the objects replaced
+    by journal_environment() are set back, updated with the mutations made since.
+
+    :param environment: an environment passed to journal_environment()
+    """
+    if getattr(type(environment), "JOURNAL", None) is None:
+        return
+    object.__setattr__(environment, "__class__", type(environment).__bases__[0])
+    for name, value in fields(environment).items():
+        if type(value) is JournaledList:
+            value._original[:] = value
+            setattr(environment, name, value._original)
+        elif type(value) is JournaledDict:
+            value._original.clear()
+            value._original.update(value)
+            setattr(environment, name, value._original)
@@ -1,28 +1,242 @@
 from importlib import import_module
+from pathlib import Path
+from secrets import token_hex
+from threading import Lock
+from time import monotonic
+from typing import Callable
 
-from jsonrpclib.SimpleJSONRPCServer import SimpleJSONRPCServer
-
+from backend.cache import CodeCache
 from backend.parser import Parser
 from backend.interpreter import Interpreter
-from backend.protocols import DebugAdapterProtocol, LanguageExecutionServerProtocol
+from backend.protocols import DebugAdapterProtocol, LanguageExecutionServerProtocol, SessionProtocol, \
+    ThreadingJSONRPCServer
+
+# Engines executing the programs of a language, by name of the class and module implementing them in the language
+ENGINES = {
+    "interpreter": "LanguageInterpreter",
+    "vm": "LanguageVM",
+    "transpiler": "LanguageTranspiler",
+}
+
+# Directory of the prediction DFAs saved by the servers, loaded when they start
+DFA_DIRECTORY = str(Path.home() / ".cache" / "lipvm" / "dfa")
+
+# Directory of the languages, each in a package of it, e.g. languages/minilogo
+LANGUAGES_DIRECTORY = Path(__file__).parent.parent / "languages"
+
+# Maximum number of sessions of a server
+MAX_SESSIONS = 1000
+
+# Seconds after which a session without requests is closed
+SESSION_TIMEOUT = 30 * 60
+
+def create_interpreter(module: str, engine: str = "interpreter", cache_directory: str | None = None) -> Interpreter:
+    """
+    :param module: the module of the language
+    :param engine: the engine executing the programs, see ENGINES
+    :param cache_directory: the directory storing the parsed programs, and the compiled ones for the engines caching
+    them, so that new processes skip their parsing and compilation, None to only cache them in memory
+    :return: a new interpreter of the language, with its own parser, sharing the parse cache of the language
+    """
+    if engine not in ENGINES:
+        raise Exception("Unknown engine: " + str(engine))
+
+    # Import language visitor from module
+    interpreter = getattr(import_module(module + "." + ENGINES[engine]), ENGINES[engine])
+
+    # Create the parser and interpreter
+    trees = str(Path(cache_directory) / "trees") if cache_directory is not None else None
+    parser = Parser(module, directory=trees)
+    interpreter = interpreter(parser)
+    if cache_directory is not None and isinstance(getattr(interpreter, "cache", None), CodeCache):
+        interpreter.cache = CodeCache(str(Path(cache_directory) / "code"))
+    return interpreter
+
+def languages() -> list[str]:
+    """
+    :return: the modules of the languages, e.g. languages.minilogo
+    """
+    return sorted(
+        "languages." + path.name for path in LANGUAGES_DIRECTORY.iterdir() if (path / "LanguageInterpreter.py").is_file()
+    )
+
+class Session:
+    """
+    A client of a server, with its own interpreter, and so its own environment and parser, the parse cache being shared
+    by the interpreters of the language.
+    """
+
+    __slots__ = ("language", "interpreter", "used")
+
+    def __init__(self, language: str, interpreter: Interpreter, used: float):
+        self.language = language
+        self.interpreter = interpreter
+        self.used = used  # Time of the last request
+
+class Sessions:
+    """
+    Sessions of a server, identified by random ids.
+
+    The number of sessions is capped, and the sessions without requests for longer than the timeout are closed, see
+    evict(), e.g. when the clients left without closing them. Closing a session halts its program and stops the worker
+    thread of its interpreter.
+    """
+
+    def __init__(
+        self, engine: str = "interpreter", cache_directory: str | None = None, limit: int = MAX_SESSIONS,
+        timeout: float = SESSION_TIMEOUT, clock: Callable[[], float] = monotonic
+    ):
+        """
+        Constructor.
+
+        :param engine: the engine executing the programs of the sessions, see ENGINES
+        :param cache_directory: the directory storing the parsed and compiled programs, see create_interpreter()
+        :param limit: the maximum number of sessions
+        :param timeout: the seconds after which a session without requests is closed
+        :param clock: the clock of the requests, in seconds
+        """
+        self._engine = engine
+        self._cache_directory = cache_directory
+        self._limit = limit
+        self._timeout = timeout
+        self._clock = clock
+        self._languages = set(languages())
+        self._sessions = {}
+        self._lock = Lock()
+
+    def create(self, language: str) -> str:
+        """
+        :param language: the module of the language of the session, see languages()
+        :return: the id of the new session
+        :raise Exception: when the language is unknown, or when there are too many sessions
+        """
+        if language not in self._languages:
+            raise Exception("Unknown language: " + str(language))
+        self.evict()
+        with self._lock:
+            if len(self._sessions) >= self._limit:
+                raise Exception("Too many sessions: " + str(self._limit))
+            id = token_hex(16)
+            self._sessions[id] = None  # Reserved while the interpreter is created
+        try:
+            interpreter = create_interpreter(language, self._engine, self._cache_directory)
+        except BaseException:
+            with self._lock:
+                del self._sessions[id]
+            raise
+        with self._lock:
+            self._sessions[id] = Session(language, interpreter, self._clock())
+        return id
+
+    def interpreter(self, id: str) -> Interpreter:
+        """
+        :param id: the id of a session
+        :return: the interpreter of the session, which is then in use
+        :raise Exception: when there is no such session, e.g. when it was closed
+        """
+        session = self._sessions.get(id)
+        if session is None:
+            raise Exception("Unknown session: " + str(id))
+        session.used = self._clock()
+        return session.interpreter
+
+    def close(self, id: str) -> None:
+        """
+        :param id: the id of a session, nothing is done if there is no such session
+        """
+        with self._lock:
+            session = self._sessions.get(id)
+            if session is None:
+                return
+            del self._sessions[id]
+        session.interpreter.halt()
+        session.interpreter.close()
+
+    def evict(self) -> list[str]:
+        """
+        Close the sessions without requests for longer than the timeout.
+
+        :return: the ids of the sessions closed
+        """
+        deadline = self._clock() - self._timeout
+        with self._lock:
+            idle = [id for id, session in self._sessions.items() if session is not None and session.used < deadline]
+        for id in idle:
+            self.close(id)
+        return idle
+
+    def clear(self) -> None:
+        """
+        Close all the sessions.
+        """
+        with self._lock:
+            ids = [id for id, session in self._sessions.items() if session is not None]
+        for id in ids:
+            self.close(id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, id: str) -> bool:
+        return self._sessions.get(id) is not None
 
 class LipVM:
 
-    def __init__(self, module: str):
-        # Import language visitor from module
-        interpreter = getattr(import_module(module + ".LanguageInterpreter"), 'LanguageInterpreter')
+    def __init__(self, module: str, engine: str = "interpreter", cache_directory: str | None = None):
+        """
+        Constructor.
+
+        :param module: the module of the language
+        :param engine: the engine executing the programs, see ENGINES
+        :param cache_directory: the directory storing the parsed programs, and the compiled ones for the engines caching
+        them, so that new processes skip their parsing and compilation, None to only cache them in memory
+        """
+        self._engine = engine
+        self._cache_directory = cache_directory
+        self._interpreter = create_interpreter(module, engine, cache_directory)
+
+    def serve(
+        self, port: int, dfa_directory: str | None = DFA_DIRECTORY, max_sessions: int = MAX_SESSIONS,
+        session_timeout: float = SESSION_TIMEOUT, log_requests: bool = True
+    ) -> None:
+        """
+        Serve the protocols until interrupted. Each client creates a session, of any language, running its programs
+        with the engine of this LipVM, see Sessions.
+
+        :param port: the port to listen on
+        :param dfa_directory: the directory of the prediction DFAs of the parser, loaded when the server starts and
+        saved when it stops, None to warm up the parser from scratch
+        :param max_sessions: the maximum number of sessions
+        :param session_timeout: the seconds after which a session without requests is closed
+        :param log_requests: whether to log the requests on the standard error
+        """
+        parser = self._interpreter.parser
+        if dfa_directory is None or not parser.load_dfa(dfa_directory):
+            parser.warm_up()
+            self._save_dfa(dfa_directory)
 
-        # Create the parser and interpreter
-        parser = Parser(module)
-        self._interpreter = interpreter(parser)
+        sessions = Sessions(self._engine, self._cache_directory, max_sessions, session_timeout)
+        server = ThreadingJSONRPCServer(('localhost', port), service=sessions.evict, logRequests=log_requests)
 
-    def serve(self, port: int) -> None:
-        server = SimpleJSONRPCServer(('localhost', port))
+        SessionProtocol(sessions, server)
+        DebugAdapterProtocol(sessions, server)
+        LanguageExecutionServerProtocol(sessions, server)
 
-        DebugAdapterProtocol(self._interpreter, server)
-        LanguageExecutionServerProtocol(self._interpreter, server)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            sessions.clear()
+            # The DFAs grew with the programs parsed, the next servers start from there
+            self._save_dfa(dfa_directory)
 
-        server.serve_forever()
+    def _save_dfa(self, directory: str | None) -> None:
+        if directory is None:
+            return
+        try:
+            self._interpreter.parser.save_dfa(directory)
+        except OSError:
+            pass  # The DFAs only speed up the start
 
     @property
     def interpreter(self) -> Interpreter:
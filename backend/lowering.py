@@ -0,0 +1,306 @@
+import marshal
+from array import array
+from sys import intern
+
+from antlr4 import ParserRuleContext, Token
+from antlr4.tree.Tree import ParseTreeVisitor, TerminalNode
+
+# Version of the binary format of the lean trees, see Lowering.dump()
+TREE_FORMAT = 1
+
+class Leaf(TerminalNode):
+    """
+    Token of a lean tree, keeping only its type, text and position.
+
+    A leaf stands both for the terminal node and for its token: leaf.symbol is the leaf itself, so that the accessors of
+    the generated contexts, e.g. ctx.ID().getText(), and the labels of tokens, e.g. ctx.status.text, work as on the
+    tree of ANTLR.
+    """
+
+    __slots__ = ("type", "text", "line", "column")
+
+    def __init__(self, token: Token | None = None):
+        if token is not None:
+            self.type = token.type
+            self.text = intern(token.text)
+            self.line = token.line      # Starting from 1
+            self.column = token.column  # Starting from 0
+
+    @property
+    def symbol(self) -> "Leaf":
+        return self
+
+    def getSymbol(self) -> "Leaf":
+        return self
+
+    def getPayload(self) -> "Leaf":
+        return self
+
+    def getParent(self) -> None:
+        return None
+
+    def getChild(self, i: int) -> None:
+        return None
+
+    def getChildCount(self) -> int:
+        return 0
+
+    def getText(self) -> str:
+        return self.text
+
+    def accept(self, visitor: ParseTreeVisitor):
+        return visitor.visitTerminal(self)
+
+    def __str__(self) -> str:
+        return self.text
+
+class Lowering:
+    """
+    Lower the trees parsed by ANTLR into lean trees, e.g. to keep programs in memory for a long time.
+
+    The tree of ANTLR keeps every token of the program, each with its source, i.e. the lexer and the input stream holding
+    the code, along with the labels of the nodes in a dictionary per node. A lean tree only keeps:
+
+    - A node per rule context, of a slotted subclass of the generated context, so that interpreters visit it with the
+      same visit methods and read it with the same accessors and labels. Parents are not kept, and the children are
+      a tuple, lean trees are not meant to be edited.
+    - A Leaf per token whose text varies, e.g. identifiers and numbers. The tokens with a fixed text, e.g. keywords and
+      punctuation, are dropped, unless they are labeled, e.g. ctx.status in minilogo, or start or stop a node.
+    - The first and last tokens of each node, as ctx.start and ctx.stop, the source span of the node.
+
+    The lean classes are generated once per language from the contexts of its generated parser.
+
+    Lean trees can be encoded into a compact binary format, e.g. to store them on disk, see dump() and load().
+    """
+
+    # Lean class and labels by generated context class, per generated parser class
+    _classes = {}
+
+    def __init__(self, LanguageParser: type):
+        """
+        Constructor.
+
+        :param LanguageParser: the generated parser of the language
+        """
+        self._LanguageParser = LanguageParser
+        self._classes = Lowering._classes.setdefault(LanguageParser, {})
+        self._literals = frozenset(
+            type for type, name in enumerate(LanguageParser.literalNames) if name != "<INVALID>"
+        )  # Types of the tokens with a fixed text
+
+    def lower(self, tree: ParserRuleContext) -> ParserRuleContext:
+        """
+        :param tree: a tree parsed by ANTLR, without syntax errors
+        :return: the lean tree
+        """
+        root = self._node(tree)
+        nodes = [(tree, root)]
+        lowered = {}  # Lean nodes and leaves by context and token, the leaves being shared by the nodes they start or stop
+        while nodes:
+            context, node = nodes.pop()
+            children = []
+            for child in context.children or ():
+                if isinstance(child, ParserRuleContext):
+                    lean = lowered[child] = self._node(child)
+                    nodes.append((child, lean))
+                    children.append(lean)
+                elif child.symbol.type not in self._literals:
+                    children.append(self._lowered(child.symbol, lowered))
+            node.children = tuple(children) if children else None  # Read only, as for rules without children
+
+            for label in self._classes[type(context)][1]:
+                value = getattr(context, label)
+                if isinstance(value, list):
+                    setattr(node, label, [self._lowered(item, lowered) for item in value])
+                else:
+                    setattr(node, label, self._lowered(value, lowered))
+
+            node.start = self._lowered(context.start, lowered)
+            node.stop = node.start if context.stop is context.start else self._lowered(context.stop, lowered)
+        return root
+
+    def dump(self, tree: ParserRuleContext) -> bytes:
+        """
+        Encode a lean tree into bytes, as:
+
+        - The names of the context classes of the nodes, and the texts of the leaves, each stored once.
+        - The leaves, as 4 integers each: type, index of the text, line and column.
+        - The nodes in prefix order, as integers: index of the class, number of children, indexes of the start and stop
+          leaves, then the labels, see _label(), followed by the children. A leaf child is stored as -1 - its index.
+
+        The integers are stored in the byte order of the machine, in the smallest type holding them, see _pack().
+
+        :param tree: a lean tree, as lowered by lower()
+        :return: the bytes, to decode with load()
+        """
+        classes, texts, leaves, items = {}, {}, {}, array("i")
+        leaf_items = array("i")
+
+        def leaf(value: Leaf) -> int:
+            index = leaves.get(id(value))
+            if index is None:
+                index = leaves[id(value)] = len(leaves)
+                leaf_items.extend((value.type, texts.setdefault(value.text, len(texts)), value.line, value.column))
+            return index
+
+        nodes = [tree]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, Leaf):
+                items.append(-1 - leaf(node))
+                continue
+
+            Context = type(node).__bases__[0]
+            children = node.children or ()
+            items.extend((
+                classes.setdefault(Context.__name__, len(classes)), len(children),
+                leaf(node.start) if node.start is not None else -1, leaf(node.stop) if node.stop is not None else -1
+            ))
+            positions = {id(child): position for position, child in enumerate(children)}
+            for label in self._classes[Context][1]:
+                self._label(getattr(node, label), positions, leaf, items)
+            nodes.extend(reversed(children))
+
+        return marshal.dumps((list(classes), list(texts), _pack(leaf_items), _pack(items)))
+
+    def _label(self, value, positions: dict, leaf, items: array) -> None:
+        """
+        Encode the value of a label: -1 for None, twice the index of a leaf, twice the position of a child plus one,
+        or -2 - the length of a list, followed by its values.
+        """
+        if value is None:
+            items.append(-1)
+        elif isinstance(value, list):
+            items.append(-2 - len(value))
+            for item in value:
+                self._label(item, positions, leaf, items)
+        elif isinstance(value, Leaf):
+            items.append(2 * leaf(value))
+        else:
+            items.append(2 * positions[id(value)] + 1)
+
+    def load(self, data) -> ParserRuleContext:
+        """
+        :param data: bytes encoded by dump(), or any buffer holding them, e.g. a memory-mapped file
+        :return: the lean tree
+        """
+        class_names, texts, leaf_data, item_data = marshal.loads(data)
+        leaf_items, items = _unpack(leaf_data), _unpack(item_data)
+
+        leaves = []
+        for i in range(0, len(leaf_items), 4):
+            value = Leaf()
+            value.type = leaf_items[i]
+            value.text = intern(texts[leaf_items[i + 1]])
+            value.line = leaf_items[i + 2]
+            value.column = leaf_items[i + 3]
+            leaves.append(value)
+
+        contexts = [getattr(self._LanguageParser, name) for name in class_names]
+        for Context in contexts:
+            if Context not in self._classes:
+                self._classes[Context] = _lean_class(Context)
+
+        root = None
+        frames = []  # Node, number of children left to read, children and encoded labels of the nodes being read
+        position = 0
+        while True:
+            item = items[position]
+            position += 1
+            if item < 0:
+                child = leaves[-1 - item]
+            else:
+                child = self._node_of(self._classes[contexts[item]][0])
+                count = items[position]
+                start, stop = items[position + 1], items[position + 2]
+                child.start = leaves[start] if start >= 0 else None
+                child.stop = leaves[stop] if stop >= 0 else None
+                position += 3
+                labels = []
+                for label in self._classes[contexts[item]][1]:
+                    value, position = _read_label(items, position)
+                    labels.append((label, value))
+                frames.append([child, count, [], labels])
+
+            if root is None:
+                root = child
+            else:
+                frames[-2 if item >= 0 else -1][2].append(child)
+
+            # Complete the nodes whose children are all read
+            while frames and len(frames[-1][2]) == frames[-1][1]:
+                node, _, children, labels = frames.pop()
+                node.children = tuple(children) if children else None
+                for label, value in labels:
+                    setattr(node, label, _decode_label(value, children, leaves))
+            if not frames:
+                return root
+
+    def _node(self, context: ParserRuleContext) -> ParserRuleContext:
+        entry = self._classes.get(type(context))
+        if entry is None:
+            entry = self._classes[type(context)] = _lean_class(type(context))
+        return self._node_of(entry[0])
+
+    def _node_of(self, Lean: type) -> ParserRuleContext:
+        node = Lean.__new__(Lean)
+        node.parentCtx = None
+        node.invokingState = -1
+        node.exception = None
+        node.parser = None
+        return node
+
+    def _lowered(self, value, lowered: dict):
+        """
+        :return: the lean version of a context or token of the tree being lowered
+        """
+        if value is None:
+            return None
+        lean = lowered.get(value)
+        if lean is None:  # A token seen for the first time
+            lean = lowered[value] = Leaf(value)
+        return lean
+
+def _lean_class(Context: type) -> tuple[type, tuple[str, ...]]:
+    """
+    :param Context: a context class of a generated parser
+    :return: its lean subclass, with a slot per label, and the labels
+    """
+    labels = tuple(vars(Context(None)))
+    return type("Lean" + Context.__name__, (Context,), {"__slots__": labels}), labels
+
+def _pack(values: array) -> tuple[str, bytes]:
+    """
+    :return: the values as bytes, in the smallest type of integers holding them all, and the type
+    """
+    low, high = (min(values), max(values)) if values else (0, 0)
+    for typecode, limit in (("b", 1 << 7), ("h", 1 << 15)):
+        if -limit <= low and high < limit:
+            return typecode, array(typecode, values).tobytes()
+    return values.typecode, values.tobytes()
+
+def _unpack(packed: tuple[str, bytes]) -> array:
+    values = array(packed[0])
+    values.frombytes(packed[1])
+    return values
+
+def _read_label(items: array, position: int) -> tuple:
+    """
+    :return: the encoded value of a label, a list of them for a list, and the position following it
+    """
+    item = items[position]
+    position += 1
+    if item > -2:
+        return item, position
+    values = []
+    for _ in range(-2 - item):
+        value, position = _read_label(items, position)
+        values.append(value)
+    return values, position
+
+def _decode_label(value, children: list, leaves: list):
+    if isinstance(value, list):
+        return [_decode_label(item, children, leaves) for item in value]
+    if value == -1:
+        return None
+    return children[value // 2] if value % 2 else leaves[value // 2]
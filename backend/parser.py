@@ -1,24 +1,444 @@
+from hashlib import sha256
 from importlib import import_module
+from pathlib import Path
+from threading import local
+from typing import Generator
 
-from antlr4 import CommonTokenStream, InputStream
+from antlr4 import CommonTokenStream, InputStream, ParserRuleContext, Token
+from antlr4.ListTokenSource import ListTokenSource
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 from antlr4.tree.Tree import Tree
 
+from backend import dfa
+from backend.cache import ParseCache, TreeCache
+from backend.lowering import Lowering
+
+class Diagnostic:
+    """
+    A syntax error of a program.
+    """
+
+    __slots__ = ("line", "column", "message")
+
+    def __init__(self, line: int, column: int, message: str):
+        self.line = line      # Starting from 1
+        self.column = column  # Starting from 0
+        self.message = message
+
+    def __str__(self) -> str:
+        return str(self.line) + ":" + str(self.column) + " " + self.message
+
+class ParseError(Exception):
+    """
+    Raised when the code of a program is not valid, with its syntax errors.
+    """
+
+    def __init__(self, diagnostics: list[Diagnostic]):
+        super().__init__("Syntax errors:\n" + "\n".join(str(diagnostic) for diagnostic in diagnostics))
+        self.diagnostics = diagnostics
+
 class Parser:
+    """
+    Parser of the programs of a language.
+
+    Programs are parsed in two stages: first with SLL prediction, bailing out at the first syntax error, then, only if
+    it failed, with full LL prediction and error recovery, so that all the syntax errors are reported. SLL prediction
+    is faster and gives the same trees as LL prediction for the programs it accepts, which are most of them.
+
+    Unless disabled, the trees parsed are lowered into lean trees, see backend/lowering.py, and cached in a ParseCache
+    shared by the parsers of the language building the same kind of trees, lean or not, so that interpreting the same
+    code again, from any interpreter of the language, skips the parsing. Lean trees can also be stored in a directory,
+    see TreeCache, so that new processes skip the parsing of the programs parsed by the previous ones.
+
+    The generated lexer and parser are created once per thread and reset for each parse. The prediction DFAs built by
+    ANTLR while parsing are shared by all the instances of the generated parser, see warm_up(), and can be saved to
+    be loaded by the next processes, see save_dfa() and load_dfa().
+
+    Programs made of a sequence of top-level items, e.g. minilogo programs, can also be parsed from a file one item at
+    a time, see parse_stream().
+    """
+
+    # Parse caches by language module and kind of tree, lean or not
+    _caches = {}
+
+    def __init__(
+        self, module, cache: bool = True, two_stage: bool = True, lean: bool = True, directory: str | None = None
+    ):
+        """
+        Constructor.
+
+        :param module: the module of the language
+        :param cache: whether to cache the parsed trees in memory
+        :param two_stage: whether to try SLL prediction first, otherwise programs are parsed with LL prediction only
+        :param lean: whether to lower the parsed trees into lean trees, otherwise the trees of ANTLR are kept
+        :param directory: the directory storing the lean trees on disk, None to only cache them in memory
+        """
+        if directory is not None and not lean:
+            raise Exception("Only lean trees can be stored on disk")
 
-    def __init__(self, module):
         self._LanguageLexer = getattr(import_module(module + ".LanguageLexer"), 'LanguageLexer')
         self._LanguageParser = getattr(import_module(module + ".LanguageParser"), 'LanguageParser')
+        self._examples = Path(import_module(module + ".LanguageParser").__file__).parent / "examples"
+        self._cache = Parser._caches.setdefault((module, lean), ParseCache()) if cache else None
+        self._two_stage = two_stage
+        self._lowering = Lowering(self._LanguageParser) if lean else None
+        self._grammar = None  # Computed once needed, see grammar
+        self._store = None
+        if directory is not None:
+            self._store = TreeCache(Path(directory) / module, self._lowering, self.grammar)
+        self._recognizers = local()  # Lexer and parser of each thread
 
     def parse(self, code: str) -> Tree:
-        lexer = self._LanguageLexer(InputStream(code))
-        stream = CommonTokenStream(lexer)
+        """
+        :param code: the code of a program
+        :return: the tree of the program, lean unless disabled
+        :raise ParseError: when the code is not a program, with the position of its errors
+        """
+        if self._cache is None and self._store is None:
+            return self._lower(self._parse(code))
+
+        data = code.encode()
+        key = sha256(data).digest()
+        tree = self._cache.get(key) if self._cache is not None else None
+        if tree is None:
+            tree = self._store.get(key) if self._store is not None else None
+            if tree is None:
+                tree = self._lower(self._parse(code))
+                if self._store is not None:
+                    try:
+                        self._store.put(key, tree)
+                    except OSError:
+                        pass  # The store only speeds up the parsing
+            if self._cache is not None:
+                self._cache.put(key, tree, len(data))
+        return tree
+
+    def _lower(self, tree: Tree) -> Tree:
+        return self._lowering.lower(tree) if self._lowering is not None else tree
+
+    def _parse(self, code: str) -> Tree:
+        errors = _ErrorCollector()
+        lexer = self._lexer(InputStream(code), errors)
+        parser = self._parser(CommonTokenStream(lexer))
+        try:
+            tree = self._predict(parser, errors)
+        finally:
+            self._release()
+
+        # The errors of the lexer, if any, are collected by the first stage, the tokens being lexed once
+        if errors.diagnostics:
+            raise ParseError(errors.diagnostics)
+
+        return tree
+
+    def _lexer(self, input: InputStream, listener: ErrorListener):
+        """
+        :return: the lexer of the current thread, reset to read the input
+        """
+        lexer = getattr(self._recognizers, "lexer", None)
+        if lexer is None:
+            lexer = self._recognizers.lexer = self._LanguageLexer(None)
+        lexer.inputStream = input
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(listener)
+        return lexer
+
+    def _parser(self, stream: CommonTokenStream):
+        """
+        :return: the parser of the current thread, reset to read the tokens
+        """
+        parser = getattr(self._recognizers, "parser", None)
+        if parser is None:
+            parser = self._recognizers.parser = self._LanguageParser(None)
+        parser.setTokenStream(stream)
+        parser.removeErrorListeners()
+        return parser
+
+    def _release(self) -> None:
+        """
+        Drop the input of the lexer and parser of the current thread, so that they do not keep the last code alive, nor
+        the last tree: the prediction of the parser keeps the context of its last decision, linked to the whole tree.
+        """
+        lexer = getattr(self._recognizers, "lexer", None)
+        if lexer is not None:
+            lexer.inputStream = None
+        parser = self._recognizers.parser
+        parser.setTokenStream(None)
+        parser._interp._input = None
+        parser._interp._outerContext = None
+
+    def _predict(self, parser, listener: ErrorListener | None = None) -> Tree:
+        """
+        Parse in two stages: with SLL prediction, stopping at the first syntax error, then, if it failed, with LL
+        prediction and the default error recovery, reporting the syntax errors to the listener.
+
+        :return: the tree, made of the nodes recovered from the errors, if any
+        """
+        if self._two_stage:
+            parser._interp.predictionMode = PredictionMode.SLL
+            parser._errHandler = BailErrorStrategy()
+            try:
+                return parser.main()
+            except ParseCancellationException:
+                parser.reset()
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+        if listener is not None:
+            parser.addErrorListener(listener)
+        return parser.main()
+
+    def lex(self, code: str, line: int = 1, column: int = 0) -> list[Token] | None:
+        """
+        Split code into tokens, e.g. to parse a part of a program, see parse_tokens() and backend/document.py.
+        The text of the tokens is kept in the tokens, so that they do not depend on the code anymore.
+
+        :param code: the code to split
+        :param line: the line at which the code starts
+        :param column: the column at which the code starts
+        :return: the tokens of every channel, without the end of file, None if the code contains invalid characters
+        """
+        errors = _ErrorCounter()
+        tokens = self._lex(code, line, column, errors)
+        return None if errors.count > 0 else tokens
+
+    def _lex(self, code: str, line: int, column: int, listener: ErrorListener) -> list[Token]:
+        lexer = self._lexer(InputStream(code), listener)
+        lexer.line = line
+        lexer.column = column
+
+        try:
+            tokens = lexer.getAllTokens()
+        finally:
+            lexer.inputStream = None
+        for token in tokens:
+            token.text = token.text
+        return tokens
+
+    def parse_tokens(self, tokens: list[Token]) -> Tree | None:
+        """
+        Parse tokens split by lex(), without reporting the syntax errors.
+
+        :param tokens: the tokens to parse
+        :return: the tree, None if the tokens are not a program
+        """
+        parser = self._parser(CommonTokenStream(ListTokenSource(tokens)))
+        try:
+            tree = self._predict(parser)
+            if parser.getNumberOfSyntaxErrors() > 0 or parser.getTokenStream().LA(1) != Token.EOF:
+                return None
+            return tree
+        finally:
+            self._release()
+
+    def parse_stream(self, path: str, chunk_size: int = 1 << 12) -> Generator[Tree, None, None]:
+        """
+        Parse a program from a file one top-level item at a time, e.g. the statements of a minilogo program, so that
+        programs too large to be held in memory are interpreted while they are read, see Interpreter.interpret_stream().
+
+        The file is read by chunks of whole lines, tokens never spanning lines, and the tokens read so far are parsed
+        as a program. The items before the last one are complete: they are yielded, and their tokens dropped. The last
+        item may go on in the next chunk, it is parsed again with it. The memory used is then bounded by the size of a
+        chunk and of the largest item.
+
+        Unlike parse(), the trees are not cached, and tokens left after the last item which can be parsed are a syntax
+        error instead of the end of the program.
+
+        :param path: the file of the program
+        :param chunk_size: the number of characters to read at once
+        :return: the top-level items of the program, lean unless disabled
+        :raise ParseError: when the code is not a program, with the position of its first errors
+        """
+        tokens = []  # Tokens of the items not yielded yet
+        line = 1
+        rest = ""    # Characters read after the last whole line
+        size = chunk_size
+        with open(path) as file:
+            while True:
+                chunk = file.read(size)
+                end = not chunk
+                text = rest + chunk
+                cut = len(text) if end else text.rfind("\n") + 1
+                text, rest = text[:cut], text[cut:]
+                if not text and not end:
+                    continue
+
+                errors = _ErrorCollector()
+                tokens.extend(self._lex(text, line, 0, errors))
+                if errors.diagnostics:
+                    raise ParseError(errors.diagnostics)
+                line += text.count("\n")
+
+                tree, offending = self._parse_prefix(tokens)
+                if offending is None:
+                    items = [child for child in tree.children or () if isinstance(child, ParserRuleContext)]
+                    if not end and items:  # The last item may go on
+                        del tokens[:items.pop().start.tokenIndex]
+                    size = chunk_size
+                    if self._lowering is not None:
+                        items = [self._lowering.lower(item) for item in items]
+                        _unlink(tree)
+                    tree = None
+                    yield from items
+                elif offending.type == Token.EOF and not end:
+                    size *= 2  # The last item goes on, read more at once so that it is not parsed again for every line
+                else:
+                    raise ParseError(self._diagnostics(tokens, offending))
+                if end:
+                    return
+
+    def diagnose(self, code: str) -> list[Diagnostic]:
+        """
+        Report the first syntax errors of code, e.g. of a document, see backend/document.py. As in parse_stream(),
+        tokens left after the last item which can be parsed are a syntax error.
+
+        :param code: the code of a program
+        :return: the syntax errors of the code, none if it is a program
+        """
+        errors = _ErrorCollector()
+        tokens = self._lex(code, 1, 0, errors)
+        if errors.diagnostics:
+            return errors.diagnostics
+        _, offending = self._parse_prefix(tokens)
+        return self._diagnostics(tokens, offending) if offending is not None else []
+
+    def _parse_prefix(self, tokens: list[Token]) -> tuple[Tree | None, Token | None]:
+        """
+        Parse tokens as a program, stopping at the first syntax error, in two stages unless disabled.
+
+        :return: the tree, and the token of the first syntax error, None if there is none, the end of file when the
+                 tokens are only the beginning of a program
+        """
+        parser = self._parser(CommonTokenStream(ListTokenSource(tokens)))
+        parser._errHandler = BailErrorStrategy()
+        tree, offending = None, None
+        try:
+            for mode in (PredictionMode.SLL, PredictionMode.LL) if self._two_stage else (PredictionMode.LL,):
+                parser._interp.predictionMode = mode
+                try:
+                    tree = parser.main()
+                    offending = parser.getTokenStream().LT(1)
+                    if offending.type == Token.EOF:
+                        return tree, None
+                except ParseCancellationException as e:
+                    tree, offending = None, e.args[0].offendingToken
+                parser.reset()
+            return tree, offending
+        finally:
+            self._release()
+
+    def _diagnostics(self, tokens: list[Token], offending: Token) -> list[Diagnostic]:
+        """
+        :return: the syntax errors of tokens up to the first one, at the offending token
+        """
+        errors = _ErrorCollector()
+        parser = self._parser(CommonTokenStream(ListTokenSource(tokens)))
+        try:
+            self._predict(parser, errors)
+        finally:
+            self._release()
+        position = (offending.line, offending.column)
+        diagnostics = [error for error in errors.diagnostics if (error.line, error.column) <= position]
+        if not diagnostics:  # Tokens left after the last item
+            diagnostics.append(Diagnostic(*position, "extraneous input '" + offending.text + "'"))
+        return diagnostics
+
+    def warm_up(self, directory: str | None = None) -> int:
+        """
+        Parse sample programs, e.g. when a server starts, so that the prediction DFAs shared by the parsers of the
+        language are built before the first program is parsed. The programs with syntax errors are parsed as well.
+
+        :param directory: the directory of the programs, the examples of the language by default
+        :return: the number of programs parsed
+        """
+        directory = Path(directory) if directory is not None else self._examples
+        count = 0
+        for path in sorted(directory.iterdir()) if directory.is_dir() else []:
+            if path.is_file():
+                try:
+                    self._parse(path.read_text())
+                except ParseError:
+                    pass
+                count += 1
+        return count
+
+    def save_dfa(self, directory: str) -> Path:
+        """
+        Save the prediction DFAs of the lexer and parser of the language, e.g. once warmed up, see backend/dfa.py.
+
+        :param directory: the directory of the DFA files
+        :return: the file written, named after the ATNs of the language so that it is not loaded for another grammar
+        """
+        path = self._dfa_path(directory)
+        dfa.save_dfa([self._LanguageLexer, self._LanguageParser], dfa.dfa_key(self.grammar), path)
+        return path
+
+    def load_dfa(self, directory: str) -> bool:
+        """
+        Load the prediction DFAs saved by save_dfa(), so that the first programs are parsed at the speed of a warmed up
+        parser. It must be called before parsing, as the DFAs built so far are replaced.
+
+        :param directory: the directory of the DFA files
+        :return: whether DFAs were saved for the grammar of the language
+        """
+        path = self._dfa_path(directory)
+        return dfa.load_dfa([self._LanguageLexer, self._LanguageParser], dfa.dfa_key(self.grammar), path)
+
+    def _dfa_path(self, directory: str) -> Path:
+        return Path(directory) / (dfa.dfa_key(self.grammar) + ".dfa")
+
+    @property
+    def grammar(self) -> str:
+        """
+        :return: a hash of the ATNs of the generated lexer and parser, changing with the grammar of the language
+        """
+        if self._grammar is None:
+            grammar = sha256()
+            for recognizer in (self._LanguageLexer, self._LanguageParser):
+                atn = import_module(recognizer.__module__).serializedATN()
+                grammar.update((recognizer.__name__ + "\n" + ",".join(str(value) for value in atn) + "\n").encode())
+            self._grammar = grammar.hexdigest()
+        return self._grammar
+
+    @property
+    def cache(self) -> ParseCache | None:
+        return self._cache
+
+    @property
+    def store(self) -> TreeCache | None:
+        return self._store
+
+    @property
+    def rule_names(self) -> list[str]:
+        return self._LanguageParser.ruleNames
+
+def _unlink(tree: Tree) -> None:
+    """
+    Unlink the nodes of a tree of ANTLR from their parent, so that it is freed as soon as it is not referenced anymore,
+    instead of by the garbage collector, the links between parents and children being cycles.
+    """
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, ParserRuleContext):
+            node.parentCtx = None
+            if node.children:
+                nodes.extend(node.children)
+
+class _ErrorCounter(ErrorListener):
+
+    def __init__(self):
+        self.count = 0
 
-        parser = self._LanguageParser(stream)
-        #parser.removeErrorListeners()
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.count += 1
 
-        tree = parser.main()
+class _ErrorCollector(ErrorListener):
 
-        if parser.getNumberOfSyntaxErrors() > 0:
-            raise Exception("Syntax errors") # TODO better error management
+    def __init__(self):
+        self.diagnostics = []
 
-        return tree
\ No newline at end of file
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.diagnostics.append(Diagnostic(line, column, msg))
@@ -0,0 +1,300 @@
+import sys
+from inspect import CO_GENERATOR
+from threading import Event, Thread, get_ident
+from time import perf_counter
+from types import GeneratorType
+from typing import Callable, Generator
+
+from antlr4.ParserRuleContext import ParserRuleContext
+
+class ProfileEntry:
+    """
+    Measures of the visits of a node, identified by its rule and source location.
+    """
+
+    __slots__ = ("rule", "line", "column", "count", "inclusive", "exclusive")
+
+    def __init__(self, rule: str, line: int, column: int):
+        self.rule = rule
+        self.line = line
+        self.column = column
+        self.count = 0          # Visits, or samples for a sampling profiler
+        self.inclusive = 0.0    # Seconds spent visiting the node, including the nodes it visits
+        self.exclusive = 0.0    # Seconds spent visiting the node itself
+
+class Profile:
+    """
+    Results of a profiler, per node and per stack of nodes, exported as a flat table or as collapsed stacks.
+
+    A profiler is attached to an interpreter by setting its profiler property. It then only measures the interpretation,
+    the time spent paused by a halt or between steps is not accounted for.
+    """
+
+    # Header of the count column in the flat table
+    COUNT = "visits"
+
+    def __init__(self):
+        self._interpreter = None
+        self._rule_names = []
+        self._entries = {}      # Entries by (rule index, line, column)
+        self._stacks = {}       # Exclusive seconds by tuple of (rule index, line, column), from the root
+
+    def attach(self, interpreter) -> None:
+        """
+        Start profiling an interpreter, called when setting Interpreter.profiler.
+        The interpreter methods entering the interpretation are wrapped, see _resume() and _pause().
+
+        :param interpreter: the interpreter to profile
+        """
+        if self._interpreter is not None:
+            raise Exception("Profiler already attached to an interpreter")
+        self._interpreter = interpreter
+        self._rule_names = interpreter.parser.rule_names
+
+        for name in ("_run", "_interpretation_step"):
+            setattr(interpreter, name, self._wrap(getattr(interpreter, name)))
+
+    def detach(self) -> None:
+        """
+        Stop profiling, the results are kept.
+        """
+        del self._interpreter._run
+        del self._interpreter._interpretation_step
+        self._interpreter = None
+
+    def start(self) -> None:
+        """
+        Called when the interpreter starts interpreting a program.
+        """
+        pass
+
+    def _wrap(self, method: Callable) -> Callable:
+        def wrapper():
+            self._resume()
+            try:
+                return method()
+            finally:
+                self._pause()
+        return wrapper
+
+    def _resume(self) -> None:
+        pass
+
+    def _pause(self) -> None:
+        pass
+
+    def _entry(self, key: tuple) -> ProfileEntry:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = ProfileEntry(self._label(key[0]), key[1], key[2])
+        return entry
+
+    def _label(self, rule: int) -> str:
+        return self._rule_names[rule] if 0 <= rule < len(self._rule_names) else str(rule)
+
+    def clear(self) -> None:
+        self._entries = {}
+        self._stacks = {}
+
+    def entries(self) -> list[ProfileEntry]:
+        """
+        :return: the entries, by decreasing exclusive time
+        """
+        return sorted(self._entries.values(), key=lambda entry: entry.exclusive, reverse=True)
+
+    def table(self) -> str:
+        """
+        :return: the entries as a flat table, by decreasing exclusive time
+        """
+        lines = ["{:<20} {:>10} {:>10} {:>14} {:>14}".format("rule", "location", self.COUNT, "inclusive (ms)", "self (ms)")]
+        for entry in self.entries():
+            lines.append("{:<20} {:>10} {:>10} {:>14.3f} {:>14.3f}".format(
+                entry.rule, str(entry.line) + ":" + str(entry.column), entry.count,
+                entry.inclusive * 1000, entry.exclusive * 1000
+            ))
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        """
+        :return: the stacks in the collapsed format of flame graph tools, one "rule@line:column;..." stack per line
+            followed by its exclusive time in microseconds
+        """
+        lines = []
+        for stack, exclusive in self._stacks.items():
+            microseconds = round(exclusive * 1000000)
+            if microseconds > 0:
+                frames = ";".join(self._label(key[0]) + "@" + str(key[1]) + ":" + str(key[2]) for key in stack)
+                lines.append(frames + " " + str(microseconds))
+        return "\n".join(lines)
+
+def _key(tree: ParserRuleContext) -> tuple:
+    return tree.getRuleIndex(), tree.start.line, tree.start.column
+
+class Profiler(Profile):
+    """
+    Instrumenting profiler, measuring every visit.
+
+    The dispatch table of the interpreter is replaced by functions timing the visit methods. The generators they return
+    are wrapped so that a visit ends when its generator stops, however the interpretation loop drives it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._frames = []       # Key, start, time spent in the visited nodes and stack of the visits in progress
+        self._active = {}       # Visits in progress by key, the inclusive time of recursive visits is counted once
+        self._offset = 0.0      # Time paused, subtracted from the clock
+        self._paused = perf_counter()
+        self._running = 0
+
+    def attach(self, interpreter) -> None:
+        super().attach(interpreter)
+        interpreter._dispatch = [self._instrument(function) for function in interpreter._dispatch_table()]
+
+    def detach(self) -> None:
+        self._interpreter._dispatch = self._interpreter._dispatch_table()
+        super().detach()
+
+    def start(self) -> None:
+        self._frames = []
+        self._active = {}
+
+    def _resume(self) -> None:
+        if self._running == 0:
+            self._offset += perf_counter() - self._paused
+        self._running += 1
+
+    def _pause(self) -> None:
+        self._running -= 1
+        if self._running == 0:
+            self._paused = perf_counter()
+
+    def _clock(self) -> float:
+        return perf_counter() - self._offset
+
+    def _instrument(self, function: Callable) -> Callable:
+        def profiled(tree):
+            self._enter(_key(tree))
+            result = function(tree)
+            if type(result) is GeneratorType or isinstance(result, Generator):
+                return self._profile(result)
+            self._exit()
+            return result
+        return profiled
+
+    def _profile(self, generator: Generator) -> Generator:
+        yield from generator
+        self._exit()
+
+    def _enter(self, key: tuple) -> None:
+        stack = self._frames[-1][3] + (key,) if self._frames else (key,)
+        self._frames.append([key, self._clock(), 0.0, stack])
+        self._active[key] = self._active.get(key, 0) + 1
+
+    def _exit(self) -> None:
+        key, start, children, stack = self._frames.pop()
+        elapsed = self._clock() - start
+
+        entry = self._entry(key)
+        entry.count += 1
+        entry.exclusive += elapsed - children
+        self._active[key] -= 1
+        if self._active[key] == 0:
+            entry.inclusive += elapsed
+
+        if self._frames:
+            self._frames[-1][2] += elapsed
+        self._stacks[stack] = self._stacks.get(stack, 0.0) + elapsed - children
+
+class SamplingProfiler(Profile):
+    """
+    Sampling profiler, recording the stack of visits at regular intervals from a background thread.
+
+    The stack of visits is made of the generators of the interpretation stack, and of the generators a fast run drives
+    on the Python stack of the interpreting thread. The node of a generator is the argument following self of its visit
+    method. Times are estimated from the number of samples, the count of an entry is its number of samples.
+    """
+
+    COUNT = "samples"
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Constructor.
+
+        :param interval: seconds between two samples
+        """
+        super().__init__()
+        self._interval = interval
+        self._thread_id = None
+        self._running = 0
+        self._stopped = Event()
+        self._sampler = None
+
+    def attach(self, interpreter) -> None:
+        super().attach(interpreter)
+        self._stopped.clear()
+        self._sampler = Thread(target=self._sample_loop, daemon=True)
+        self._sampler.start()
+
+    def detach(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+        self._sampler = None
+        super().detach()
+
+    def _resume(self) -> None:
+        self._thread_id = get_ident()
+        self._running += 1
+
+    def _pause(self) -> None:
+        self._running -= 1
+
+    def _sample_loop(self) -> None:
+        while not self._stopped.wait(self._interval):
+            if self._running > 0:
+                self._sample()
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return
+
+        # Generators waiting on the interpretation stack, from the root
+        frames = [item.gi_frame for item in list(self._interpreter._interpretation_stack)
+                  if type(item) is GeneratorType and item.gi_frame is not None]
+
+        # Generators on the Python stack, not on the interpretation stack during a fast run: the running ones, and the
+        # ones driven by Interpreter._resume(), suspended while their items are interpreted
+        seen = set(map(id, frames))
+        running = []
+        while frame is not None:
+            generator = frame
+            if frame.f_code.co_qualname == "Interpreter._resume":
+                driven = frame.f_locals.get("generator")
+                generator = driven.gi_frame if type(driven) is GeneratorType and not driven.gi_running else None
+            elif not frame.f_code.co_flags & CO_GENERATOR:
+                generator = None
+            if generator is not None and id(generator) not in seen:
+                seen.add(id(generator))
+                running.append(generator)
+            frame = frame.f_back
+        frames.extend(reversed(running))
+
+        stack = []
+        for frame in frames:
+            code = frame.f_code
+            if code.co_argcount >= 2:
+                tree = frame.f_locals.get(code.co_varnames[1])
+                if isinstance(tree, ParserRuleContext):
+                    key = _key(tree)
+                    if not stack or stack[-1] != key:
+                        stack.append(key)
+        if not stack:
+            return
+
+        stack = tuple(stack)
+        for key in set(stack):
+            entry = self._entry(key)
+            entry.count += 1
+            entry.inclusive += self._interval
+        self._entry(stack[-1]).exclusive += self._interval
+        self._stacks[stack] = self._stacks.get(stack, 0.0) + self._interval
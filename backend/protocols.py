@@ -1,30 +1,125 @@
+from socketserver import ThreadingMixIn
+from typing import Callable
+
 from jsonrpclib.SimpleJSONRPCServer import SimpleJSONRPCServer
-from backend.interpreter import Interpreter
+
+class ThreadingJSONRPCServer(ThreadingMixIn, SimpleJSONRPCServer):
+    """
+    JSON-RPC server handling each request on its own thread, so that a halt request gets through while another request
+    waits for the worker thread of an interpreter, e.g. a step, and so that the sessions are served concurrently.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024  # Connections waiting to be accepted, many clients connect at once
+
+    def __init__(self, address: tuple[str, int], service: Callable[[], object] | None = None, **kwargs):
+        """
+        Constructor.
+
+        :param address: the host and port to listen on, port 0 for any free port
+        :param service: a callable run periodically by the serving loop, e.g. to evict the idle sessions
+        """
+        super().__init__(address, **kwargs)
+        self._service = service
+
+    def service_actions(self) -> None:
+        super().service_actions()
+        if self._service is not None:
+            self._service()
+
+class SessionProtocol:
+    """
+    Sessions of the clients, see backend/lipvm.py. The other protocols take the id of the session as first parameter.
+    """
+
+    def __init__(self, sessions, server: SimpleJSONRPCServer):
+        self._sessions = sessions
+
+        server.register_function(self.createSession)
+        server.register_function(self.closeSession)
+
+    def createSession(self, language: str) -> str:
+        return self._sessions.create(language)
+
+    def closeSession(self, session: str) -> None:
+        self._sessions.close(session)
 
 class LanguageExecutionServerProtocol:
+    """
+    Execution of programs. The programs run on the worker thread of the interpreter of the session, execute returns
+    right away.
+    """
 
-    def __init__(self, interpreter: Interpreter, server: SimpleJSONRPCServer):
-        self._interpreter = interpreter
+    def __init__(self, sessions, server: SimpleJSONRPCServer):
+        self._sessions = sessions
 
         server.register_function(self.execute)
 
-    def execute(self, code: str) -> None:
-        self._interpreter.async_interpret(code)
+    def execute(self, session: str, code: str) -> None:
+        self._sessions.interpreter(session).async_interpret(code)
 
 class DebugAdapterProtocol:
+    """
+    Control of the execution of programs. The commands run on the worker thread of the interpreter of the session, one
+    after the other: proceed returns right away, the steps and the changes of breakpoints and watchpoints return once
+    run. halt takes effect before the next visit of the program.
+    """
 
-    def __init__(self, interpreter: Interpreter, server: SimpleJSONRPCServer):
-        self._interpreter = interpreter
+    def __init__(self, sessions, server: SimpleJSONRPCServer):
+        self._sessions = sessions
 
         server.register_function(self.halt)
         server.register_function(self.proceed)
         server.register_function(self.step)
+        server.register_function(self.runUntil)
+        server.register_function(self.runFor)
+        server.register_function(self.setBreakpoints)
+        server.register_function(self.setWatchpoints)
+        server.register_function(self.changesSince)
+
+    def halt(self, session: str) -> None:
+        self._sessions.interpreter(session).halt()
+
+    def proceed(self, session: str) -> None:
+        self._sessions.interpreter(session).async_proceed()
+
+    def step(self, session: str, count: int = 1) -> str:
+        return self._sessions.interpreter(session).async_step(count).result().value
+
+    def runUntil(self, session: str, expression: str, count: int | None = None) -> str:
+        interpreter = self._sessions.interpreter(session)
+        return interpreter.async_run_until(interpreter.condition(expression), count).result().value
+
+    def runFor(self, session: str, milliseconds: float) -> str:
+        return self._sessions.interpreter(session).async_run_for(milliseconds).result().value
+
+    def setBreakpoints(self, session: str, lines: list[int], conditions: list[str | None] | None = None) -> list[int]:
+        return self._sessions.interpreter(session).async_set_breakpoints(lines, conditions).result()
 
-    def halt(self) -> None:
-        self._interpreter.halt()
+    def setWatchpoints(self, session: str, names: list[str], conditions: list[str | None] | None = None) -> None:
+        self._sessions.interpreter(session).async_set_watchpoints(names, conditions).result()
 
-    def proceed(self) -> None:
-        self._interpreter.async_proceed()
+    def changesSince(self, session: str, version: int) -> dict:
+        """
+        :param session: the id of the session
+        :param version: the version of the environment last seen by the client
+        :return: the current version and the changes since the given one, None as changes if the client must read the
+            whole environment again, or if no journal is enabled
+        """
+        journal = self._sessions.interpreter(session).journal
+        if journal is None:
+            return {"version": 0, "changes": None}
+        changes = journal.changes_since(version)
+        return {
+            "version": journal.version,
+            "changes": None if changes is None else [_serializable(change.to_dict()) for change in changes]
+        }
 
-    def step(self) -> None:
-        self._interpreter.async_step()
\ No newline at end of file
+def _serializable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_serializable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _serializable(item) for key, item in value.items()}
+    return repr(value)
@@ -0,0 +1,47 @@
+class Scope:
+    """
+    Copy-on-write scope of variables.
+
+    A scope opened from another one shares its variables until its first assignment, which copies them. Opening a scope
+    is therefore constant time, and the scopes which only read the variables of their parent, e.g. most of the for loops
+    and the calls of functions without parameters, never copy them.
+    Assignments never modify the variables of the enclosing scopes, as with a copy of their variables.
+    A scope must not be assigned to while a scope opened from it is in use, as with nested calls and loops.
+
+    Example:
+
+    - scope = Scope(parent)
+    - scope["x"] = 1
+    - "x" in scope, scope["x"]
+    """
+
+    __slots__ = ("_variables", "_shared")
+
+    def __init__(self, parent: Scope | None = None):
+        if parent is None:
+            self._variables = {}
+            self._shared = False
+        else:
+            self._variables = parent._variables
+            self._shared = True
+
+    def __getitem__(self, name: str):
+        return self._variables[name]
+
+    def __setitem__(self, name: str, value) -> None:
+        if self._shared:
+            self._variables = self._variables.copy()
+            self._shared = False
+        self._variables[name] = value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._variables
+
+    def get(self, name: str, default=None):
+        return self._variables.get(name, default)
+
+    def variables(self) -> dict:
+        """
+        :return: a copy of the variables visible from this scope, by name
+        """
+        return self._variables.copy()
@@ -0,0 +1,2 @@
+# Version of LipVM, as in pyproject.toml, part of the keys of the caches on disk
+VERSION = "0.1.0"
@@ -0,0 +1,58 @@
+from typing import Callable
+
+class Watchpoints:
+    """
+    Data breakpoints of an interpreter, pausing the interpretation when a watched name is written.
+
+    The names are watched both as attributes of the environment and as variables of the program:
+
+    - The writes of the attributes are observed like the ones recorded by a journal, see backend/journal.py: the class
+      of the environment is swapped for a recording one while there are watchpoints.
+    - The writes of the variables are reported by the interpreter subclasses through written().
+
+    Watchpoints are only checked on the writes of the watched names. When one fires, the interpreter halts before the
+    next visit, at the same place in fast run and in the interpretation loop.
+    """
+
+    __slots__ = ("_interpreter", "_conditions", "hit")
+
+    def __init__(self, interpreter, conditions: dict[str, Callable[..., bool] | None]):
+        """
+        Constructor.
+
+        :param interpreter: the interpreter to halt
+        :param conditions: the condition of each watched name, None for unconditional watchpoints
+        """
+        self._interpreter = interpreter
+        self._conditions = conditions
+        self.hit = None  # Name of the last watchpoint fired
+
+    def record(self, kind: str, name: str, key, value) -> None:
+        """
+        Check a write of an attribute of the environment, with the signature of Journal.record().
+        """
+        if name in self._conditions:
+            self._check(name, None)
+
+    def written(self, name: str, value) -> None:
+        """
+        Check a write of a variable of the program.
+        """
+        if name in self._conditions:
+            self._check(name, {name: value})
+
+    def _check(self, name: str, variables: dict | None) -> None:
+        condition = self._conditions[name]
+        if condition is not None and not condition(variables):
+            return
+        self.hit = name
+        self._interpreter.suspend()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._conditions
+
+    def __len__(self) -> int:
+        return len(self._conditions)
+
+    def names(self) -> list[str]:
+        return list(self._conditions)
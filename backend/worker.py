@@ -0,0 +1,60 @@
+from concurrent.futures import Future
+from queue import SimpleQueue
+from threading import Thread
+from typing import Callable
+
+class Worker:
+    """
+    Thread running commands one after the other, in the order they are submitted, e.g. the interpretations of a program
+    sent to a server, so that the thread of the server handles the next requests while the program runs.
+
+    Example:
+
+    - worker = Worker("interpreter")
+    - future = worker.submit(interpreter.interpret, code)
+    - future.result()
+    - worker.close()
+    """
+
+    def __init__(self, name: str):
+        """
+        Constructor.
+
+        :param name: the name of the thread
+        """
+        self._commands = SimpleQueue()  # Future, command and arguments, None to stop
+        self._thread = Thread(target=self._work, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, command: Callable, *arguments) -> Future:
+        """
+        :param command: the callable to run on the thread
+        :param arguments: the arguments to call it with
+        :return: the future of the command, holding its result or its exception once run
+        """
+        future = Future()
+        self._commands.put((future, command, arguments))
+        return future
+
+    def close(self) -> None:
+        """
+        Stop the thread once the commands submitted so far are run.
+        """
+        self._commands.put(None)
+
+    def _work(self) -> None:
+        while True:
+            entry = self._commands.get()
+            if entry is None:
+                return
+            future, command, arguments = entry
+            if not future.set_running_or_notify_cancel():  # Cancelled before it ran
+                continue
+            try:
+                future.set_result(command(*arguments))
+            except BaseException as error:
+                future.set_exception(error)
+
+    @property
+    def thread(self) -> Thread:
+        return self._thread
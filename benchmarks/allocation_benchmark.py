@@ -0,0 +1,75 @@
+"""
+Memory allocated by the interpretation loop, per step, measured with tracemalloc snapshots.
+
+The program halts first, then it is interpreted one step at a time, with a snapshot after each step. The snapshots
+only count the blocks allocated by the files of LipVM and of the languages: the blocks alive at each step boundary,
+and the ones a step left alive compared to the previous boundary, e.g. the Visit objects and generators held by the
+interpretation stack. Run it on two revisions to compare them, it only relies on the public API of LipVM.
+
+Usage: python -m benchmarks.allocation_benchmark [grid size]
+"""
+import os
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from sys import argv
+
+from backend.interpreter import StopReason
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+ROOT = Path(__file__).parent.parent
+
+# Blocks counted by the snapshots, the ones allocated by the benchmark and tracemalloc itself are left out
+FILTERS = [
+    tracemalloc.Filter(True, str(ROOT / "backend" / "*")),
+    tracemalloc.Filter(True, str(ROOT / "languages" / "*")),
+]
+
+def measure(snapshot: tracemalloc.Snapshot) -> tuple[int, int]:
+    """
+    :return: the number of blocks and bytes of a snapshot
+    """
+    statistics = snapshot.statistics("filename")
+    return sum(statistic.count for statistic in statistics), sum(statistic.size for statistic in statistics)
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 5  # A snapshot per step, the steps grow with the square
+    code = "halt()\n" + grid_program(size, size)
+    vm = LipVM("languages.minilogo")
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    alive = []  # Blocks and bytes at each step boundary
+    added = []  # Blocks and bytes left alive by each step
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        tracemalloc.start()
+        vm.interpreter.interpret(code)
+        previous = tracemalloc.take_snapshot().filter_traces(FILTERS)
+        reason = None
+        while reason != StopReason.END:
+            reason = vm.interpreter.step(1)
+            snapshot = tracemalloc.take_snapshot().filter_traces(FILTERS)
+            alive.append(measure(snapshot))
+            differences = snapshot.compare_to(previous, "filename")
+            added.append((
+                sum(max(difference.count_diff, 0) for difference in differences),
+                sum(max(difference.size_diff, 0) for difference in differences),
+            ))
+            previous = snapshot
+        tracemalloc.stop()
+
+    steps = len(alive)
+    lines = len(vm.interpreter.environment.lines)
+    print("Grid " + str(size) + "x" + str(size) + ": " + str(lines) + " lines, " + str(steps) + " steps")
+    print("alive per step: {:>10.1f} blocks, {:>12,.0f} B on average, {:>8,} blocks, {:>10,} B at most".format(
+        sum(blocks for blocks, _ in alive) / steps, sum(size for _, size in alive) / steps,
+        max(blocks for blocks, _ in alive), max(size for _, size in alive)
+    ))
+    print("added per step: {:>10.1f} blocks, {:>12,.0f} B on average, {:>8,} blocks, {:>10,} B at most".format(
+        sum(blocks for blocks, _ in added) / steps, sum(size for _, size in added) / steps,
+        max(blocks for blocks, _ in added), max(size for _, size in added)
+    ))
+
+if __name__ == '__main__':
+    main(argv)
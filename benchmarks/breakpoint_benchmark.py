@@ -0,0 +1,47 @@
+"""
+Stepping speed of the interpretation loop with and without breakpoints set, on lines which are never reached.
+
+Usage: python -m benchmarks.breakpoint_benchmark [grid size] [breakpoints]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def measure(vm: LipVM, code: str, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret("halt()\n" + code)
+        vm.interpreter.step(10 ** 9)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 30
+    count = int(arguments[2]) if len(arguments) > 2 else 500
+
+    # Functions never called, one breakpoint on the body of each
+    code = "".join("def unused" + str(i) + "() {\n    move(" + str(i) + ", 0)\n}\n" for i in range(count))
+    code += grid_program(size, size)
+    lines = [3 * i + 3 for i in range(count)]  # Shifted by the halt command
+
+    vm = LipVM("languages.minilogo")
+    tree = vm.interpreter.parser.parse("halt()\n" + code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    without = measure(vm, code)
+    steps = len(vm.interpreter.environment.lines)
+
+    assert len(vm.interpreter.set_breakpoints(lines)) == count
+    with_breakpoints = measure(vm, code)
+    assert len(vm.interpreter.environment.lines) == steps
+
+    print("Grid " + str(size) + "x" + str(size) + ", stepping to the end")
+    print("no breakpoint:      {:>8.3f} s".format(without))
+    print(str(count) + " breakpoints:    {:>8.3f} s ({:.2f}x)".format(with_breakpoints, without / with_breakpoints))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,47 @@
+"""
+Throughput of the minilogo closure compiler against the visit methods, on a halt-free program.
+
+Usage: python -m benchmarks.compiler_benchmark [grid size]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def measure(vm: LipVM, code: str, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 30
+    code = grid_program(size, size)
+    vm = LipVM("languages.minilogo")
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    vm.interpreter.fast_run = False
+    trampoline = measure(vm, code)
+    lines = vm.interpreter.environment.lines
+
+    vm.interpreter.fast_run = True
+    vm.interpreter.compilation = False
+    fast = measure(vm, code)
+    assert vm.interpreter.environment.lines == lines
+
+    vm.interpreter.compilation = True
+    compiled = measure(vm, code)
+    assert vm.interpreter.environment.lines == lines
+
+    print("Grid " + str(size) + "x" + str(size) + ": " + str(len(lines)) + " lines")
+    print("trampoline: {:>8.3f} s".format(trampoline))
+    print("fast run:   {:>8.3f} s".format(fast))
+    print("compiled:   {:>8.3f} s ({:.1f}x)".format(compiled, trampoline / compiled))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,65 @@
+"""
+Latency of the first parse of a program in a new process, with empty prediction DFAs, after a warm-up, and with the
+DFAs saved by a previous process loaded, against the steady state. Each case runs in a subprocess.
+
+Usage: python -m benchmarks.dfa_benchmark [lines]
+"""
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from backend.parser import Parser
+from benchmarks.parser_benchmark import minilogo_program
+
+def child(lines: int, mode: str, directory: str):
+    parser = Parser("languages.minilogo", cache=False)
+    code = minilogo_program(lines)
+
+    start = perf_counter()
+    if mode == "save":
+        parser.warm_up()
+        parser.save_dfa(directory)
+    elif mode == "warm":
+        parser.warm_up()
+    elif mode == "loaded" and not parser.load_dfa(directory):
+        raise Exception("No DFAs saved in " + directory)
+    startup = perf_counter() - start
+
+    start = perf_counter()
+    parser.parse(code)
+    first = perf_counter() - start
+
+    steady = None
+    for _ in range(5):
+        start = perf_counter()
+        parser.parse(code)
+        elapsed = perf_counter() - start
+        steady = elapsed if steady is None else min(steady, elapsed)
+
+    print(startup, first, steady)
+
+def run(lines: int, mode: str, directory: str) -> list[float]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.dfa_benchmark", str(lines), mode, directory],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return [float(value) * 1000 for value in output.split()]
+
+def main(arguments: list):
+    lines = int(arguments[1]) if len(arguments) > 1 else 200
+    if len(arguments) > 3:
+        child(lines, arguments[2], arguments[3])
+        return
+
+    print("minilogo, " + str(lines) + " lines")
+    with TemporaryDirectory() as directory:
+        run(lines, "save", directory)
+        for mode in ("cold", "warm", "loaded"):
+            startup, first, steady = run(lines, mode, directory)
+            print(mode + ": startup {:>8.2f} ms, first parse {:>8.2f} ms, steady state {:>8.2f} ms ({:.2f}x)".format(
+                startup, first, steady, first / steady
+            ))
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,56 @@
+"""
+Visits per second of the interpretation loop, with and without the per-rule dispatch table.
+
+Usage: python -m benchmarks.dispatch_benchmark [grid size]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def count_visits(vm: LipVM, code: str) -> int:
+    interpreter = vm.interpreter
+    counter = [0]
+    visit = interpreter.visit
+
+    def counting_visit(tree):
+        counter[0] += 1
+        return visit(tree)
+
+    interpreter.visit = counting_visit
+    interpreter.interpret(code)
+    del interpreter.visit
+    return counter[0] + 1  # The root visit is made by interpret()
+
+def measure(vm: LipVM, code: str, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 30
+    code = grid_program(size, size)
+    vm = LipVM("languages.minilogo")
+    visits = count_visits(vm, code)
+
+    # Dispatch through ParserRuleContext.accept(), as before the dispatch table
+    interpreter = vm.interpreter
+    table = interpreter._dispatch
+    interpreter._dispatch = [lambda tree: tree.accept(interpreter)] * len(table)
+    before = measure(vm, code)
+
+    interpreter._dispatch = table
+    after = measure(vm, code)
+
+    print("Grid " + str(size) + "x" + str(size) + ": " + str(visits) + " visits")
+    print("accept():       {:>12,.0f} visits/s".format(visits / before))
+    print("dispatch table: {:>12,.0f} visits/s".format(visits / after))
+    print("speedup:        {:>12.2f}x".format(before / after))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,50 @@
+"""
+Reparse time of single character edits in a large program, incremental or full.
+
+Usage: python -m benchmarks.document_benchmark [lines]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.document import Document
+from backend.parser import Parser
+
+def main(arguments: list):
+    count = int(arguments[1]) if len(arguments) > 1 else 50000
+    lines = ["def square" + str(i) + "(s) {\n    move(s, 0)\n    move(s, s)\n}\n" for i in range(count // 8)]
+    lines += ["for i = 0 to 10 {\n    square" + str(i) + "(i * 2)\n    x = i + " + str(i) + "\n}\n" for i in range(count // 8)]
+    code = "pen(down)\n" + "".join(lines)
+
+    parser = Parser("languages.minilogo", cache=False)
+    start = perf_counter()
+    document = Document(parser, code)
+    full = perf_counter() - start
+
+    # Type a number in the middle of the program, then delete it
+    offset = code.index("x = i", len(code) // 2) + len("x = i + ")
+    edits = [(offset + k, offset + k, "7") for k in range(20)] + [(offset, offset + 1, "") for _ in range(20)]
+    times = []
+    for start_offset, end_offset, text in edits:
+        start = perf_counter()
+        assert document.edit(start_offset, end_offset, text)
+        times.append(perf_counter() - start)
+
+    # A newline moves the lines of all the following tokens, once the tree is read
+    start = perf_counter()
+    assert document.edit(offset, offset, "\n")
+    newline = perf_counter() - start
+    start = perf_counter()
+    document.tree
+    read = perf_counter() - start
+    assert document.code == code[:offset] + "\n" + code[offset:]
+
+    times.sort()
+    print(str(code.count("\n")) + " lines")
+    print("full parse:           {:>10.3f} ms".format(full * 1000))
+    print("edit, median:         {:>10.3f} ms".format(times[len(times) // 2] * 1000))
+    print("edit, max:            {:>10.3f} ms".format(times[-1] * 1000))
+    print("newline edit:         {:>10.3f} ms".format(newline * 1000))
+    print("tree read after it:   {:>10.3f} ms".format(read * 1000))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,45 @@
+"""
+Throughput of the minilogo engines with a declared, slotted environment against the dynamic Environment.
+
+Usage: python -m benchmarks.environment_benchmark [grid size]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.environment import Environment
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def measure(vm: LipVM, code: str, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 60
+    code = grid_program(size, size)
+
+    print("Grid " + str(size) + "x" + str(size))
+    for name, engine, compilation in (("visit methods", "interpreter", False), ("closures", "interpreter", True),
+                                      ("transpiled", "transpiler", True)):
+        vm = LipVM("languages.minilogo", engine)
+        vm.interpreter.compilation = compilation
+        tree = vm.interpreter.parser.parse(code)
+        vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+        declared = measure(vm, code)
+        lines = vm.interpreter.environment.lines
+
+        vm.interpreter.declare = lambda: None
+        vm.interpreter._environment_class = Environment
+        dynamic = measure(vm, code)
+        assert vm.interpreter.environment.lines == lines
+
+        print("{:<14} dynamic {:>8.3f} s, declared {:>8.3f} s ({:.2f}x)".format(name, dynamic, declared, dynamic / declared))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,39 @@
+"""
+Time and memory of deep minilogo recursions, stopped by the maximum depth of the frame stack.
+The second interpretation reuses the frames of the first one.
+
+Usage: python -m benchmarks.frame_benchmark [depth]
+"""
+import tracemalloc
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+
+def main(arguments: list):
+    depth = int(arguments[1]) if len(arguments) > 1 else 10000
+    code = "def f(n) { move(n, n) f(n + 1) }"
+    code += "f(0)"
+
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.max_depth = depth
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    print("Recursion up to " + str(depth) + " frames")
+    for run in ("first", "second"):
+        tracemalloc.start()
+        start = perf_counter()
+        try:
+            vm.interpreter.interpret(code)
+        except Exception as exception:
+            message = str(exception)
+        elapsed = perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{:<6} run: {:>8.3f} s, traced peak {:>12,} B, retained {:>12,} B ({})".format(
+            run, elapsed, peak, current, message
+        ))
+
+if __name__ == '__main__':
+    main(argv)
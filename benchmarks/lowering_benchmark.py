@@ -0,0 +1,50 @@
+"""
+Memory retained per source line by the trees of large generated programs, as parsed by ANTLR and once lowered into lean
+trees, measured with tracemalloc, along with the time taken to parse and lower them.
+
+Usage: python -m benchmarks.lowering_benchmark [lines]
+"""
+import gc
+import tracemalloc
+from sys import argv
+from time import perf_counter
+
+from backend.parser import Parser
+from benchmarks.parser_benchmark import minilogo_program, statemachine_program
+
+def measure(parser: Parser, code: str) -> tuple[int, float]:
+    """
+    :return: the memory retained by the tree of the code, and the time taken to parse it
+    """
+    parser.parse(code)  # Warm up
+    start = perf_counter()
+    parser.parse(code)
+    elapsed = perf_counter() - start
+    gc.collect()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tree = parser.parse(code)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del tree
+    return after - before, elapsed
+
+def main(arguments: list):
+    lines = int(arguments[1]) if len(arguments) > 1 else 10000
+    for language, program in (("minilogo", minilogo_program), ("statemachine", statemachine_program)):
+        code = program(lines)
+        count = code.count("\n")
+        full, full_time = measure(Parser("languages." + language, cache=False, lean=False), code)
+        lean, lean_time = measure(Parser("languages." + language, cache=False), code)
+
+        print(language + ", " + str(count) + " lines")
+        print("ANTLR tree: {:>8.0f} B/line, parsed in {:>7.3f} s".format(full / count, full_time))
+        print("lean tree:  {:>8.0f} B/line, parsed in {:>7.3f} s ({:.1f}x smaller)".format(
+            lean / count, lean_time, full / lean
+        ))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,37 @@
+"""
+Interpretation of an unchanged program run again, with and without the parse cache.
+
+Usage: python -m benchmarks.parse_benchmark [lines]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+
+def measure(vm: LipVM, code: str, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    count = int(arguments[1]) if len(arguments) > 1 else 10000
+    code = "pen(down)\n" + "".join("move(" + str(i) + ", " + str(i % 7) + ")\n" for i in range(count))
+
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.parser.cache.clear()
+    start = perf_counter()
+    vm.interpreter.interpret(code)
+    first = perf_counter() - start
+    cached = measure(vm, code)
+
+    print(str(count) + " lines")
+    print("first run:      {:>8.3f} s".format(first))
+    print("run again:      {:>8.3f} s ({:.2f}x)".format(cached, first / cached))
+    print("hits / misses:  {} / {}".format(vm.interpreter.parser.cache.hits, vm.interpreter.parser.cache.misses))
+
+if __name__ == '__main__':
+    main(argv)
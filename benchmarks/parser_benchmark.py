@@ -0,0 +1,61 @@
+"""
+Parse throughput of large generated minilogo and statemachine programs, with LL prediction only and in two stages.
+
+Usage: python -m benchmarks.parser_benchmark [lines]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.parser import Parser
+
+def minilogo_program(lines: int) -> str:
+    code = ["pen(down)\n"]
+    for i in range(lines // 6):
+        code.append("def shape" + str(i) + "(a, b) {\n")
+        code.append("    move(a * 2 + b, (b - " + str(i) + ") / 3)\n")
+        code.append("    for j = 0 to a { move(j, b + j * " + str(i % 9) + ") color(#FF00AA) }\n")
+        code.append("}\n")
+        code.append("x = " + str(i) + " + (x * 2) - 1\n")
+        code.append("shape" + str(i) + "(x, " + str(i) + ")\n")
+    return "".join(code)
+
+def statemachine_program(lines: int) -> str:
+    count = lines // 9
+    code = ["statemachine Generated\n", "events " + " ".join("e" + str(i) for i in range(10)) + "\n"]
+    code.append("initialState S0\n")
+    for i in range(count):
+        code.append("state S" + str(i) + "\n")
+        code.append("    e" + str(i % 10) + " => S" + str((i + 1) % count) + "\n")
+        code.append("    e" + str((i + 1) % 10) + " => S" + str((i + 7) % count) + "\n")
+        code.append("    activate: {\n")
+        code.append("        speed = " + str(i) + " * (speed + 2)\n")
+        code.append("        for k = 0 to speed { log(\"S" + str(i) + "\", k + 1) }\n")
+        code.append("        send(e" + str(i % 10) + ")\n")
+        code.append("    }\n")
+        code.append("end\n")
+    return "".join(code)
+
+def measure(parser: Parser, code: str, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        parser.parse(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    lines = int(arguments[1]) if len(arguments) > 1 else 5000
+
+    for module, program in (("languages.minilogo", minilogo_program), ("languages.statemachine", statemachine_program)):
+        code = program(lines)
+        ll = measure(Parser(module, cache=False, two_stage=False), code)
+        two_stage = measure(Parser(module, cache=False), code)
+
+        count = code.count("\n")
+        print(module + ", " + str(count) + " lines")
+        print("LL:         {:>8.3f} s ({:>8.0f} lines/s)".format(ll, count / ll))
+        print("SLL -> LL:  {:>8.3f} s ({:>8.0f} lines/s, {:.2f}x)".format(two_stage, count / two_stage, ll / two_stage))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,49 @@
+"""
+Overhead of the instrumenting and sampling profilers on the interpretation of a halt-free program.
+
+Usage: python -m benchmarks.profiler_benchmark [grid size] [sampling interval in ms]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+from backend.profiler import Profiler, SamplingProfiler
+from benchmarks.programs import grid_program
+
+def measure(vm: LipVM, code: str, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 30
+    interval = float(arguments[2]) / 1000 if len(arguments) > 2 else 0.005
+    code = grid_program(size, size)
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.compilation = False  # Profiling interprets with the visit methods
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    baseline = measure(vm, code)
+    lines = vm.interpreter.environment.lines
+
+    vm.interpreter.profiler = SamplingProfiler(interval)
+    sampling = measure(vm, code)
+    assert vm.interpreter.environment.lines == lines
+
+    vm.interpreter.profiler = Profiler()
+    instrumenting = measure(vm, code)
+    assert vm.interpreter.environment.lines == lines
+    vm.interpreter.profiler = None
+
+    print("Grid " + str(size) + "x" + str(size) + ": " + str(len(lines)) + " lines")
+    print("no profiler:   {:>8.3f} s".format(baseline))
+    print("sampling:      {:>8.3f} s ({:+.1%})".format(sampling, sampling / baseline - 1))
+    print("instrumenting: {:>8.3f} s ({:+.1%})".format(instrumenting, instrumenting / baseline - 1))
+
+if __name__ == '__main__':
+    main(argv)
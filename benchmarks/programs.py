@@ -0,0 +1,29 @@
+from pathlib import Path
+
+EXAMPLES = Path(__file__).parent.parent / "languages" / "minilogo" / "examples"
+
+def grid_program(n: int, m: int) -> str:
+    """
+    Scale up the grid example of minilogo.
+
+    :param n: number of squares on the x axis
+    :param m: number of squares on the y axis
+    :return: the code of grid_example_with_function.logo drawing a n x m grid
+    """
+    code = (EXAMPLES / "grid_example_with_function.logo").read_text()
+    return code.replace("grid(100, 100, 10, 10, 20)", "grid(100, 100, " + str(n) + ", " + str(m) + ", 20)")
+
+def statements_program(lines: int) -> str:
+    """
+    A long flat minilogo program, as generated by tools: a function, then statements calling it, the pen staying up so
+    that the interpretation does not accumulate lines.
+
+    :param lines: the approximate number of lines of the program
+    :return: the code of the program, starting with a halt command
+    """
+    code = ["halt()\n", "def step(x, y) {\n", "    move(x, y)\n", "    move(x + 1, (y * 2) - x)\n", "}\n"]
+    for i in range(lines // 3):
+        code.append("x = " + str(i % 1000) + " * 3\n")
+        code.append("move(x, " + str(i) + ")\n")
+        code.append("step(x, " + str(i) + ")\n")
+    return "".join(code)
@@ -0,0 +1,65 @@
+"""
+Time and allocations of the closures opened by minilogo calls and for loops, deep copied or as currently opened.
+Global variables can be added to the program, to grow the scopes to copy: the current closures only save the variables
+they write, so they do not depend on them.
+
+Usage: python -m benchmarks.scope_benchmark [grid size] [global variables]
+"""
+import tracemalloc
+from copy import deepcopy
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def deepcopy_closures(interpreter):
+    # Closures as opened before the copy-on-write scopes and the frames of slots, saving every variable
+    def open_closure(scope):
+        interpreter.environment.frames.push().variables = deepcopy(interpreter.environment.variables)
+
+    def close_closure(scope):
+        interpreter.environment.variables[:] = interpreter.environment.frames.top.variables
+        interpreter.environment.frames.pop()
+    return open_closure, close_closure
+
+def measure(vm: LipVM, code: str, repeat: int = 3) -> tuple[float, float]:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Every allocation is recorded by tracemalloc, its overhead grows with the number of allocations
+    tracemalloc.start()
+    start = perf_counter()
+    vm.interpreter.interpret(code)
+    traced = perf_counter() - start
+    tracemalloc.stop()
+    return best, traced - best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 100
+    variables = int(arguments[2]) if len(arguments) > 2 else 0
+    code = "".join("v" + str(i) + " = " + str(i) + "\n" for i in range(variables)) + grid_program(size, size)
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.compilation = False  # Closures are opened by the visit methods
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    vm.interpreter._open_closure, vm.interpreter._close_closure = deepcopy_closures(vm.interpreter)
+    copying, copying_tracing = measure(vm, code)
+    lines = vm.interpreter.environment.lines
+
+    del vm.interpreter._open_closure, vm.interpreter._close_closure
+    current, current_tracing = measure(vm, code)
+    assert vm.interpreter.environment.lines == lines
+
+    print("Grid " + str(size) + "x" + str(size) + ", " + str(variables) + " globals: " + str(size * size) + " calls")
+    print("deepcopy:      {:>8.3f} s, tracing overhead {:>8.3f} s".format(copying, copying_tracing))
+    print("current:       {:>8.3f} s, tracing overhead {:>8.3f} s".format(current, current_tracing))
+    print("speedup:       {:>8.2f}x".format(copying / current))
+
+if __name__ == '__main__':
+    main(argv)
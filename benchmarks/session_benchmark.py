@@ -0,0 +1,124 @@
+"""
+Load test of a LipVM server: concurrent clients, each with its own session, executing a program which halts, stepping
+it, then proceeding to its end, against one server process. Reports the latency of each request and the memory of the
+server.
+
+Usage: python -m benchmarks.session_benchmark [sessions]
+"""
+import socket
+import subprocess
+import sys
+from pathlib import Path
+from threading import Barrier, Thread
+from time import perf_counter, sleep
+
+from jsonrpclib import Server
+
+from backend.lipvm import LipVM
+
+# Requests sent by each client, in order
+REQUESTS = ("createSession", "execute", "step", "proceed", "end", "closeSession")
+
+def program(i: int) -> str:
+    return "halt()\npen(down)\nfor j = 0 to 50 {\n    move(j * " + str(i % 10) + ", j + 1)\n}\n"
+
+def serve(port: int, sessions: int):
+    LipVM("languages.minilogo").serve(port, dfa_directory=None, max_sessions=sessions, log_requests=False)
+
+def client(port: int, i: int, barrier: Barrier, latencies: dict, errors: list):
+    server = Server("http://localhost:" + str(port))
+    timings = []
+
+    def timed(request: str, result):
+        timings.append((request, perf_counter() - start))
+        return result
+
+    try:
+        barrier.wait()
+        start = perf_counter()
+        session = timed("createSession", server.createSession("languages.minilogo"))
+        start = perf_counter()
+        timed("execute", server.execute(session, program(i)))
+        start = perf_counter()
+        if timed("step", server.step(session, 0)) != "budget":  # Once halted
+            raise Exception("The program did not halt")
+        start = perf_counter()
+        timed("proceed", server.proceed(session))
+        start = perf_counter()
+        if timed("end", server.step(session, 0)) != "end":
+            raise Exception("The program did not end")
+        start = perf_counter()
+        timed("closeSession", server.closeSession(session))
+    except Exception as error:
+        errors.append(error)
+    for request, elapsed in timings:
+        latencies[request].append(elapsed)
+
+def wait_for(port: int, timeout: float = 30):
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=1).close()
+            return
+        except OSError:
+            sleep(0.1)
+    raise Exception("The server did not start")
+
+def memory(pid: int) -> int | None:
+    """
+    :return: the resident memory of a process in bytes, None when it cannot be read
+    """
+    status = Path("/proc") / str(pid) / "status"
+    if not status.is_file():
+        return None
+    for line in status.read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def main(arguments: list):
+    if len(arguments) > 2 and arguments[1] == "serve":
+        serve(int(arguments[2]), int(arguments[3]))
+        return
+    count = int(arguments[1]) if len(arguments) > 1 else 500
+
+    with socket.socket() as probe:  # A free port
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.session_benchmark", "serve", str(port), str(count)])
+    try:
+        wait_for(port)
+        idle = memory(process.pid)
+
+        latencies = {request: [] for request in REQUESTS}
+        errors = []
+        barrier = Barrier(count)
+        threads = [Thread(target=client, args=(port, i, barrier, latencies, errors)) for i in range(count)]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+        loaded = memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(str(count) + " concurrent sessions in {:.2f} s, {} errors".format(elapsed, len(errors)))
+    for error in errors[:3]:
+        print("    " + repr(error))
+    for request in REQUESTS:
+        if latencies[request]:
+            print("{:<13} p50 {:>8.1f} ms, p99 {:>8.1f} ms".format(
+                request, percentile(latencies[request], 0.5) * 1000, percentile(latencies[request], 0.99) * 1000
+            ))
+    if idle is not None and loaded is not None:
+        print("server memory: {:.1f} MiB idle, {:.1f} MiB after the sessions".format(idle / (1 << 20), loaded / (1 << 20)))
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,52 @@
+"""
+Time taken to get the tree of a program in a new process: parsed, with empty and with warmed up prediction DFAs, or
+loaded from the trees stored on disk by a previous process. Each case runs in a subprocess, for programs of several
+sizes, along with the size of the stored trees.
+
+Usage: python -m benchmarks.store_benchmark [lines...]
+"""
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from backend.parser import Parser
+from benchmarks.parser_benchmark import minilogo_program
+
+def child(lines: int, mode: str, directory: str):
+    parser = Parser("languages.minilogo", cache=False, directory=directory if mode == "store" else None)
+    code = minilogo_program(lines)
+    if mode == "warm":
+        parser.warm_up()
+
+    start = perf_counter()
+    parser.parse(code)
+    print(perf_counter() - start)
+
+def run(lines: int, mode: str, directory: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.store_benchmark", str(lines), mode, directory],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output) * 1000
+
+def main(arguments: list):
+    if len(arguments) > 3:
+        child(int(arguments[1]), arguments[2], arguments[3])
+        return
+
+    for lines in [int(argument) for argument in arguments[1:]] or [20, 200, 2000]:
+        with TemporaryDirectory() as directory:
+            cold = run(lines, "cold", directory)
+            warm = run(lines, "warm", directory)
+            run(lines, "store", directory)  # Stores the tree
+            stored = run(lines, "store", directory)
+            size = sum(path.stat().st_size for path in Path(directory).rglob("*.tree"))
+
+        print("minilogo, {:>5} lines: cold {:>8.2f} ms, warm {:>8.2f} ms, stored {:>8.2f} ms ({:.1f}x), {:,} B".format(
+            lines, cold, warm, stored, warm / stored, size
+        ))
+
+if __name__ == '__main__':
+    main(sys.argv)
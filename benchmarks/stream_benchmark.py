@@ -0,0 +1,57 @@
+"""
+Time to the first statement and peak memory of the interpretation of a large generated minilogo program from a file,
+parsed at once by interpret() against parsed one top-level item at a time by interpret_stream(). The program halts on
+its first statement, then proceeds to the end.
+
+Usage: python -m benchmarks.stream_benchmark [lines]
+"""
+import tempfile
+import tracemalloc
+from pathlib import Path
+from sys import argv
+from time import perf_counter
+
+from backend.parser import Parser
+from benchmarks.programs import statements_program
+from languages.minilogo.LanguageInterpreter import LanguageInterpreter
+
+def measure(path: Path, stream: bool) -> tuple[float, float, int]:
+    """
+    :return: the time to the first statement, the time to the end, and the peak memory of the interpretation, measured
+             by another run as tracemalloc slows it down
+    """
+    times = []
+    for trace in (False, True):
+        interpreter = LanguageInterpreter(Parser("languages.minilogo", cache=False))
+        if trace:
+            tracemalloc.start()
+        start = perf_counter()
+        if stream:
+            interpreter.interpret_stream(path)
+        else:
+            interpreter.interpret(path.read_text())
+        times.append(perf_counter() - start)
+        interpreter.proceed()
+        times.append(perf_counter() - start)
+        if not interpreter.finished:
+            raise Exception("The program did not run to the end")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return times[0], times[1], peak
+
+def main(arguments: list):
+    lines = int(arguments[1]) if len(arguments) > 1 else 10000
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "program.logo"
+        path.write_text(statements_program(lines))
+        LanguageInterpreter(Parser("languages.minilogo", cache=False)).interpret("halt()")  # Warm up
+
+        print("minilogo, " + str(lines) + " lines, " + str(path.stat().st_size // 1024) + " KiB")
+        for name, stream in (("interpret:       ", False), ("interpret_stream:", True)):
+            first, total, peak = measure(path, stream)
+            print(name + " first statement {:>8.3f} s, end {:>7.3f} s, peak {:>8.1f} MiB".format(
+                first, total, peak / (1 << 20)
+            ))
+
+if __name__ == '__main__':
+    main(argv)
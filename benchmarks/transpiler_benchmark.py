@@ -0,0 +1,48 @@
+"""
+Throughput of the minilogo transpiler against the closure compiler, with a cold and a warm code cache.
+
+Usage: python -m benchmarks.transpiler_benchmark [grid size]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.cache import CodeCache
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def measure(vm: LipVM, code: str, repeat: int = 3, clear: bool = False) -> float:
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    best = None
+    for _ in range(repeat):
+        if clear:
+            vm.interpreter.cache.clear()
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 30
+    code = grid_program(size, size)
+
+    compiler = LipVM("languages.minilogo")
+    compiled = measure(compiler, code)
+    lines = compiler.interpreter.environment.lines
+
+    transpiler = LipVM("languages.minilogo", "transpiler")
+    transpiler.interpreter.cache = CodeCache()
+    cold = measure(transpiler, code, clear=True)
+    assert transpiler.interpreter.environment.lines == lines
+    warm = measure(transpiler, code)
+    assert transpiler.interpreter.environment.lines == lines
+
+    print("Grid " + str(size) + "x" + str(size) + ": " + str(len(lines)) + " lines")
+    print("closure compiler:  {:>8.3f} s".format(compiled))
+    print("transpiler (cold): {:>8.3f} s ({:.1f}x)".format(cold, compiled / cold))
+    print("transpiler (warm): {:>8.3f} s ({:.1f}x)".format(warm, compiled / warm))
+
+if __name__ == '__main__':
+    main(argv)
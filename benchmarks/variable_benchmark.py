@@ -0,0 +1,42 @@
+"""
+Throughput of variable reads and assignments with the visit methods, on loops and calls over a few variables.
+Run it on two revisions to compare them, it only relies on the public API of LipVM.
+
+Usage: python -m benchmarks.variable_benchmark [iterations]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+
+def variable_program(n: int) -> str:
+    code = "a = 1\n"
+    code += "b = 2\n"
+    code += "def f(x, y) { c = x + a * y - b move(c, y + x / a) }\n"
+    code += "for i = 0 to " + str(n) + " {\n"
+    code += "    for j = 0 to 10 {\n"
+    code += "        a = a + 1 - 1\n"
+    code += "        f(i, j)\n"
+    code += "    }\n"
+    code += "}\n"
+    return code
+
+def main(arguments: list):
+    iterations = int(arguments[1]) if len(arguments) > 1 else 1000
+    code = variable_program(iterations)
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.compilation = False
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    best = None
+    for _ in range(3):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    print(str(iterations * 10) + " calls: {:.3f} s".format(best))
+
+if __name__ == '__main__':
+    main(argv)
@@ -0,0 +1,42 @@
+"""
+Throughput of the minilogo bytecode VM against the tree walking interpreter.
+
+Usage: python -m benchmarks.vm_benchmark [grid size]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def measure(vm: LipVM, code: str, repeat: int = 3) -> float:
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 30
+    code = grid_program(size, size)
+
+    walker = LipVM("languages.minilogo")
+    walker.interpreter.compilation = False
+    walking = measure(walker, code)
+    lines = walker.interpreter.environment.lines
+
+    vm = LipVM("languages.minilogo", "vm")
+    executing = measure(vm, code)
+    assert vm.interpreter.environment.lines == lines
+
+    print("Grid " + str(size) + "x" + str(size) + ": " + str(len(lines)) + " lines")
+    print("tree walker: {:>8.3f} s".format(walking))
+    print("bytecode vm: {:>8.3f} s ({:.1f}x)".format(executing, walking / executing))
+
+if __name__ == '__main__':
+    main(argv)
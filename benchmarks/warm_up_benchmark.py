@@ -0,0 +1,54 @@
+"""
+Latency of the first parse of a program in a new process, without and with warm-up, against the steady state.
+Each case runs in a subprocess, so that the prediction DFAs start empty.
+
+Usage: python -m benchmarks.warm_up_benchmark [lines]
+"""
+import subprocess
+import sys
+from time import perf_counter
+
+from backend.parser import Parser
+from benchmarks.parser_benchmark import minilogo_program
+
+def child(lines: int, warm: bool):
+    parser = Parser("languages.minilogo", cache=False)
+    code = minilogo_program(lines)
+
+    start = perf_counter()
+    if warm:
+        parser.warm_up()
+    warm_up = perf_counter() - start
+
+    start = perf_counter()
+    parser.parse(code)
+    first = perf_counter() - start
+
+    steady = None
+    for _ in range(5):
+        start = perf_counter()
+        parser.parse(code)
+        elapsed = perf_counter() - start
+        steady = elapsed if steady is None else min(steady, elapsed)
+
+    print(warm_up, first, steady)
+
+def main(arguments: list):
+    lines = int(arguments[1]) if len(arguments) > 1 else 200
+    if len(arguments) > 2:
+        child(lines, arguments[2] == "warm")
+        return
+
+    print("minilogo, " + str(lines) + " lines")
+    for mode in ("cold", "warm"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.warm_up_benchmark", str(lines), mode],
+            capture_output=True, text=True, check=True
+        ).stdout
+        warm_up, first, steady = (float(value) * 1000 for value in output.split())
+        print(mode + ": warm-up {:>8.2f} ms, first parse {:>8.2f} ms, steady state {:>8.2f} ms ({:.2f}x)".format(
+            warm_up, first, steady, first / steady
+        ))
+
+if __name__ == '__main__':
+    main(sys.argv)
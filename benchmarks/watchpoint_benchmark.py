@@ -0,0 +1,45 @@
+"""
+Speed of a fast run without watchpoints, and with watchpoints on an attribute and a variable which never fire.
+
+Usage: python -m benchmarks.watchpoint_benchmark [grid size]
+"""
+from sys import argv
+from time import perf_counter
+
+from backend.lipvm import LipVM
+from benchmarks.programs import grid_program
+
+def measure(vm: LipVM, code: str, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        vm.interpreter.interpret(code)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(arguments: list):
+    size = int(arguments[1]) if len(arguments) > 1 else 60
+    code = grid_program(size, size)
+
+    vm = LipVM("languages.minilogo")
+    tree = vm.interpreter.parser.parse(code)
+    vm.interpreter.parser.parse = lambda _: tree  # Only measure the interpretation
+
+    without = measure(vm, code)
+    lines = len(vm.interpreter.environment.lines)
+
+    vm.interpreter.compilation = False
+    uncompiled = measure(vm, code)
+
+    vm.interpreter.set_watchpoints(["lines", "unknown"], ["len(lines) < 0", None])
+    with_watchpoints = measure(vm, code)
+    assert vm.interpreter.finished and len(vm.interpreter.environment.lines) == lines
+
+    print("Grid " + str(size) + "x" + str(size) + ", fast run")
+    print("no watchpoint:          {:>8.3f} s".format(without))
+    print("no watchpoint, visits:  {:>8.3f} s".format(uncompiled))
+    print("2 watchpoints, visits:  {:>8.3f} s ({:.2f}x)".format(with_watchpoints, uncompiled / with_watchpoints))
+
+if __name__ == '__main__':
+    main(argv)
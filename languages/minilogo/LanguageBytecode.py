@@ -0,0 +1,231 @@
+from array import array
+
+from antlr4 import *
+
+from backend.parser import Parser
+
+from languages.minilogo.LanguageParser import LanguageParser
+
+# Opcodes, each instruction is an opcode followed by one argument
+LOAD_CONST = 0      # Push constants[argument]
+LOAD_LOCAL = 1      # Push the variable in slot argument of the current frame
+STORE_LOCAL = 2     # Pop into the variable in slot argument of the current frame
+ADD = 3
+SUBTRACT = 4
+MULTIPLY = 5
+DIVIDE = 6
+POP = 7
+MOVE = 8            # Pop y then x, and move the pen
+COLOR = 9           # Set the color to constants[argument]
+PEN = 10            # Raise the pen when argument is 1, lower it otherwise
+BEGIN_STEP = 11
+END_STEP = 12
+HALT = 13           # Halt, unless the halt of index argument already fired
+DEFINE = 14         # Define the function constants[argument]
+LOOKUP = 15         # Push the function called by the call site constants[argument]
+CALL = 16           # Call the function below the argument values on the stack
+RETURN = 17
+ENTER_SCOPE = 18
+LEAVE_SCOPE = 19
+FOR_RANGE = 20      # Replace the limit on top of the stack by an iterator over range(limit)
+FOR_ITER = 21       # Push the next value of the iterator on top of the stack, or pop it and jump to argument
+JUMP = 22
+END = 23
+
+class Function:
+    """
+    A function defined by a def command.
+    """
+
+    __slots__ = ("name", "parameters", "entry")
+
+    def __init__(self, name: str, parameters: tuple, entry: int = -1):
+        self.name = name
+        self.parameters = parameters  # Slots of the parameters
+        self.entry = entry            # Address of the first instruction of the body
+
+class CallSite:
+    """
+    A call command, refers to its function by name as functions are defined at runtime.
+    """
+
+    __slots__ = ("name", "call")
+
+    def __init__(self, name: str, call: int = -1):
+        self.name = name
+        self.call = call  # Address of the CALL instruction, jumped to when there are no arguments to evaluate
+
+class Program:
+    """
+    Bytecode of a minilogo program: instructions, constant pool and the names of the variable slots.
+    """
+
+    __slots__ = ("instructions", "constants", "names", "halts")
+
+    def __init__(self, instructions: array, constants: list, names: list, halts: int):
+        self.instructions = instructions
+        self.constants = constants
+        self.names = names
+        self.halts = halts
+
+class BytecodeCompiler:
+    """
+    Compile a minilogo AST into bytecode for LanguageVM.
+
+    Variables are resolved to slots of a program-wide table, a frame being an array of these slots.
+    Calls and for loops copy the current frame, which gives the semantic of the lexical closures of LanguageInterpreter.
+    Function bodies are compiled after the main program.
+    """
+
+    def __init__(self, parser: Parser):
+        self._compilers = [getattr(self, "compile" + rule[:1].upper() + rule[1:]) for rule in parser.rule_names]
+
+    def compile(self, tree: ParserRuleContext) -> Program:
+        self._instructions = array("i")
+        self._constants = []
+        self._literals = {}
+        self._slots = {}
+        self._halts = 0
+        self._functions = []
+
+        self._compile(tree)
+        self._emit(END)
+
+        while self._functions:
+            function, body = self._functions.pop(0)
+            function.entry = len(self._instructions)
+            self._compile(body)
+            self._emit(RETURN)
+
+        return Program(self._instructions, self._constants, list(self._slots), self._halts)
+
+    def _compile(self, ctx: ParserRuleContext) -> None:
+        self._compilers[ctx.getRuleIndex()](ctx)
+
+    def _emit(self, opcode: int, argument: int = 0) -> int:
+        self._instructions.append(opcode)
+        self._instructions.append(argument)
+        return len(self._instructions) - 2
+
+    def _patch(self, address: int, argument: int) -> None:
+        self._instructions[address + 1] = argument
+
+    def _constant(self, value) -> int:
+        self._constants.append(value)
+        return len(self._constants) - 1
+
+    def _slot(self, name: str) -> int:
+        return self._slots.setdefault(name, len(self._slots))
+
+    def _compile_statements(self, ctx: ParserRuleContext) -> None:
+        for child in ctx.getChildren():
+            if isinstance(child, ParserRuleContext):
+                self._compile(child)
+
+    def compileVariable(self, ctx: LanguageParser.VariableContext):
+        self._emit(LOAD_LOCAL, self._slot(ctx.ID().getText()))
+
+    def compileLiteral(self, ctx: LanguageParser.LiteralContext):
+        value = int(ctx.NUMBER().getText())
+        if value not in self._literals:
+            self._literals[value] = self._constant(value)
+        self._emit(LOAD_CONST, self._literals[value])
+
+    def compileExpression(self, ctx: LanguageParser.ExpressionContext):
+        if ctx.leftOperand is not None and ctx.rightOperand is not None:
+            self._compile(ctx.leftOperand)
+            self._compile(ctx.rightOperand)
+
+            match ctx.OPERATOR().getText():
+                case "+": self._emit(ADD)
+                case "-": self._emit(SUBTRACT)
+                case "*": self._emit(MULTIPLY)
+                case "/": self._emit(DIVIDE)
+                case _:
+                    raise Exception("Unknown operator: " + str(ctx.OPERATOR().getText()))
+
+        else:
+            operands = [child for child in ctx.getChildren() if isinstance(child, ParserRuleContext)]
+            if len(operands) > 1:
+                raise Exception("Unexpected number of results: " + str(len(operands)) + " for expression: " + str(ctx))
+            self._compile(operands[0])
+
+    def compileArguments(self, ctx: LanguageParser.ArgumentsContext):
+        for expression in ctx.expression():
+            self._compile(expression)
+
+    def compileMove(self, ctx: LanguageParser.MoveContext):
+        self._emit(BEGIN_STEP)
+        self._compile(ctx.expression(0))
+        self._compile(ctx.expression(1))
+        self._emit(MOVE)
+        self._emit(END_STEP)
+
+    def compileColor(self, ctx: LanguageParser.ColorContext):
+        self._emit(COLOR, self._constant(ctx.COLOR().getText()))
+
+    def compilePen(self, ctx: LanguageParser.PenContext):
+        self._emit(PEN, 1 if ctx.status.text == "up" else 0)
+
+    def compileHalt(self, ctx: LanguageParser.HaltContext):
+        self._emit(HALT, self._halts)
+        self._halts += 1
+
+    def compileCall(self, ctx: LanguageParser.CallContext):
+        site = CallSite(ctx.ID().getText())
+        self._emit(LOOKUP, self._constant(site))
+
+        # Arguments are only evaluated when the function has parameters, LOOKUP jumps over them otherwise
+        count = 0
+        if ctx.arguments() is not None:
+            self._compile(ctx.arguments())
+            count = len(ctx.arguments().expression())
+        site.call = self._emit(CALL, count)
+
+    def compileDef(self, ctx: LanguageParser.DefContext):
+        parameters = ()
+        if ctx.parameters() is not None:
+            parameters = tuple(self._slot(param.getText()) for param in ctx.parameters().ID())
+
+        function = Function(ctx.ID().getText(), parameters)
+        self._functions.append((function, ctx.body()))
+        self._emit(DEFINE, self._constant(function))
+
+    def compileParameters(self, ctx: LanguageParser.ParametersContext):
+        raise Exception("Parameters are compiled with their function: " + str(ctx))
+
+    def compileBody(self, ctx: LanguageParser.BodyContext):
+        self._compile_statements(ctx)
+
+    def compileAssignment(self, ctx: LanguageParser.AssignmentContext):
+        self._compile(ctx.expression())
+        self._emit(STORE_LOCAL, self._slot(ctx.ID().getText()))
+
+    def compileForloop(self, ctx: LanguageParser.ForloopContext):
+        self._emit(ENTER_SCOPE)
+        if ctx.assignment() is not None:
+            self._compile(ctx.assignment())
+            variable = ctx.assignment().ID().getText()
+        elif ctx.variable() is not None:
+            self._compile(ctx.variable())
+            self._emit(POP)
+            variable = ctx.variable().ID().getText()
+        else:
+            raise Exception("Cannot resolve iterator: " + str(ctx))
+
+        if ctx.expression() is None:
+            raise Exception("Undefined boundary in for loop: " + str(ctx))
+
+        self._compile(ctx.expression())
+        self._emit(FOR_RANGE)
+        loop = self._emit(FOR_ITER)
+        self._emit(STORE_LOCAL, self._slot(variable))
+        self._compile(ctx.body())
+        self._emit(JUMP, loop)
+        self._patch(loop, len(self._instructions))
+        self._emit(LEAVE_SCOPE)
+
+    def compileMain(self, ctx: LanguageParser.MainContext):
+        self._compile_statements(ctx)
+
+del LanguageParser
@@ -0,0 +1,227 @@
+from antlr4 import *
+
+from backend.environment import Environment
+from backend.frames import DEFAULT_LIMIT
+from backend.parser import Parser
+
+from languages.minilogo.LanguageParser import LanguageParser
+
+class LanguageCompiler:
+    """
+    Lower a minilogo AST into a tree of Python closures, interpreting the program without generators.
+
+    Statements are compiled into closures taking the current scope, expressions into closures taking the current scope
+    and returning their value. Constants are parsed, operators and names are resolved once, at compilation time.
+    The semantic is the one of LanguageInterpreter, apart from halt commands, which cannot be compiled. Calls and for
+    loops count the scopes they open, up to the maximum depth of the frames of LanguageInterpreter.
+    """
+
+    def __init__(self, parser: Parser):
+        self._compilers = [getattr(self, "compile" + rule[:1].upper() + rule[1:]) for rule in parser.rule_names]
+        self._environment = None
+        self._functions = None
+        self._haltable = False
+        self._depth = None
+        self._limit = DEFAULT_LIMIT
+
+    def compile(self, tree: ParserRuleContext, environment: Environment, max_depth: int = DEFAULT_LIMIT):
+        """
+        Compile a program.
+
+        :param tree: the AST of the program
+        :param environment: the environment the program interprets into
+        :param max_depth: the maximum number of scopes open at once, the program included
+        :return: a callable interpreting the program, None if the program contains halt commands or is too nested
+        """
+        self._environment = environment
+        self._functions = {}
+        self._haltable = False
+        self._depth = [0]  # Number of scopes open while the program runs
+        self._limit = max_depth
+
+        try:
+            program = self._compile(tree)
+        except RecursionError:  # Leave deeply nested programs to the interpretation loop
+            return None
+
+        if self._haltable:
+            return None
+        return program
+
+    def _compile(self, ctx: ParserRuleContext):
+        return self._compilers[ctx.getRuleIndex()](ctx)
+
+    def _open_scope(self, run):
+        """
+        :param run: a closure taking the scope it opens
+        :return: the closure counting the scope against the maximum depth while it runs
+        """
+        depth = self._depth
+        limit = self._limit
+
+        def open_scope(scope):
+            if depth[0] >= limit:
+                raise Exception("Maximum depth of frames exceeded: " + str(limit))
+            depth[0] += 1
+            run(scope)
+            depth[0] -= 1
+        return open_scope
+
+    def _compile_statements(self, ctx: ParserRuleContext):
+        statements = tuple(self._compile(child) for child in ctx.getChildren() if isinstance(child, ParserRuleContext))
+
+        def run(scope):
+            for statement in statements:
+                statement(scope)
+        return run
+
+    def compileVariable(self, ctx: LanguageParser.VariableContext):
+        name = ctx.ID().getText()
+
+        def evaluate(scope):
+            try:
+                return scope[name]
+            except KeyError:
+                raise Exception("Undefined variable: " + name) from None
+        return evaluate
+
+    def compileLiteral(self, ctx: LanguageParser.LiteralContext):
+        value = int(ctx.NUMBER().getText())
+        return lambda scope: value
+
+    def compileExpression(self, ctx: LanguageParser.ExpressionContext):
+        if ctx.leftOperand is not None and ctx.rightOperand is not None:
+            left = self._compile(ctx.leftOperand)
+            right = self._compile(ctx.rightOperand)
+
+            match ctx.OPERATOR().getText():
+                case "+": return lambda scope: left(scope) + right(scope)
+                case "-": return lambda scope: left(scope) - right(scope)
+                case "*": return lambda scope: left(scope) * right(scope)
+                case "/": return lambda scope: left(scope) / right(scope)
+                case _:
+                    raise Exception("Unknown operator: " + str(ctx.OPERATOR().getText()))
+
+        operands = [child for child in ctx.getChildren() if isinstance(child, ParserRuleContext)]
+        if len(operands) > 1:
+            raise Exception("Unexpected number of results: " + str(len(operands)) + " for expression: " + str(ctx))
+        return self._compile(operands[0])
+
+    def compileArguments(self, ctx: LanguageParser.ArgumentsContext):
+        arguments = tuple(self._compile(expression) for expression in ctx.expression())
+        return lambda scope: [argument(scope) for argument in arguments]
+
+    def compileMove(self, ctx: LanguageParser.MoveContext):
+        environment = self._environment
+        x = self._compile(ctx.expression(0))
+        y = self._compile(ctx.expression(1))
+
+        def run(scope):
+            target = (x(scope), y(scope))
+            if not environment.pen_up:
+                environment.lines.append((environment.pen_coordinates, target, environment.color))
+            environment.pen_coordinates = target
+        return run
+
+    def compileColor(self, ctx: LanguageParser.ColorContext):
+        environment = self._environment
+        color = ctx.COLOR().getText()
+
+        def run(scope):
+            environment.color = color
+        return run
+
+    def compilePen(self, ctx: LanguageParser.PenContext):
+        environment = self._environment
+        pen_up = ctx.status.text == "up"
+
+        def run(scope):
+            environment.pen_up = pen_up
+        return run
+
+    def compileHalt(self, ctx: LanguageParser.HaltContext):
+        self._haltable = True
+        return lambda scope: None
+
+    def compileCall(self, ctx: LanguageParser.CallContext):
+        functions = self._functions
+        name = ctx.ID().getText()
+        arguments = self._compile(ctx.arguments()) if ctx.arguments() is not None else lambda scope: []
+
+        def run(scope):
+            if name not in functions:
+                raise Exception("Undefined function: " + name)
+            parameters, body = functions[name]
+
+            values = []
+            if len(parameters) > 0:
+                values = arguments(scope)
+                if len(parameters) != len(values):
+                    raise Exception("Unexpected number of arguments: " + str(len(values)))
+
+            # Creating a lexical closure, binding arguments with parameters
+            closure = scope.copy()
+            for i in range(len(parameters)):
+                closure[parameters[i]] = values[i]
+
+            body(closure)
+        return run
+
+    def compileDef(self, ctx: LanguageParser.DefContext):
+        functions = self._functions
+        name = ctx.ID().getText()
+        parameters = self.compileParameters(ctx.parameters()) if ctx.parameters() is not None else []
+        body = self._open_scope(self._compile(ctx.body()))
+
+        def run(scope):
+            functions[name] = (parameters, body)
+        return run
+
+    def compileParameters(self, ctx: LanguageParser.ParametersContext):
+        return [param.getText() for param in ctx.ID()]
+
+    def compileBody(self, ctx: LanguageParser.BodyContext):
+        return self._compile_statements(ctx)
+
+    def compileAssignment(self, ctx: LanguageParser.AssignmentContext):
+        name = ctx.ID().getText()
+        value = self._compile(ctx.expression())
+
+        def run(scope):
+            scope[name] = value(scope)
+        return run
+
+    def compileForloop(self, ctx: LanguageParser.ForloopContext):
+        if ctx.assignment() is not None:
+            initialize = self._compile(ctx.assignment())
+            variable = ctx.assignment().ID().getText()
+        elif ctx.variable() is not None:
+            initialize = self._compile(ctx.variable())
+            variable = ctx.variable().ID().getText()
+        else:
+            raise Exception("Cannot resolve iterator: " + str(ctx))
+
+        if ctx.expression() is None:
+            raise Exception("Undefined boundary in for loop: " + str(ctx))
+
+        end = self._compile(ctx.expression())
+        body = self._compile(ctx.body())
+
+        def run(scope):
+            closure = scope.copy()
+            initialize(closure)
+            for iterator in range(end(closure)):
+                closure[variable] = iterator
+                body(closure)
+        return self._open_scope(run)
+
+    def compileMain(self, ctx: LanguageParser.MainContext):
+        depth = self._depth
+        statements = self._open_scope(self._compile_statements(ctx))
+
+        def run():
+            depth[0] = 0  # Scopes left open by a previous run which failed
+            statements({})
+        return run
+
+del LanguageParser
@@ -1,9 +1,11 @@
 from antlr4 import *
-from copy import deepcopy
 
+from backend.frames import FrameStack
 from backend.interpreter import Interpreter, step
 
+from languages.minilogo.LanguageCompiler import LanguageCompiler
 from languages.minilogo.LanguageParser import LanguageParser
+from languages.minilogo.LanguageResolver import UNBOUND, LanguageResolver
 
 class LanguageInterpreter(Interpreter):
     """
@@ -18,6 +20,11 @@ class LanguageInterpreter(Interpreter):
 
     def __init__(self, parser: Parser):
         super().__init__(parser)
+        self._compiler = LanguageCompiler(parser)
+        self._resolver = LanguageResolver()
+        self._resolution = None
+        self._variables = []             # Values of the variables by slot, the list of the environment
+        self._frames = FrameStack(list)  # Values saved by the open scopes, reused between interpretations
 
     def initialize(self) -> None:
         # State of minilogo
@@ -27,15 +34,54 @@ class LanguageInterpreter(Interpreter):
         self._environment.lines = []
 
         # State of execution
-        self._fired_halts = []
-        self._environment.sp = -1  # Scope pointer
-        self._environment.scopes = [None] * 100  # Closure scopes
+        self._fired_halts = set()
+        self._frames.clear()
+        self._environment.variables = []
+        self._variables = self._environment.variables  # A journaled copy when the environment is journaled
+        self._environment.frames = self._frames  # Closure scopes
         self._environment.functions = {}
 
+    def declare(self) -> tuple[str, ...]:
+        return ("color", "pen_coordinates", "pen_up", "lines", "variables", "frames", "functions", "names")
+
+    def load(self, tree: LanguageParser.MainContext):
+        self._resolution = self._resolver.resolve(tree)
+        self._slots = self._resolution.slots
+        self._scopes = self._resolution.scopes
+        self._environment.names = self._resolution.names  # Name of the variables by slot
+
+    def load_item(self, item: ParserRuleContext):
+        count = len(self._resolution.names)
+        self._resolver.resolve_item(item, self._resolution)
+        added = len(self._resolution.names) - count
+        if added > 0:  # The slots of the new variables
+            self._variables.extend([UNBOUND] * added)
+            self._environment.names = self._resolution.names  # Not the same list when the environment is journaled
+
+    def unload_item(self, item: ParserRuleContext):
+        released = self._resolver.release_item(item, self._resolution)
+        if self._fired_halts:
+            self._fired_halts.difference_update(released)
+
+    def rebind(self) -> None:
+        self._variables = getattr(self._environment, "variables", self._variables)
+
+    def compile(self, tree: LanguageParser.MainContext):
+        return self._compiler.compile(tree, self._environment, self.max_depth)
+
+    @property
+    def max_depth(self) -> int:
+        return self._frames.limit
+
+    @max_depth.setter
+    def max_depth(self, limit: int) -> None:
+        self._frames.limit = limit
+
     def visitVariable(self, ctx: LanguageParser.VariableContext):
-        if not ctx.ID().getText() in self._environment.scopes[self._environment.sp]:
+        value = self._variables[self._slots[ctx]]
+        if value is UNBOUND:
             raise Exception("Undefined variable: " + str(ctx.ID().getText()))
-        yield self._environment.scopes[self._environment.sp][ctx.ID().getText()]
+        yield value
 
     def visitLiteral(self, ctx: LanguageParser.LiteralContext):
         yield int(ctx.NUMBER().getText())
@@ -81,7 +127,7 @@ class LanguageInterpreter(Interpreter):
 
     def visitHalt(self, ctx: LanguageParser.HaltContext):
         if not ctx in self._fired_halts: # Each halt command can be activated only once.
-            self._fired_halts.append(ctx)
+            self._fired_halts.add(ctx)
             yield self.signalHalt()
 
     def visitCall(self, ctx: LanguageParser.CallContext):
@@ -98,24 +144,30 @@ class LanguageInterpreter(Interpreter):
                 raise Exception("Unexpected number of arguments: " + str(len(ctx.arguments())))
 
         # Creating a lexical closure
-        self._open_closure()
+        self._open_closure(body)
 
         # Binding arguments with parameters
         for i in range(len(parameters)):
-            self._environment.scopes[self._environment.sp][parameters[i]] = arguments[i]
+            self._variables[parameters[i]] = arguments[i]
+            if self._watchpoints is not None:
+                self._watchpoints.written(self._resolution.names[parameters[i]], arguments[i])
 
         # Interpret the body of the function
         yield self.visit(body)
 
         # Return to previous scope
-        self._close_closure()
+        self._close_closure(body)
 
-    def _open_closure(self):
-        self._environment.scopes[self._environment.sp + 1] = deepcopy(self._environment.scopes[self._environment.sp])
-        self._environment.sp += 1
+    def _open_closure(self, scope: ParserRuleContext):
+        # Saving the variables the scope writes, the other ones are left as they are when it closes
+        variables = self._variables
+        self._frames.push().variables[:] = [variables[slot] for slot in self._scopes[scope]]
 
-    def _close_closure(self):
-        self._environment.sp -= 1
+    def _close_closure(self, scope: ParserRuleContext):
+        variables = self._variables
+        for slot, value in zip(self._scopes[scope], self._frames.top.variables):
+            variables[slot] = value
+        self._frames.pop()
 
     def visitDef(self, ctx: LanguageParser.DefContext):
         if ctx.parameters() is not None:
@@ -125,23 +177,26 @@ class LanguageInterpreter(Interpreter):
             self._environment.functions[ctx.ID().getText()] = ([], ctx.body())
 
     def visitParameters(self, ctx: LanguageParser.ParametersContext):
-        yield [param.getText() for param in ctx.ID()]
+        yield self._slots[ctx]
 
     def visitBody(self, ctx: LanguageParser.BodyContext):
         yield self.visitChildren(ctx)
 
     def visitAssignment(self, ctx: LanguageParser.AssignmentContext):
-        self._environment.scopes[self._environment.sp][ctx.ID().getText()] = yield self.visit(ctx.expression())
-        yield self._environment.scopes[self._environment.sp][ctx.ID().getText()]
+        slot = self._slots[ctx]
+        self._variables[slot] = yield self.visit(ctx.expression())
+        if self._watchpoints is not None:
+            self._watchpoints.written(self._resolution.names[slot], self._variables[slot])
+        yield self._variables[slot]
 
     def visitForloop(self, ctx: LanguageParser.ForloopContext):
-        self._open_closure()
+        self._open_closure(ctx)
         if ctx.assignment() is not None:
             iterator = yield self.visit(ctx.assignment())
-            variable = ctx.assignment().ID().getText()
+            variable = self._slots[ctx.assignment()]
         elif ctx.variable() is not None:
             iterator = yield self.visit(ctx.variable())
-            variable = ctx.variable().ID().getText()
+            variable = self._slots[ctx.variable()]
         else:
             raise Exception("Cannot resolve iterator: " + str(ctx))
 
@@ -150,13 +205,15 @@ class LanguageInterpreter(Interpreter):
 
         limit = yield self.visit(ctx.expression())
         for iterator in range(limit):
-            self._environment.scopes[self._environment.sp][variable] = iterator
+            self._variables[variable] = iterator
+            if self._watchpoints is not None:
+                self._watchpoints.written(self._resolution.names[variable], iterator)
             yield self.visit(ctx.body())
-        self._close_closure()
+        self._close_closure(ctx)
 
     def visitMain(self, ctx: LanguageParser.MainContext):
-        self._environment.sp = 0
-        self._environment.scopes[self._environment.sp] = {}
+        self._variables[:] = self._resolution.frame()
+        self._environment.frames.push().variables.clear()  # The values of the top level are not restored
         yield self.visitChildren(ctx)
 
 del LanguageParser
\ No newline at end of file
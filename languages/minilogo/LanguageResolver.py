@@ -0,0 +1,139 @@
+from antlr4 import *
+
+from languages.minilogo.LanguageParser import LanguageParser
+
+# Value of the slots of the variables not bound yet
+UNBOUND = object()
+
+class Resolution:
+    """
+    Slots of the variables of a minilogo program.
+
+    Functions see the variables of their callers, so a name refers to the same variable wherever it is used: the slots
+    are program-wide and the values of the variables are an array of all of them. A scope, i.e. a for loop or the body
+    of a function, only saves the slots it writes when it opens and restores them when it closes.
+    """
+
+    __slots__ = ("names", "slots", "indices", "scopes")
+
+    def __init__(self):
+        self.names = []    # Name of each slot
+        self.slots = {}    # Slot of the variable and assignment nodes, slots of the parameters nodes
+        self.indices = {}  # Slot of each name
+        self.scopes = {}   # Slots written by each for loop and function body node, not by the scopes nested in it
+
+    def slot(self, name: str) -> int:
+        """
+        :return: the slot of a variable, a new one for a name seen for the first time
+        """
+        index = self.indices.get(name)
+        if index is None:
+            index = self.indices[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def frame(self) -> list:
+        """
+        :return: a frame in which no variable is bound
+        """
+        return [UNBOUND] * len(self.names)
+
+class LanguageResolver:
+    """
+    Resolve the variables of a minilogo program to slots, before its interpretation.
+    """
+
+    def resolve(self, tree: ParserRuleContext) -> Resolution:
+        """
+        :param tree: the AST of the program
+        :return: the slots of the variables of the program
+        :raise Exception: when a variable is read but never bound in the program
+        """
+        resolution = Resolution()
+        for node in self._bind(tree, resolution):
+            name = node.ID().getText()
+            if name not in resolution.indices:
+                raise Exception("Undefined variable: " + name)
+            resolution.slots[node] = resolution.indices[name]
+        self._scope(tree, resolution)
+        return resolution
+
+    def resolve_item(self, item: ParserRuleContext, resolution: Resolution) -> None:
+        """
+        Resolve the variables of a top-level item of a program interpreted while it is parsed, adding their slots to the
+        resolution of the items before it. The next items are not parsed yet, so a variable read but not bound so far
+        gets a slot as well: reading it fails at runtime if it is still not bound by then.
+
+        :param item: the AST of the item
+        :param resolution: the slots of the variables of the items before it, updated
+        """
+        for node in self._bind(item, resolution):
+            resolution.slots[node] = resolution.slot(node.ID().getText())
+        self._scope(item, resolution)
+
+    def release_item(self, item: ParserRuleContext, resolution: Resolution) -> list[ParserRuleContext]:
+        """
+        Drop the slots of the nodes of a top-level item once it is interpreted, so that the resolution does not grow
+        with the program, unless the item defines a function: its body is visited by the calls of the next items.
+
+        :param item: the AST of the item
+        :param resolution: the slots of the variables of the items, updated
+        :return: the nodes released, none for a definition
+        """
+        if isinstance(item, LanguageParser.DefContext):
+            return []
+        released = []
+        nodes = [item]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, ParserRuleContext):
+                resolution.slots.pop(node, None)
+                resolution.scopes.pop(node, None)
+                released.append(node)
+                nodes.extend(node.getChildren())
+        return released
+
+    def _bind(self, tree: ParserRuleContext, resolution: Resolution) -> list[LanguageParser.VariableContext]:
+        """
+        Give a slot to the variables bound in a tree, by the assignments and parameters.
+
+        :return: the variable nodes of the tree, to resolve once all the variables are bound
+        """
+        references = []
+        nodes = [tree]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, LanguageParser.AssignmentContext):
+                resolution.slots[node] = resolution.slot(node.ID().getText())
+            elif isinstance(node, LanguageParser.ParametersContext):
+                resolution.slots[node] = tuple(resolution.slot(param.getText()) for param in node.ID())
+            elif isinstance(node, LanguageParser.VariableContext):
+                references.append(node)
+            if isinstance(node, ParserRuleContext):
+                nodes.extend(node.getChildren())
+        return references
+
+    def _scope(self, tree: ParserRuleContext, resolution: Resolution) -> None:
+        """
+        Find the slots written by the scopes of a tree, once its variables are resolved.
+        """
+        written = {}  # Slots written by each scope
+        nodes = [(tree, None)]  # Nodes and their innermost scope, None at the top level
+        while nodes:
+            node, scope = nodes.pop()
+            if isinstance(node, LanguageParser.ForloopContext):
+                scope = node
+                written[scope] = set()
+                if node.variable() is not None:  # The iterator of the loop
+                    written[scope].add(resolution.slots[node.variable()])
+            elif isinstance(node, LanguageParser.DefContext):
+                scope = node.body()
+                written[scope] = set()
+            elif scope is not None and isinstance(node, LanguageParser.AssignmentContext):
+                written[scope].add(resolution.slots[node])
+            elif scope is not None and isinstance(node, LanguageParser.ParametersContext):
+                written[scope].update(resolution.slots[node])
+            if isinstance(node, ParserRuleContext):
+                nodes.extend((child, scope) for child in node.getChildren())
+        for scope, slots in written.items():
+            resolution.scopes[scope] = tuple(sorted(slots))
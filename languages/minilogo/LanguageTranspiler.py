@@ -0,0 +1,230 @@
+from hashlib import sha256
+
+from antlr4 import *
+
+from backend.cache import CodeCache
+from backend.frames import DEFAULT_LIMIT
+from backend.parser import Parser
+
+from languages.minilogo.LanguageInterpreter import LanguageInterpreter
+from languages.minilogo.LanguageParser import LanguageParser
+
+# Version of the generated code, part of the cache keys
+TRANSPILER_VERSION = "1"
+
+class PythonGenerator:
+    """
+    Generate the Python source of a minilogo program.
+
+    The program becomes a program(environment) function. Scopes are dictionaries, named after their nesting in the
+    generated code, that calls and for loops copy as the lexical closures of LanguageInterpreter.
+    A def command becomes a Python function defined at the same point of the program, a for loop a range loop.
+    """
+
+    def __init__(self, parser: Parser):
+        self._generators = [getattr(self, "generate" + rule[:1].upper() + rule[1:]) for rule in parser.rule_names]
+
+    def generate(self, tree: ParserRuleContext) -> str | None:
+        """
+        :param tree: the AST of the program
+        :return: the Python source of the program, None if the program contains halt commands
+        """
+        self._lines = []
+        self._indentation = 0
+        self._depth = 0
+        self._functions = 0
+        self._haltable = False
+
+        self._generate(tree)
+        if self._haltable:
+            return None
+        return "\n".join(self._lines) + "\n"
+
+    def _generate(self, ctx: ParserRuleContext):
+        return self._generators[ctx.getRuleIndex()](ctx)
+
+    def _line(self, line: str) -> None:
+        self._lines.append("    " * self._indentation + line)
+
+    def _scope(self) -> str:
+        return "scope" + str(self._depth)
+
+    def _generate_statements(self, ctx: ParserRuleContext) -> None:
+        lines = len(self._lines)
+        for child in ctx.getChildren():
+            if isinstance(child, ParserRuleContext):
+                self._generate(child)
+        if len(self._lines) == lines:
+            self._line("pass")
+
+    def generateVariable(self, ctx: LanguageParser.VariableContext) -> str:
+        return self._scope() + "[" + repr(ctx.ID().getText()) + "]"
+
+    def generateLiteral(self, ctx: LanguageParser.LiteralContext) -> str:
+        return repr(int(ctx.NUMBER().getText()))
+
+    def generateExpression(self, ctx: LanguageParser.ExpressionContext) -> str:
+        if ctx.leftOperand is not None and ctx.rightOperand is not None:
+            operator = ctx.OPERATOR().getText()
+            if operator not in ("+", "-", "*", "/"):
+                raise Exception("Unknown operator: " + operator)
+            return "(" + self._generate(ctx.leftOperand) + " " + operator + " " + self._generate(ctx.rightOperand) + ")"
+
+        operands = [child for child in ctx.getChildren() if isinstance(child, ParserRuleContext)]
+        if len(operands) > 1:
+            raise Exception("Unexpected number of results: " + str(len(operands)) + " for expression: " + str(ctx))
+        return self._generate(operands[0])
+
+    def generateArguments(self, ctx: LanguageParser.ArgumentsContext) -> str:
+        return "(" + "".join(self._generate(expression) + ", " for expression in ctx.expression()) + ")"
+
+    def generateMove(self, ctx: LanguageParser.MoveContext) -> None:
+        self._line("target = (" + self._generate(ctx.expression(0)) + ", " + self._generate(ctx.expression(1)) + ")")
+        self._line("if not environment.pen_up:")
+        self._line("    environment.lines.append((environment.pen_coordinates, target, environment.color))")
+        self._line("environment.pen_coordinates = target")
+
+    def generateColor(self, ctx: LanguageParser.ColorContext) -> None:
+        self._line("environment.color = " + repr(ctx.COLOR().getText()))
+
+    def generatePen(self, ctx: LanguageParser.PenContext) -> None:
+        self._line("environment.pen_up = " + repr(ctx.status.text == "up"))
+
+    def generateHalt(self, ctx: LanguageParser.HaltContext) -> None:
+        self._haltable = True
+        self._line("pass")
+
+    def generateCall(self, ctx: LanguageParser.CallContext) -> None:
+        name = repr(ctx.ID().getText())
+        arguments = self._generate(ctx.arguments()) if ctx.arguments() is not None else "()"
+
+        # Arguments are only evaluated when the function has parameters
+        self._line("if " + name + " not in functions:")
+        self._line("    raise Exception(\"Undefined function: \" + " + name + ")")
+        self._line("function = functions[" + name + "]")
+        self._line("function(" + self._scope() + ", " + arguments + " if function.parameters else ())")
+
+    def generateDef(self, ctx: LanguageParser.DefContext) -> None:
+        parameters = self.generateParameters(ctx.parameters()) if ctx.parameters() is not None else []
+        function = "function" + str(self._functions)
+        self._functions += 1
+
+        self._line("def " + function + "(caller, arguments):")
+        self._indentation += 1
+        self._depth += 1
+
+        # Creating a lexical closure, binding arguments with parameters
+        self._line("if len(arguments) != " + str(len(parameters)) + ":")
+        self._line("    raise Exception(\"Unexpected number of arguments: \" + str(len(arguments)))")
+        self._line(self._scope() + " = caller.copy()")
+        for i in range(len(parameters)):
+            self._line(self._scope() + "[" + repr(parameters[i]) + "] = arguments[" + str(i) + "]")
+        self._generate(ctx.body())
+
+        self._depth -= 1
+        self._indentation -= 1
+        self._line(function + ".parameters = " + repr(tuple(parameters)))
+        self._line("functions[" + repr(ctx.ID().getText()) + "] = " + function)
+
+    def generateParameters(self, ctx: LanguageParser.ParametersContext) -> list[str]:
+        return [param.getText() for param in ctx.ID()]
+
+    def generateBody(self, ctx: LanguageParser.BodyContext) -> None:
+        self._generate_statements(ctx)
+
+    def generateAssignment(self, ctx: LanguageParser.AssignmentContext) -> None:
+        self._line(self._scope() + "[" + repr(ctx.ID().getText()) + "] = " + self._generate(ctx.expression()))
+
+    def generateForloop(self, ctx: LanguageParser.ForloopContext) -> None:
+        enclosing = self._scope()
+        self._depth += 1
+        self._line(self._scope() + " = " + enclosing + ".copy()")
+
+        if ctx.assignment() is not None:
+            self._generate(ctx.assignment())
+            variable = ctx.assignment().ID().getText()
+        elif ctx.variable() is not None:
+            self._line(self._generate(ctx.variable()))
+            variable = ctx.variable().ID().getText()
+        else:
+            raise Exception("Cannot resolve iterator: " + str(ctx))
+
+        if ctx.expression() is None:
+            raise Exception("Undefined boundary in for loop: " + str(ctx))
+
+        iterator = "iterator" + str(self._depth)
+        self._line("for " + iterator + " in range(" + self._generate(ctx.expression()) + "):")
+        self._indentation += 1
+        self._line(self._scope() + "[" + repr(variable) + "] = " + iterator)
+        self._generate(ctx.body())
+        self._indentation -= 1
+        self._depth -= 1
+
+    def generateMain(self, ctx: LanguageParser.MainContext) -> None:
+        self._line("def program(environment):")
+        self._indentation += 1
+        self._line("functions = {}")
+        self._line(self._scope() + " = {}")
+        self._generate_statements(ctx)
+        self._indentation -= 1
+
+class LanguageTranspiler(LanguageInterpreter):
+    """
+    Engine running minilogo programs transpiled to Python.
+
+    The code objects compiled from the generated sources are cached by hash of the minilogo source, in a bounded memory
+    cache shared by all the transpilers unless a cache is set, e.g. a CodeCache storing them on disk.
+    Programs containing halt commands cannot be transpiled, the visit methods interpret them, as well as the programs
+    run with a maximum depth lower than the default one, the generated code not counting its scopes.
+    """
+
+    # Code objects shared by the transpilers without a dedicated cache
+    _shared_cache = CodeCache()
+
+    def __init__(self, parser: Parser):
+        super().__init__(parser)
+        self._generator = PythonGenerator(parser)
+        self._cache = LanguageTranspiler._shared_cache
+        self._code = None
+
+    def interpret(self, code: str) -> None:
+        self._code = code
+        super().interpret(code)
+
+    def compile(self, tree: LanguageParser.MainContext):
+        if self.max_depth < DEFAULT_LIMIT:
+            return None
+
+        key = sha256((TRANSPILER_VERSION + "\n" + self._code).encode()).hexdigest()
+        code = self._cache.get(key)
+        if code is None:
+            try:
+                source = self._generator.generate(tree)
+                if source is None:
+                    return None
+                code = compile(source, "<minilogo>", "exec")
+            except (RecursionError, SyntaxError, MemoryError):  # Leave deeply nested programs to the interpretation loop
+                return None
+            self._cache.put(key, code, len(source))
+
+        namespace = {}
+        exec(code, namespace)
+        program = namespace["program"]
+        environment = self._environment
+
+        def run():
+            try:
+                program(environment)
+            except KeyError as error:  # Scope lookups of undefined variables
+                raise Exception("Undefined variable: " + str(error.args[0])) from None
+        return run
+
+    @property
+    def cache(self) -> CodeCache:
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: CodeCache) -> None:
+        self._cache = cache
+
+del LanguageParser
@@ -0,0 +1,229 @@
+from backend.frames import DEFAULT_LIMIT
+from backend.parser import Parser
+
+from languages.minilogo.LanguageBytecode import *
+from languages.minilogo.LanguageInterpreter import LanguageInterpreter
+from languages.minilogo.LanguageResolver import UNBOUND
+
+class LanguageVM(LanguageInterpreter):
+    """
+    Stack based virtual machine executing minilogo programs compiled by BytecodeCompiler.
+
+    It is an alternative engine to the visit methods of LanguageInterpreter, with the same environment, halt commands
+    and step boundaries, so that halt(), step() and proceed() behave as with the interpretation loop.
+    """
+
+    def __init__(self, parser: Parser):
+        super().__init__(parser)
+        self._bytecode = BytecodeCompiler(parser)
+
+        # Execution state of the program
+        self._program = None
+        self._pc = -1
+        self._stack = []
+        self._frame = None
+        self._frames = []
+        self._max_depth = DEFAULT_LIMIT
+        self._fired_halts = bytearray()
+
+    def interpret(self, code: str) -> None:
+        self._suspend_requested = False  # A new program, the halts requested so far were for the previous one
+
+        # Set the interpretation environment
+        self._environment = self._create_environment()
+        self.initialize()
+
+        # Set the code to interpret
+        self._tree = self._parser.parse(code)
+        self.load(self._tree)
+        self._program = self._bytecode.compile(self._tree)
+
+        # Initialize the state of the execution
+        self._pc = 0
+        self._stack = []
+        self._frame = [UNBOUND] * len(self._program.names)
+        self._frames = []
+        self._fired_halts = bytearray(self._program.halts)
+
+        self._run()
+
+    def interpret_stream(self, path: str) -> None:
+        raise Exception("Streaming is not supported by the bytecode VM")
+
+    def halt(self) -> None:
+        """
+        Halt the program at the next step boundary, jump or call. From another thread than the worker, nothing is done
+        while the worker is idle, see Interpreter.halt().
+        """
+        if self._worker is not None and not self._on_worker():
+            super().halt()
+        else:
+            self._suspend_requested = True
+
+    def set_breakpoints(self, lines: list[int], conditions: list[str | None] | None = None) -> list[int]:
+        raise Exception("Breakpoints are not supported by the bytecode VM")
+
+    def set_watchpoints(self, names: list[str], conditions: list[str | None] | None = None) -> None:
+        raise Exception("Watchpoints are not supported by the bytecode VM")
+
+    def _run(self) -> None:
+        self._execute(False)
+
+    def _interpretation_step(self) -> bool:
+        return self._execute(True)
+
+    @property
+    def max_depth(self) -> int:
+        return self._max_depth
+
+    @max_depth.setter
+    def max_depth(self, limit: int) -> None:
+        self._max_depth = limit
+
+    @LanguageInterpreter.profiler.setter
+    def profiler(self, profiler) -> None:
+        raise Exception("Profiling is not supported by the bytecode VM")
+
+    @property
+    def finished(self) -> bool:
+        return self._pc < 0
+
+    def _execute(self, stepping: bool) -> bool:
+        """
+        Execute instructions until the program ends, halts or, when stepping, reaches a step boundary.
+
+        :param stepping: whether to stop at step boundaries
+        :return: False when the program halted, True otherwise
+        """
+        if self._suspend_requested:
+            self._suspend_requested = False
+            return False
+        if self._pc < 0:
+            return True
+
+        instructions = self._program.instructions
+        constants = self._program.constants
+        stack = self._stack
+        push = stack.append
+        pop = stack.pop
+        frames = self._frames
+        scopes = self._max_depth - 1  # Maximum number of frames below the current one
+        environment = self._environment
+        functions = self._environment.functions
+
+        pc = self._pc
+        frame = self._frame
+        try:
+            while True:
+                opcode = instructions[pc]
+                argument = instructions[pc + 1]
+                pc += 2
+
+                if opcode == LOAD_LOCAL:
+                    value = frame[argument]
+                    if value is UNBOUND:
+                        raise Exception("Undefined variable: " + self._program.names[argument])
+                    push(value)
+                elif opcode == LOAD_CONST:
+                    push(constants[argument])
+                elif opcode == STORE_LOCAL:
+                    frame[argument] = pop()
+                elif opcode == ADD:
+                    right = pop()
+                    stack[-1] += right
+                elif opcode == SUBTRACT:
+                    right = pop()
+                    stack[-1] -= right
+                elif opcode == MULTIPLY:
+                    right = pop()
+                    stack[-1] *= right
+                elif opcode == DIVIDE:
+                    right = pop()
+                    stack[-1] /= right
+                elif opcode == FOR_ITER:
+                    value = next(stack[-1], UNBOUND)
+                    if value is UNBOUND:
+                        pop()
+                        pc = argument
+                    else:
+                        push(value)
+                elif opcode == JUMP:
+                    pc = argument
+                    if self._suspend_requested:
+                        self._suspend_requested = False
+                        return False
+                elif opcode == MOVE:
+                    y = pop()
+                    x = pop()
+                    if not environment.pen_up:
+                        environment.lines.append((environment.pen_coordinates, (x, y), environment.color))
+                    environment.pen_coordinates = (x, y)
+                elif opcode == BEGIN_STEP or opcode == END_STEP:
+                    if stepping:
+                        return True
+                    if self._suspend_requested:
+                        self._suspend_requested = False
+                        return False
+                elif opcode == LOOKUP:
+                    site = constants[argument]
+                    if site.name not in functions:
+                        raise Exception("Undefined function: " + site.name)
+                    function = functions[site.name]
+                    push(function)
+                    if not function.parameters:
+                        pc = site.call
+                elif opcode == CALL:
+                    # Creating a lexical closure, binding arguments with parameters
+                    closure = frame.copy()
+                    function = stack[-1]
+                    if function.__class__ is Function:  # LOOKUP jumped over the arguments
+                        pop()
+                        if function.parameters:
+                            raise Exception("Unexpected number of arguments: 0")
+                    else:
+                        function = stack[-argument - 1]
+                        if len(function.parameters) != argument:
+                            raise Exception("Unexpected number of arguments: " + str(argument))
+                        for slot, value in zip(function.parameters, stack[-argument:]):
+                            closure[slot] = value
+                        del stack[-argument - 1:]
+                    if len(frames) >= scopes:
+                        raise Exception("Maximum depth of frames exceeded: " + str(self._max_depth))
+                    frames.append((frame, pc))
+                    frame = closure
+                    pc = function.entry
+                    if self._suspend_requested:
+                        self._suspend_requested = False
+                        return False
+                elif opcode == RETURN:
+                    frame, pc = frames.pop()
+                elif opcode == ENTER_SCOPE:
+                    if len(frames) >= scopes:
+                        raise Exception("Maximum depth of frames exceeded: " + str(self._max_depth))
+                    frames.append((frame, pc))
+                    frame = frame.copy()
+                elif opcode == LEAVE_SCOPE:
+                    frame = frames.pop()[0]
+                elif opcode == FOR_RANGE:
+                    push(iter(range(pop())))
+                elif opcode == POP:
+                    pop()
+                elif opcode == PEN:
+                    environment.pen_up = argument == 1
+                elif opcode == COLOR:
+                    environment.color = constants[argument]
+                elif opcode == DEFINE:
+                    function = constants[argument]
+                    functions[function.name] = function
+                elif opcode == HALT:
+                    if not self._fired_halts[argument]:  # Each halt command can be activated only once.
+                        self._fired_halts[argument] = 1
+                        return False
+                elif opcode == END:
+                    pc = -1
+                    return True
+                else:
+                    raise Exception("Unknown opcode: " + str(opcode))
+        finally:
+            self._pc = pc
+            self._frame = frame
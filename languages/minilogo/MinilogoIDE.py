@@ -1,6 +1,7 @@
 from tkinter import *
 from tkinter import ttk
 
+from backend.journal import APPEND, SET, Journal
 from backend.lipvm import LipVM
 
 class MinilogoIDE(Tk):
@@ -16,6 +17,11 @@ class MinilogoIDE(Tk):
 
         self._vm = LipVM("languages.minilogo")
 
+        # Only the lines drawn since the last version seen are added to the canvas
+        self._journal = Journal()
+        self._vm.interpreter.journal = self._journal
+        self._version = 0
+
     def components(self):
         self._panes = ttk.PanedWindow(self, orient=HORIZONTAL)
 
@@ -65,19 +71,33 @@ class MinilogoIDE(Tk):
         self.draw()
 
     def draw(self):
+        changes = self._journal.changes_since(self._version)
+        self._version = self._journal.version
+
+        if changes is None or any(change.kind == SET and change.name == "lines" for change in changes):
+            self.redraw()
+        else:
+            for change in changes:
+                if change.kind == APPEND and change.name == "lines":
+                    self.draw_line(change.value)
+
+    def redraw(self):
         self._canvas.delete("all")
         state = self._vm.interpreter.environment
 
         if hasattr(state, "lines"):
             for line in state.lines:
-                self._canvas.create_line(
-                    line[0][0],
-                    line[0][1],
-                    line[1][0],
-                    line[1][1],
-                    fill=line[2],
-                    width=4
-                )
+                self.draw_line(line)
+
+    def draw_line(self, line):
+        self._canvas.create_line(
+            line[0][0],
+            line[0][1],
+            line[1][0],
+            line[1][1],
+            fill=line[2],
+            width=4
+        )
 
 if __name__ == '__main__':
     MinilogoIDE().mainloop()
\ No newline at end of file
@@ -1,8 +1,8 @@
 from antlr4 import *
-from copy import deepcopy
 
-from backend.annotation import step
-from backend.interpreter import Interpreter
+from backend.frames import FrameStack
+from backend.interpreter import Interpreter, step
+from backend.scope import Scope
 
 from languages.statemachine.LanguageParser import LanguageParser
 
@@ -69,16 +69,13 @@ class Machine:
 
 class LanguageInterpreter(Interpreter):
 
-    def __init__(self, parser: Parser):
-        super().__init__(parser)
-
+    def initialize(self) -> None:
         # Initializing machines
         self._environment.machine = None
         self._environment.current_state = None
 
         # State of execution
-        self._environment.sp = -1                # Scope pointer
-        self._environment.scopes = [None] * 100  # Closure scopes
+        self._environment.frames = FrameStack(Scope)  # Closure scopes
         self._environment.primitives = {}        # Supported primitive functions
 
         # Primitives
@@ -110,9 +107,9 @@ class LanguageInterpreter(Interpreter):
         yield self.visit(ctx.body())
 
     def visitVariable(self, ctx: LanguageParser.VariableContext):
-        if not ctx.ID().getText() in self._environment.scopes[self._environment.sp]:
+        if not ctx.ID().getText() in self._environment.frames.top.variables:
             raise Exception("Undefined variable: " + str(ctx.ID().getText()))
-        yield self._environment.scopes[self._environment.sp][ctx.ID().getText()]
+        yield self._environment.frames.top.variables[ctx.ID().getText()]
 
     def visitLiteral(self, ctx: LanguageParser.LiteralContext):
         if ctx.variable() is not None:
@@ -170,8 +167,8 @@ class LanguageInterpreter(Interpreter):
         yield self.visitChildren(ctx)
 
     def visitAssignment(self, ctx: LanguageParser.AssignmentContext):
-        self._environment.scopes[self._environment.sp][ctx.ID().getText()] = yield self.visit(ctx.expression())
-        yield self._environment.scopes[self._environment.sp][ctx.ID().getText()]
+        self._environment.frames.top.variables[ctx.ID().getText()] = yield self.visit(ctx.expression())
+        yield self._environment.frames.top.variables[ctx.ID().getText()]
 
     def visitForloop(self, ctx: LanguageParser.ForloopContext):
         self._open_closure()
@@ -189,13 +186,19 @@ class LanguageInterpreter(Interpreter):
 
         limit = yield self.visit(ctx.expression())
         for iterator in range(limit):
-            self._environment.scopes[self._environment.sp][variable] = iterator
+            self._environment.frames.top.variables[variable] = iterator
             yield self.visit(ctx.body())
         self._close_closure()
 
+    def _open_closure(self):
+        variables = self._environment.frames.top.variables
+        self._environment.frames.push().variables = Scope(variables)
+
+    def _close_closure(self):
+        self._environment.frames.pop()
+
     def visitMain(self, ctx: LanguageParser.MainContext):
-        self._environment.sp = 0
-        self._environment.scopes[self._environment.sp] = {}
+        self._environment.frames.push().variables = Scope()
         yield self.visitChildren(ctx)
 
         if self._environment.machine.initial_state not in self._environment.machine.states:
@@ -2,7 +2,7 @@ from sys import argv
 from backend.lipvm import LipVM
 
 def main(arguments: list):
-    vm = LipVM(arguments[1])
+    vm = LipVM(*arguments[1:3])
     vm.serve(8080)
 
 if __name__ == '__main__':
@@ -0,0 +1,66 @@
+from backend.document import Document
+from backend.parser import ParseError, Parser
+
+def test_document_edit():
+    # Given
+    parser = Parser("languages.minilogo", cache=False)
+    code = "pen(down)\n"
+    code += "for i = 0 to 3 {\n"
+    code += "    move(i, 1)\n"
+    code += "}\n"
+    code += "move(5, 5) move(6, 6)\n"
+    document = Document(parser, code)
+    first, loop, move, last = document.tree.children
+
+    # When
+    offset = code.index("1)")
+    updated = document.edit(offset, offset + 1, "\n12")
+    tree = document.tree
+
+    # Then
+    assert updated
+    assert tree.children[0] is first and tree.children[2] is move and tree.children[3] is last
+    assert tree.children[1] is not loop
+    assert tree.children[1].getText() == "fori=0to3{move(i,12)}"
+    assert (move.start.line, move.start.column, move.start.start) == (6, 0, code.index("move(5") + 2)
+    assert (last.start.line, last.start.column) == (6, 11)
+
+def test_document_dirty():
+    # Given
+    parser = Parser("languages.minilogo", cache=False)
+    document = Document(parser, "move(1, 1)\nmove(2, 2)\n")
+
+    # When
+    updated = document.edit(11, 11, "move(")
+
+    # Then
+    assert not updated and document.dirty
+
+    # When
+    updated = document.edit(16, 16, "3, 3) ")
+
+    # Then
+    assert updated and not document.dirty
+    assert [item.getText() for item in document.tree.children] == ["move(1,1)", "move(3,3)", "move(2,2)"]
+    assert document.tree.children[2].start.start == document.code.index("move(2")
+
+def test_document_syntax_errors():
+    for code, position in (
+        ("def f(x) { move(x, 1) }\nf(2)\nmove(1, 2))\n", (3, 10)),
+        ("move(1, 1)\nmove(2,\n", (2, 7)),
+    ):
+        # Given
+        parser = Parser("languages.minilogo", cache=False)
+        document = Document(parser, code)
+
+        # When
+        try:
+            document.tree
+            raised = None
+        except ParseError as exception:
+            raised = exception
+
+        # Then
+        assert document.dirty
+        assert raised is not None
+        assert (raised.diagnostics[0].line, raised.diagnostics[0].column) == position
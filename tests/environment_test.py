@@ -0,0 +1,33 @@
+from backend.environment import Environment, declared_environment, fields
+from backend.lipvm import LipVM
+
+def test_declared_environment():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    # When
+    vm.interpreter.interpret("pen(down) move(1, 2)")
+    environment = vm.interpreter.environment
+
+    # Then
+    assert not hasattr(environment, "__dict__")
+    assert type(environment) is declared_environment(vm.interpreter.declare())
+    assert fields(environment)["lines"] == [((0, 0), (1, 2), "#FFFFFF")]
+    assert set(fields(environment)) == set(vm.interpreter.declare())
+
+    try:
+        environment.undeclared = 1
+        raised = False
+    except AttributeError:
+        raised = True
+    assert raised
+
+def test_dynamic_environment_fields():
+    # Given
+    environment = Environment()
+
+    # When
+    environment.x = 1
+
+    # Then
+    assert fields(environment) == {"x": 1}
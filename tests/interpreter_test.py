@@ -1,4 +1,5 @@
 from backend.lipvm import LipVM
+from backend.interpreter import StopReason
 
 def test_interpret():
     # Given
@@ -73,3 +74,377 @@ def test_halt_step_proceed():
     # Then
     assert len(vm.interpreter.environment.lines) == 2
     assert vm.interpreter.environment.lines[1] == ((300, 200), (400, 200), "#FFFFFF")
+
+def test_fast_run_matches_trampoline():
+    # Given
+    fast = LipVM("languages.minilogo")
+    fast.interpreter.compilation = False
+    trampoline = LipVM("languages.minilogo")
+    trampoline.interpreter.fast_run = False
+
+    code = open("languages/minilogo/examples/grid_example_with_function.logo").read()
+
+    # When
+    fast.interpreter.interpret(code)
+    trampoline.interpreter.interpret(code)
+
+    # Then
+    assert len(fast.interpreter.environment.lines) == 400
+    assert fast.interpreter.environment.lines == trampoline.interpreter.environment.lines
+
+def test_fast_run_deep_nesting():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.compilation = False
+
+    code = "pen(down)"
+    code += "move(" + "(" * 500 + "1" + ")" * 500 + ", 2)"
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert vm.interpreter.environment.lines[0] == ((0, 0), (1, 2), "#FFFFFF")
+
+def test_step_count():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    code = "halt()"
+    code += "pen(down)"
+    code += "for i = 0 to 10 { move(i, i) }"
+    vm.interpreter.interpret(code)
+
+    # When
+    reason = vm.interpreter.step(8) # Begin and end of 4 moves
+
+    # Then
+    assert reason == StopReason.BUDGET
+    assert len(vm.interpreter.environment.lines) == 4
+
+    # When
+    reason = vm.interpreter.step(100)
+
+    # Then
+    assert reason == StopReason.END
+    assert len(vm.interpreter.environment.lines) == 10
+
+def test_run_until():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    code = "halt()"
+    code += "pen(down)"
+    code += "for i = 0 to 10 { move(i, i) }"
+    code += "halt()"
+    code += "move(0, 0)"
+    vm.interpreter.interpret(code)
+
+    # When
+    reason = vm.interpreter.run_until(vm.interpreter.condition("len(lines) == 3"))
+
+    # Then
+    assert reason == StopReason.PREDICATE
+    assert len(vm.interpreter.environment.lines) == 3
+
+    # When
+    reason = vm.interpreter.run_until(lambda: False)
+
+    # Then
+    assert reason == StopReason.HALT
+    assert len(vm.interpreter.environment.lines) == 10
+
+def test_run_for():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.interpret("halt() pen(down) for i = 0 to 10 { move(i, i) }")
+
+    # When
+    reason = vm.interpreter.run_for(10000)
+
+    # Then
+    assert reason == StopReason.END
+    assert len(vm.interpreter.environment.lines) == 10
+    assert vm.interpreter.run_for(0) == StopReason.END
+
+def test_breakpoints():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    code = "pen(down)\n"
+    code += "for i = 0 to 3 {\n"
+    code += "    move(i, i)\n"
+    code += "}\n"
+    code += "move(0, 10)\n"
+    vm.interpreter.set_breakpoints([3])
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert len(vm.interpreter.environment.lines) == 0
+
+    # When
+    vm.interpreter.proceed()
+
+    # Then
+    assert len(vm.interpreter.environment.lines) == 1
+
+    # When
+    reason = vm.interpreter.step(100)
+
+    # Then
+    assert reason == StopReason.BREAKPOINT
+    assert len(vm.interpreter.environment.lines) == 2
+
+    # When
+    verified = vm.interpreter.set_breakpoints([4, 5], [None, "len(lines) > 10"])
+    reason = vm.interpreter.step(100)
+
+    # Then
+    assert verified == [5]
+    assert reason == StopReason.END
+    assert len(vm.interpreter.environment.lines) == 4
+
+def test_breakpoints_sent_again():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    code = "pen(down)\n"
+    code += "for i = 0 to 3 {\n"
+    code += "    move(i, i)\n"
+    code += "}\n"
+    code += "move(0, 10)\n"
+    vm.interpreter.set_breakpoints([3])
+    vm.interpreter.interpret(code)
+    vm.interpreter.proceed()
+
+    # When
+    vm.interpreter.set_breakpoints([3, 4])
+    vm.interpreter.proceed()
+
+    # Then
+    assert len(vm.interpreter.environment.lines) == 2
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert len(vm.interpreter.environment.lines) == 0
+
+def test_watchpoints():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    code = "pen(down)\n"
+    code += "for i = 0 to 5 {\n"
+    code += "    move(i, i)\n"
+    code += "}\n"
+    code += "x = 7\n"
+    vm.interpreter.set_watchpoints(["lines", "i"], ["len(lines) > 2", "i == 4"])
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert vm.interpreter.watchpoint == "lines"
+    assert len(vm.interpreter.environment.lines) == 3
+
+    # When
+    vm.interpreter.proceed()
+
+    # Then
+    assert vm.interpreter.watchpoint == "i"
+    assert len(vm.interpreter.environment.lines) == 4
+
+    # When
+    vm.interpreter.set_watchpoints(["x"])
+    reason = vm.interpreter.step(100)
+
+    # Then
+    assert reason == StopReason.WATCHPOINT
+    assert vm.interpreter.watchpoint == "x"
+
+    # When
+    vm.interpreter.set_watchpoints([])
+    reason = vm.interpreter.step(100)
+
+    # Then
+    assert reason == StopReason.END
+    assert vm.interpreter.watchpoint is None
+    assert len(vm.interpreter.environment.lines) == 5
+
+def test_watchpoints_run_modes():
+    code = "pen(down)\n"
+    code += "for i = 0 to 8 {\n"
+    code += "    move(i, i)\n"
+    code += "}\n"
+
+    for mode in ("fast run", "interpretation loop", "step", "run until"):
+        # Given
+        vm = LipVM("languages.minilogo")
+        vm.interpreter.fast_run = mode != "interpretation loop"
+        vm.interpreter.set_watchpoints(["i"], ["i % 2 == 0"])
+
+        # When
+        vm.interpreter.interpret(code)
+        positions = [len(vm.interpreter.environment.lines)]
+        while not vm.interpreter.finished:
+            if mode == "step":
+                vm.interpreter.step(100)
+            elif mode == "run until":
+                vm.interpreter.run_until(lambda: False)
+            else:
+                vm.interpreter.proceed()
+            positions.append(len(vm.interpreter.environment.lines))
+
+        # Then
+        assert positions == [0, 0, 2, 4, 6, 8], mode  # i = 0 is written by the assignment, then by the loop
+
+def test_interpret_stream(tmp_path):
+    # Given
+    vm = LipVM("languages.minilogo")
+    streaming = LipVM("languages.minilogo")
+
+    code = "def square(x, size) {\n"
+    code += "    move(x, y)\n"
+    code += "    move(x + size, y)\n"
+    code += "}\n"
+    code += "y = 5\n"
+    code += "pen(down)\n"
+    code += "halt()\n"
+    code += "square(10,\n    20)\n"
+    path = tmp_path / "program.logo"
+    path.write_text(code)
+
+    # When
+    vm.interpreter.interpret(code)
+    streaming.interpreter.interpret_stream(path)
+
+    # Then
+    assert not streaming.interpreter.finished
+    assert streaming.interpreter.environment.lines == []
+
+    # When
+    vm.interpreter.proceed()
+    streaming.interpreter.proceed()
+
+    # Then
+    assert streaming.interpreter.finished
+    assert streaming.interpreter.environment.lines == vm.interpreter.environment.lines
+    assert streaming.interpreter.environment.lines == [((0, 0), (10, 5), "#FFFFFF"), ((10, 5), (30, 5), "#FFFFFF")]
+
+def test_async_halt():
+    # Given
+    vm = LipVM("languages.minilogo")
+    code = "for i = 0 to 100000000 { move(i, 1) }"
+
+    # When
+    interpretation = vm.interpreter.async_interpret(code)
+    while getattr(vm.interpreter.environment, "pen_coordinates", (0, 0))[0] < 10:  # Until the loop runs
+        pass
+    vm.interpreter.halt()
+    interpretation.result(timeout=10)
+
+    # Then
+    assert not vm.interpreter.finished
+    halted_at = vm.interpreter.environment.pen_coordinates
+
+    # When
+    reason = vm.interpreter.async_step(2).result(timeout=10)
+
+    # Then
+    assert reason == StopReason.BUDGET
+    assert vm.interpreter.environment.pen_coordinates == (halted_at[0] + 1, 1)
+
+    # When
+    vm.interpreter.async_proceed()
+    while vm.interpreter.environment.pen_coordinates[0] < halted_at[0] + 10:  # Until the loop runs again
+        pass
+    vm.interpreter.halt()
+    reason = vm.interpreter.async_step(2).result(timeout=10)
+    vm.interpreter.close()
+
+    # Then
+    assert reason == StopReason.BUDGET
+    assert not vm.interpreter.finished
+
+def test_async_halt_while_idle():
+    for engine in ("interpreter", "vm"):
+        # Given
+        vm = LipVM("languages.minilogo", engine)
+        vm.interpreter.async_interpret("move(1, 1)").result(timeout=10)
+
+        # When
+        vm.interpreter.halt()
+        vm.interpreter.async_interpret("pen(down) move(1,1) move(2,2)").result(timeout=10)
+
+        # Then
+        assert vm.interpreter.finished, engine
+        assert len(vm.interpreter.environment.lines) == 2, engine
+
+        # When
+        vm.interpreter.async_interpret("move(1, 1) halt() pen(down) move(2, 2) move(3, 3)").result(timeout=10)
+        vm.interpreter.halt()
+        reason = vm.interpreter.async_step(2).result(timeout=10)
+        vm.interpreter.close()
+
+        # Then
+        assert reason == StopReason.BUDGET, engine
+        assert len(vm.interpreter.environment.lines) == 1, engine
+
+def test_async_set_points_while_running():
+    # Given
+    vm = LipVM("languages.minilogo")
+    code = "pen(down)\n"
+    code += "for i = 0 to 20000 {\n"
+    code += "    move(i, 1)\n"
+    code += "}\n"
+
+    # When
+    interpretation = vm.interpreter.async_interpret(code)
+    while getattr(vm.interpreter.environment, "pen_coordinates", (0, 0))[0] < 10:  # Until the loop runs
+        pass
+    watchpoints = vm.interpreter.async_set_watchpoints(["i"], ["i == 100"])
+    breakpoints = vm.interpreter.async_set_breakpoints([3])
+    verified = breakpoints.result(timeout=30)
+
+    # Then
+    assert interpretation.done() and watchpoints.done()
+    assert interpretation.exception() is None and watchpoints.exception() is None
+    assert len(vm.interpreter.environment.lines) == 20000
+    assert verified == [3]
+
+    # When
+    vm.interpreter.async_interpret(code).result(timeout=10)
+    vm.interpreter.close()
+
+    # Then
+    assert not vm.interpreter.finished
+    assert len(vm.interpreter.environment.lines) == 0  # Paused on the breakpoint of line 3
+
+def test_condition_refuses_code():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.interpret("move(1, 2)")
+    payloads = [
+        "().__class__.__base__.__subclasses__()",
+        "[c for c in ()]",
+        "lines.clear()",
+        "(lambda: 1)()",
+        "__import__('os')",
+        "len(lines) > 0 and __builtins__",
+    ]
+
+    # When
+    refused = []
+    for payload in payloads:
+        try:
+            vm.interpreter.condition(payload)
+        except Exception as error:
+            refused.append(str(error))
+
+    # Then
+    assert len(refused) == len(payloads)
+    assert all(message.startswith("Forbidden") for message in refused)
+    assert vm.interpreter.condition("len(lines) == 0 and pen_up and not -1 > 2 * 3")()
@@ -0,0 +1,108 @@
+from backend.environment import Environment
+from backend.journal import APPEND, SET, Journal, journal_environment, unjournal_environment
+from backend.lipvm import LipVM
+
+def test_journal():
+    # Given
+    vm = LipVM("languages.minilogo")
+    journal = Journal()
+    vm.interpreter.journal = journal
+
+    code = "pen(down)"
+    code += "halt()"
+    code += "move(1, 1)"
+    code += "move(2, 2)"
+
+    # When
+    vm.interpreter.interpret(code)
+    version = journal.version
+    vm.interpreter.proceed()
+    changes = journal.changes_since(version)
+
+    # Then
+    assert [(change.kind, change.name) for change in changes] == [
+        (APPEND, "lines"), (SET, "pen_coordinates"), (APPEND, "lines"), (SET, "pen_coordinates")
+    ]
+    assert [change.value for change in changes if change.kind == APPEND] == vm.interpreter.environment.lines
+    assert [change.version for change in changes] == list(range(version + 1, journal.version + 1))
+    assert journal.changes_since(journal.version) == []
+
+    # When
+    vm.interpreter.journal = None
+    vm.interpreter.interpret("pen(down) move(1, 1)")
+
+    # Then
+    assert type(vm.interpreter.environment.lines) is list
+    assert journal.changes_since(version) == changes
+
+def test_journal_capacity():
+    # Given
+    vm = LipVM("languages.minilogo")
+    journal = Journal(capacity=10)
+    vm.interpreter.journal = journal
+
+    # When
+    vm.interpreter.interpret("pen(down) for i = 0 to 10 { move(1, 1) }")
+
+    # Then
+    assert journal.changes_since(0) is None
+    assert len(journal.changes_since(journal.version - 10)) == 10
+    assert journal.changes_since(journal.version - 11) is None
+
+def test_journal_variables():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.compilation = False
+    journal = Journal()
+    vm.interpreter.journal = journal
+
+    code = "a = 0\n"
+    code += "halt()\n"
+    code += "for i = 0 to 100 {\n"
+    code += "    a = a + 1\n"
+    code += "}\n"
+    code += "b = a\n"
+
+    # When
+    vm.interpreter.interpret(code)
+    journaled = vm.interpreter.environment.variables
+
+    # Then
+    assert vm.interpreter.environment.variables is vm.interpreter._variables
+
+    # When
+    vm.interpreter.journal = None
+    vm.interpreter.set_watchpoints(["i"], ["i == 50"])
+    vm.interpreter.proceed()
+
+    # Then
+    assert vm.interpreter.environment.variables is vm.interpreter._variables
+    assert type(journaled) is not list and type(vm.interpreter.environment.variables) is not list
+
+    # When
+    vm.interpreter.set_watchpoints([])
+    vm.interpreter.proceed()
+
+    # Then
+    variables = dict(zip(vm.interpreter.environment.names, vm.interpreter.environment.variables))
+    assert vm.interpreter.environment.variables is vm.interpreter._variables
+    assert type(vm.interpreter.environment.variables) is list
+    assert variables["a"] == 0 and variables["b"] == 0  # The loop does not leak its writes
+    assert [change.name for change in journal.changes_since(0)].count("variables") > 0
+
+def test_unjournal_same_objects():
+    # Given
+    environment = Environment()
+    environment.lines = [1]
+    environment.functions = {"f": 1}
+    lines, functions = environment.lines, environment.functions
+    journal_environment(environment, Journal())
+
+    # When
+    environment.lines.append(2)
+    environment.functions["g"] = 2
+    unjournal_environment(environment)
+
+    # Then
+    assert environment.lines is lines and lines == [1, 2]
+    assert environment.functions is functions and functions == {"f": 1, "g": 2}
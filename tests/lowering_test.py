@@ -0,0 +1,53 @@
+from backend.lowering import Leaf
+from backend.parser import Parser
+from benchmarks.programs import EXAMPLES
+from languages.minilogo.LanguageInterpreter import LanguageInterpreter
+from languages.minilogo.LanguageParser import LanguageParser
+
+def test_lowering():
+    # Given
+    parser = Parser("languages.minilogo", cache=False)
+    code = "pen(up)\nmove(1, 2 + x)"
+
+    # When
+    tree = parser.parse(code)
+    move = tree.move(0)
+
+    # Then
+    assert isinstance(move, LanguageParser.MoveContext)
+    assert not vars(move)
+    assert tree.pen(0).status.text == "up"
+    assert [child.getText() for child in move.x.getChildren()] == ["1"]
+    assert move.y.OPERATOR().getText() == "+"
+    assert move.y.rightOperand.variable().ID().getText() == "x"
+    assert (move.start.text, move.start.line, move.start.column) == ("move", 2, 0)
+    assert (move.stop.text, move.stop.line, move.stop.column) == (")", 2, 13)
+    assert tree.start is tree.pen(0).start
+
+    # Only the tokens whose text varies are kept
+    leaves = []
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, Leaf):
+            leaves.append(node.text)
+        else:
+            nodes.extend(node.getChildren())
+    assert sorted(leaves) == ["+", "1", "2", "x"]
+
+def test_lowering_interpretation():
+    # Given
+    lean = LanguageInterpreter(Parser("languages.minilogo", cache=False))
+    lean.fast_run = False
+    full = LanguageInterpreter(Parser("languages.minilogo", cache=False, lean=False))
+    full.fast_run = False
+
+    code = (EXAMPLES / "grid_example_with_function.logo").read_text()
+
+    # When
+    lean.interpret(code)
+    full.interpret(code)
+
+    # Then
+    assert len(lean.environment.lines) == 400
+    assert lean.environment.lines == full.environment.lines
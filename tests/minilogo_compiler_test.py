@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from backend.lipvm import LipVM
+
+EXAMPLES = Path("languages/minilogo/examples")
+
+def interpret(code: str, compilation: bool) -> LipVM:
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.compilation = compilation
+    vm.interpreter.interpret(code)
+    return vm
+
+def test_compiled_examples():
+    for example in EXAMPLES.glob("*.logo"):
+        # Given
+        code = example.read_text()
+
+        # When
+        compiled = interpret(code, True)
+        visited = interpret(code, False)
+
+        # Then
+        assert compiled.interpreter.environment.lines == visited.interpreter.environment.lines
+        assert compiled.interpreter.environment.pen_coordinates == visited.interpreter.environment.pen_coordinates
+        assert compiled.interpreter.environment.color == visited.interpreter.environment.color
+
+def test_compiled_scopes():
+    # Given
+    code = "a = 1"
+    code += "def f(b) { move(a, b) a = 10 move(a, b) }"
+    code += "pen(down)"
+    code += "f(2)"
+    code += "move(a, 3)"
+
+    # When
+    vm = interpret(code, True)
+
+    # Then
+    assert vm.interpreter.environment.lines == [((0, 0), (1, 2), "#FFFFFF"), ((1, 2), (10, 2), "#FFFFFF"), ((10, 2), (1, 3), "#FFFFFF")]
+
+def test_halt_is_not_compiled():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    code = "pen(down)"
+    code += "halt()"
+    code += "move(300,200)"
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert vm.interpreter.environment.lines == []
+
+def test_deep_nesting_is_not_compiled():
+    # Given
+    code = "pen(down)"
+    code += "move(" + "(" * 500 + "1" + ")" * 500 + ", 2)"
+
+    # When
+    vm = interpret(code, True)
+
+    # Then
+    assert vm.interpreter.environment.lines[0] == ((0, 0), (1, 2), "#FFFFFF")
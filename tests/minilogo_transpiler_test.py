@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from backend.cache import CodeCache
+from backend.lipvm import LipVM
+
+EXAMPLES = Path("languages/minilogo/examples")
+
+def test_transpiler_examples():
+    for example in EXAMPLES.glob("*.logo"):
+        # Given
+        code = example.read_text()
+        transpiler = LipVM("languages.minilogo", "transpiler")
+        interpreter = LipVM("languages.minilogo")
+        interpreter.interpreter.compilation = False
+
+        # When
+        transpiler.interpreter.interpret(code)
+        transpiler.interpreter.proceed()
+        interpreter.interpreter.interpret(code)
+        interpreter.interpreter.proceed()
+
+        # Then
+        assert transpiler.interpreter.environment.lines == interpreter.interpreter.environment.lines
+        assert transpiler.interpreter.environment.pen_coordinates == interpreter.interpreter.environment.pen_coordinates
+
+def test_transpiler_disk_cache(tmp_path):
+    # Given
+    code = "def square(x, y, size) { pen(down) move(x + size, y) move(x + size, y + size) pen(up) }"
+    code += "for i = 0 to 3 { square(i * 10, 0, 5) }"
+
+    first = LipVM("languages.minilogo", "transpiler")
+    first.interpreter.cache = CodeCache(tmp_path)
+    second = LipVM("languages.minilogo", "transpiler")
+    second.interpreter.cache = CodeCache(tmp_path)
+
+    # When
+    first.interpreter.interpret(code)
+    second.interpreter.interpret(code)
+
+    # Then
+    assert len(list(tmp_path.iterdir())) == 1
+    assert second.interpreter.environment.lines == first.interpreter.environment.lines
+    assert len(second.interpreter.environment.lines) == 6
+
+def test_transpiler_undefined_variable():
+    # Given
+    transpiler = LipVM("languages.minilogo", "transpiler")
+
+    # When
+    try:
+        transpiler.interpreter.interpret("move(a, 1)")
+        raised = None
+    except Exception as exception:
+        raised = exception
+
+    # Then
+    assert str(raised) == "Undefined variable: a"
+
+def test_transpiler_shared_cache_bounded():
+    # Given
+    transpiler = LipVM("languages.minilogo", "transpiler")
+    cache = CodeCache(max_entries=2)
+    transpiler.interpreter.cache = cache
+
+    # When
+    for size in range(1, 5):
+        transpiler.interpreter.interpret("pen(down) move(" + str(size) + ", 1)")
+    transpiler.interpreter.interpret("pen(down) move(4, 1)")
+
+    # Then
+    assert len(cache) == 2
+    assert cache.bytes > 0
+    assert len(transpiler.interpreter.environment.lines) == 1
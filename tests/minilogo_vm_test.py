@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from backend.lipvm import LipVM
+
+EXAMPLES = Path("languages/minilogo/examples")
+
+def test_vm_examples():
+    for example in EXAMPLES.glob("*.logo"):
+        # Given
+        code = example.read_text()
+        vm = LipVM("languages.minilogo", "vm")
+        interpreter = LipVM("languages.minilogo")
+
+        # When
+        vm.interpreter.interpret(code)
+        vm.interpreter.proceed()
+        interpreter.interpreter.interpret(code)
+        interpreter.interpreter.proceed()
+
+        # Then
+        assert vm.interpreter.environment.lines == interpreter.interpreter.environment.lines
+        assert vm.interpreter.environment.pen_coordinates == interpreter.interpreter.environment.pen_coordinates
+
+def test_vm_halt_step_proceed():
+    # Given
+    vm = LipVM("languages.minilogo", "vm")
+
+    code = "move(200,200)"
+    code += "pen(down)"
+    code += "halt()"
+    code += "move(300,200)"
+    code += "move(400,200)"
+    code += "pen(up)"
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert len(vm.interpreter.environment.lines) == 0
+
+    # When
+    vm.interpreter.step() # Move to the beginning of next step
+    vm.interpreter.step() # Move to the end of next step
+
+    # Then
+    assert vm.interpreter.environment.lines == [((200, 200), (300, 200), "#FFFFFF")]
+
+    # When
+    vm.interpreter.proceed()
+
+    # Then
+    assert vm.interpreter.environment.lines[1] == ((300, 200), (400, 200), "#FFFFFF")
+
+def test_vm_calls():
+    # Given
+    vm = LipVM("languages.minilogo", "vm")
+
+    code = "a = 1"
+    code += "def f(b) { move(a, b) a = 10 move(a, b) }"
+    code += "def g() { f(a + 1) }"
+    code += "pen(down)"
+    code += "g()"
+    code += "move(a, 3)"
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert vm.interpreter.environment.lines == [((0, 0), (1, 2), "#FFFFFF"), ((1, 2), (10, 2), "#FFFFFF"), ((10, 2), (1, 3), "#FFFFFF")]
+
+def test_vm_halt_before_interpret():
+    # Given
+    vm = LipVM("languages.minilogo", "vm")
+
+    # When
+    vm.interpreter.halt()
+    vm.interpreter.interpret("pen(down) move(1, 1) move(2, 2)")
+
+    # Then
+    assert vm.interpreter.finished
+    assert len(vm.interpreter.environment.lines) == 2
@@ -0,0 +1,225 @@
+from threading import Barrier, Thread
+
+from backend.cache import ParseCache
+from backend.lipvm import LipVM
+from backend.parser import ParseError, Parser
+from benchmarks.programs import EXAMPLES
+from languages.minilogo.LanguageParser import LanguageParser
+
+def test_parse_cache():
+    # Given
+    vm = LipVM("languages.minilogo")
+    other = LipVM("languages.minilogo")
+    cache = vm.interpreter.parser.cache
+    cache.clear()
+
+    code = "pen(down) move(1, 1)"
+
+    # When
+    vm.interpreter.interpret(code)
+    other.interpreter.interpret(code)
+
+    # Then
+    assert other.interpreter.parser.cache is cache
+    assert other.interpreter.tree is vm.interpreter.tree
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert other.interpreter.environment.lines == [((0, 0), (1, 1), "#FFFFFF")]
+
+def test_parse_cache_kinds():
+    # Given
+    lean = Parser("languages.minilogo")
+    full = Parser("languages.minilogo", lean=False)
+    code = "pen(down) move(2, 3)"
+
+    # When
+    lean_tree = lean.parse(code)
+    full_tree = full.parse(code)
+
+    # Then
+    assert lean.cache is not full.cache
+    assert type(full_tree) is LanguageParser.MainContext
+    assert type(lean_tree) is not LanguageParser.MainContext
+    assert full_tree.toStringTree(recog=full_tree.parser) == \
+        "(main (pen pen ( down )) (move move ( (expression (literal 2)) , (expression (literal 3)) )))"
+    assert full.parse(code) is full_tree
+    assert lean.parse(code) is lean_tree
+
+def test_parse_cache_limits():
+    # Given
+    cache = ParseCache(max_entries=2, max_bytes=10)
+
+    # When
+    cache.put(b"a", "tree a", 4)
+    cache.put(b"b", "tree b", 4)
+    cache.get(b"a")
+    cache.put(b"c", "tree c", 4)
+    cache.put(b"d", "tree d", 11)
+
+    # Then
+    assert cache.get(b"a") == "tree a"
+    assert cache.get(b"b") is None
+    assert cache.get(b"c") == "tree c"
+    assert cache.get(b"d") is None
+    assert (len(cache), cache.bytes) == (2, 8)
+
+    # When
+    cache.max_bytes = 4
+
+    # Then
+    assert cache.get(b"a") is None
+    assert cache.get(b"c") == "tree c"
+
+def test_parse_errors():
+    # Given
+    parser = Parser("languages.minilogo", cache=False)
+
+    code = "move(1, 1)\n"
+    code += "move(2,\n"
+    code += "pen(up)\n"
+
+    # When
+    try:
+        parser.parse(code)
+        error = None
+    except ParseError as exception:
+        error = exception
+
+    # Then
+    assert error is not None
+    assert (error.diagnostics[0].line, error.diagnostics[0].column) == (3, 0)
+
+def test_two_stage_parse():
+    # Given
+    code = (EXAMPLES / "grid_example_with_function.logo").read_text()
+
+    # When
+    two_stage = Parser("languages.minilogo", cache=False).parse(code)
+    ll = Parser("languages.minilogo", cache=False, two_stage=False).parse(code)
+
+    # Then
+    assert two_stage.toStringTree(recog=two_stage.parser) == ll.toStringTree(recog=ll.parser)
+
+def test_parse_threads():
+    # Given
+    parser = Parser("languages.minilogo", cache=False, lean=False)
+    codes = ["move(" + str(i) + ", " + str(i) + ")" for i in range(8)]
+    results = {}
+
+    def parse(code):
+        for _ in range(20):
+            results[code] = parser.parse(code).getText()
+
+    # When
+    count = parser.warm_up()
+    threads = [Thread(target=parse, args=(code,)) for code in codes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Then
+    assert count == len(list(EXAMPLES.iterdir()))
+    assert results == {code: code.replace(" ", "") for code in codes}
+
+def test_dfa_persistence(tmp_path):
+    # Given
+    parser = Parser("languages.minilogo", cache=False)
+    code = "def square(size) { for i = 1 to 4 { move(size, 0) } } square(10)"
+    parser.warm_up()
+    expected = parser.parse(code).getText()
+    states = [len(dfa._states) for dfa in LanguageParser.decisionsToDFA]
+
+    # When
+    path = parser.save_dfa(tmp_path)
+    for dfa in LanguageParser.decisionsToDFA:
+        dfa._states = {}
+        dfa.s0 = None
+    loaded = parser.load_dfa(tmp_path)
+
+    path.write_bytes(b"corrupted")
+    corrupted = parser.load_dfa(tmp_path)
+
+    # Then
+    assert loaded
+    assert not corrupted
+    assert [len(dfa._states) for dfa in LanguageParser.decisionsToDFA] == states
+    assert parser.parse(code).getText() == expected
+    parser.warm_up()
+    assert [len(dfa._states) for dfa in LanguageParser.decisionsToDFA] == states
+
+def test_parse_store(tmp_path):
+    # Given
+    code = "pen(down) for i = 0 to 3 { move(i * 10, i) }"
+    first = LipVM("languages.minilogo", cache_directory=tmp_path)
+    second = LipVM("languages.minilogo", cache_directory=tmp_path)
+    store = first.interpreter.parser.store
+
+    # When
+    first.interpreter.interpret(code)
+    first.interpreter.parser.cache.clear()
+    second.interpreter.interpret(code)
+
+    # Then
+    entries = list(store.directory.iterdir())
+    assert len(entries) == 1
+    assert second.interpreter.tree is not first.interpreter.tree
+    assert second.interpreter.environment.lines == first.interpreter.environment.lines
+    assert len(second.interpreter.environment.lines) == 3
+
+    # When
+    entries[0].write_bytes(b"LipVM trees 0.0.0 stale entry")
+    stale = store.get(bytes.fromhex(entries[0].stem))
+
+    # Then
+    assert stale is None
+    assert not entries[0].exists()
+
+def test_parse_stream(tmp_path):
+    # Given
+    parser = Parser("languages.minilogo", cache=False)
+    code = (EXAMPLES / "grid_example_with_function.logo").read_text()
+    path = tmp_path / "program.logo"
+    path.write_text(code)
+
+    # When
+    items = list(parser.parse_stream(path, chunk_size=16))
+
+    # Then
+    tree = parser.parse(code)
+    assert [(type(item), item.start.line, item.stop.line) for item in items] == \
+        [(type(item), item.start.line, item.stop.line) for item in tree.children]
+
+    # When
+    path.write_text("pen(down)\nmove(1,\n  2)\n)\nmove(3, 4)\n")
+    try:
+        list(parser.parse_stream(path, chunk_size=4))
+        assert False
+    except ParseError as error:
+        # Then
+        assert [(diagnostic.line, diagnostic.column) for diagnostic in error.diagnostics] == [(4, 0)]
+
+def test_parse_store_threads(tmp_path):
+    # Given
+    parsers = [Parser("languages.minilogo", cache=False, directory=tmp_path) for _ in range(4)]
+    barrier = Barrier(len(parsers))
+    errors = []
+
+    def parse(parser: Parser):
+        try:
+            for i in range(30):  # New programs, parsed and stored by all the threads at once
+                barrier.wait()
+                parser.parse("pen(down) move(" + str(i) + ", 5)")
+        except Exception as error:
+            errors.append(error)
+            barrier.abort()
+
+    # When
+    threads = [Thread(target=parse, args=(parser,)) for parser in parsers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Then
+    assert errors == []
+    assert sorted(path.suffix for path in parsers[0].store.directory.iterdir()) == [".tree"] * 30
@@ -0,0 +1,48 @@
+from backend.lipvm import LipVM
+from backend.profiler import Profiler, SamplingProfiler
+from benchmarks.programs import grid_program
+
+def test_profiler():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.profiler = profiler = Profiler()
+
+    code = "pen(down)\n"
+    code += "for i = 0 to 3 {\n"
+    code += "    move(i, i)\n"
+    code += "    halt()\n"
+    code += "}\n"
+
+    # When
+    vm.interpreter.interpret(code)
+    vm.interpreter.proceed()
+    vm.interpreter.step(100)
+
+    # Then
+    entries = {(entry.rule, entry.line): entry for entry in profiler.entries()}
+    assert entries[("move", 3)].count == 3
+    assert entries[("forloop", 2)].count == 1
+    assert entries[("main", 1)].inclusive >= entries[("forloop", 2)].inclusive >= entries[("move", 3)].inclusive
+    assert all(entry.inclusive >= entry.exclusive for entry in entries.values())
+    assert profiler.table().splitlines()[0].split()[:3] == ["rule", "location", "visits"]
+    assert all(line.startswith("main@1:0") for line in profiler.collapsed().splitlines())
+
+    # When
+    vm.interpreter.profiler = None
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert entries[("move", 3)].count == 3
+
+def test_sampling_profiler():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.profiler = profiler = SamplingProfiler(0.001)
+
+    # When
+    vm.interpreter.interpret(grid_program(30, 30))
+    vm.interpreter.profiler = None
+
+    # Then
+    assert len(profiler.entries()) > 0
+    assert all(line.startswith("main@") for line in profiler.collapsed().splitlines())
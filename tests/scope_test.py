@@ -0,0 +1,129 @@
+from backend.lipvm import LipVM
+from backend.scope import Scope
+
+from languages.minilogo.LanguageResolver import LanguageResolver
+
+def test_scope_copy_on_write():
+    # Given
+    parent = Scope()
+    parent["a"] = 1
+
+    # When
+    child = Scope(parent)
+    grandchild = Scope(child)
+    child["a"] = 2
+    child["b"] = 3
+
+    # Then
+    assert parent["a"] == 1 and "b" not in parent
+    assert child["a"] == 2 and child["b"] == 3
+    assert grandchild["a"] == 1 and "b" not in grandchild
+
+def test_closures_do_not_leak():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.compilation = False
+
+    code = "a = 1"
+    code += "def f(b) { move(a, b) a = 10 move(a, b) }"
+    code += "def g() { f(a + 1) }"
+    code += "pen(down)"
+    code += "g()"
+    code += "for i = 0 to 2 { a = 20 }"
+    code += "move(a, 3)"
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert vm.interpreter.environment.lines == [((0, 0), (1, 2), "#FFFFFF"), ((1, 2), (10, 2), "#FFFFFF"), ((10, 2), (1, 3), "#FFFFFF")]
+
+def test_undefined_variable_before_execution():
+    # Given
+    vm = LipVM("languages.minilogo")
+
+    code = "pen(down)"
+    code += "move(1, 1)"
+    code += "def f() { move(a, 1) }"
+    code += "f()"
+
+    # When
+    try:
+        vm.interpreter.interpret(code)
+        raised = None
+    except Exception as exception:
+        raised = exception
+
+    # Then
+    assert str(raised) == "Undefined variable: a"
+    assert not hasattr(vm.interpreter.environment, "lines") or len(vm.interpreter.environment.lines) == 0
+
+def test_deep_recursion():
+    # Given
+    vm = LipVM("languages.minilogo")
+    vm.interpreter.max_depth = 20000
+
+    code = "def f(n) { move(n, n) f(n + 1) }"
+    code += "f(0)"
+
+    # When
+    try:
+        vm.interpreter.interpret(code)
+        raised = None
+    except Exception as exception:
+        raised = exception
+
+    # Then
+    assert str(raised) == "Maximum depth of frames exceeded: 20000"
+    assert vm.interpreter.environment.pen_coordinates == (19998, 19998)
+
+def test_max_depth_engines():
+    for engine in ("interpreter", "vm", "transpiler"):
+        for compilation in (True, False):
+            # Given
+            vm = LipVM("languages.minilogo", engine)
+            vm.interpreter.compilation = compilation
+            vm.interpreter.max_depth = 20
+
+            nested = "".join("for i" + str(i) + " = 0 to 1 { " for i in range(23)) + "move(1, 1)" + " }" * 23
+            recursive = "def f(n) { move(n, n) f(n + 1) } f(0)"
+            allowed = "".join("for i" + str(i) + " = 0 to 1 { " for i in range(19)) + "move(1, 1)" + " }" * 19
+
+            # When
+            raised = []
+            for code in (nested, recursive):
+                try:
+                    vm.interpreter.interpret(code)
+                    raised.append(None)
+                except Exception as exception:
+                    raised.append(str(exception))
+            recursed = vm.interpreter.environment.pen_coordinates
+            vm.interpreter.interpret(allowed)
+
+            # Then
+            assert raised == ["Maximum depth of frames exceeded: 20"] * 2, (engine, compilation)
+            assert recursed == (18, 18), (engine, compilation)
+            assert vm.interpreter.environment.pen_coordinates == (1, 1), (engine, compilation)
+
+def test_scopes_save_their_writes():
+    # Given
+    code = "".join("v" + str(i) + " = " + str(i) + "\n" for i in range(100))
+    code += "a = 1\n"
+    code += "def f(b) { for i = 0 to 2 { a = a + b c = i } move(a, b) }\n"
+    code += "pen(down)\n"
+    code += "for j = 0 to 3 { f(j) a = a + 10 move(a, j) }\n"
+    code += "move(a, v99)\n"
+
+    visited = LipVM("languages.minilogo")
+    visited.interpreter.compilation = False
+    compiled = LipVM("languages.minilogo")
+
+    # When
+    visited.interpreter.interpret(code)
+    compiled.interpreter.interpret(code)
+    scopes = LanguageResolver().resolve(visited.interpreter.parser.parse(code)).scopes
+
+    # Then
+    assert visited.interpreter.environment.lines == compiled.interpreter.environment.lines
+    assert visited.interpreter.environment.pen_coordinates == (1, 99)
+    assert sorted(len(slots) for slots in scopes.values()) == [1, 2, 3]  # The body of f, its loop, the outer loop
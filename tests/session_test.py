@@ -0,0 +1,83 @@
+from jsonrpclib.SimpleJSONRPCServer import SimpleJSONRPCServer
+
+from backend.lipvm import Sessions
+from backend.protocols import DebugAdapterProtocol, LanguageExecutionServerProtocol, SessionProtocol
+
+def test_sessions():
+    # Given
+    sessions = Sessions()
+    server = SimpleJSONRPCServer(("localhost", 0), logRequests=False)
+    session_protocol = SessionProtocol(sessions, server)
+    execution = LanguageExecutionServerProtocol(sessions, server)
+    debug = DebugAdapterProtocol(sessions, server)
+
+    # When
+    first = session_protocol.createSession("languages.minilogo")
+    second = session_protocol.createSession("languages.minilogo")
+    execution.execute(first, "pen(down) move(10, 10) halt() move(20, 20)")
+    execution.execute(second, "move(30, 30)")
+
+    # Then
+    assert debug.step(first, 0) == "budget"  # Once the program halted
+    assert debug.step(second, 0) == "end"
+    assert sessions.interpreter(first).environment.lines == [((0, 0), (10, 10), "#FFFFFF")]
+    assert sessions.interpreter(second).environment.pen_coordinates == (30, 30)
+    assert sessions.interpreter(first).tree is sessions.interpreter(first).parser.parse(
+        "pen(down) move(10, 10) halt() move(20, 20)"
+    )
+
+    # When
+    session_protocol.closeSession(first)
+
+    # Then
+    assert first not in sessions
+    assert len(sessions) == 1
+    try:
+        debug.proceed(first)
+        assert False
+    except Exception as error:
+        assert str(error) == "Unknown session: " + first
+
+    server.server_close()
+    sessions.clear()
+
+def test_session_limits():
+    # Given
+    now = [0.0]
+    sessions = Sessions(limit=2, timeout=60, clock=lambda: now[0])
+    first = sessions.create("languages.minilogo")
+    now[0] = 30.0
+    second = sessions.create("languages.minilogo")
+
+    # When
+    try:
+        sessions.create("languages.minilogo")
+        assert False
+    except Exception as error:
+        # Then
+        assert str(error) == "Too many sessions: 2"
+
+    # When
+    now[0] = 80.0
+    sessions.interpreter(second)
+    third = sessions.create("languages.minilogo")
+
+    # Then
+    assert first not in sessions
+    assert second in sessions and third in sessions
+
+    # When
+    now[0] = 200.0
+    evicted = sessions.evict()
+
+    # Then
+    assert sorted(evicted) == sorted([second, third])
+    assert len(sessions) == 0
+
+    # When
+    try:
+        sessions.create("os")
+        assert False
+    except Exception as error:
+        # Then
+        assert str(error) == "Unknown language: os"
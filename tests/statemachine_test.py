@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from backend.lipvm import LipVM
+
+EXAMPLES = Path("languages/statemachine/examples")
+
+def test_trafficlights(monkeypatch, capsys):
+    # Given
+    vm = LipVM("languages.statemachine")
+    code = (EXAMPLES / "trafficlights.statemachine").read_text()
+    events = iter(["switchCapacity", "next", "next", "next", "stop"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(events))
+
+    # When
+    vm.interpreter.interpret(code)
+
+    # Then
+    assert vm.interpreter.environment.machine.name == "TrafficLight"
+    assert str(vm.interpreter.environment.current_state) == "RedLight"
+    assert capsys.readouterr().out.split() == ['"RedLight"', '"GreenLight"', '"YellowLight"', '"RedLight"']
+
+def test_halt_run_modes(monkeypatch, capsys):
+    code = "statemachine Halting\n"
+    code += "events\n    go\n"
+    code += "initialState A\n"
+    code += "state A\n    go => B\nend\n"
+    code += "state B\n    activate: {\n        print(\"inB\") halt() print(\"after\") halt() print(\"end\")\n    }\nend\n"
+
+    for mode in ("fast run", "interpretation loop", "step", "run until", "run for"):
+        # Given
+        vm = LipVM("languages.statemachine")
+        vm.interpreter.fast_run = mode == "fast run"
+        events = iter(["go", "stop"])
+        monkeypatch.setattr("builtins.input", lambda prompt: next(events))
+
+        # When
+        vm.interpreter.interpret(code)
+        printed = [capsys.readouterr().out.split()]
+        while not vm.interpreter.finished:
+            if mode == "step":
+                vm.interpreter.step(100)
+            elif mode == "run until":
+                vm.interpreter.run_until(lambda: False)
+            elif mode == "run for":
+                vm.interpreter.run_for(1000)
+            else:
+                vm.interpreter.proceed()
+            printed.append(capsys.readouterr().out.split())
+
+        # Then
+        assert printed == [['"inB"'], ['"after"'], ['"end"']], mode